@@ -2,8 +2,20 @@ import os
 from flask import Flask
 from flask_smorest import Api
 
-from app.config import Config, TestConfig
-from app.extensions import db, jwt, ma
+from app.config import Config, TestConfig, engine_options
+from app.extensions import (
+    cache,
+    compressor,
+    db,
+    jwt,
+    ma,
+    metrics,
+    migrate,
+    password_hasher,
+    rate_limiter,
+    replicas,
+    revoked_tokens,
+)
 
 MODE = os.getenv("FLASK_ENV", "development")
 
@@ -16,6 +28,7 @@ def create_app(config_class=Config):
     else:
         app.config.from_object(config_class)
 
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
     app.config["API_SPEC_OPTIONS"] = {
         "security": [{"bearerAuth": []}],
         "components": {
@@ -30,15 +43,29 @@ def create_app(config_class=Config):
     }
 
     db.init_app(app)
+    migrate.init_app(app, db)
     jwt.init_app(app)
+    revoked_tokens.init_app(app, jwt)
     ma.init_app(app)
+    cache.init_app(app)
+    replicas.init_app(app)
+    # metrics first: its after_request hook then runs last, after compression
+    metrics.init_app(app)
+    # after metrics, so rejected requests are measured too
+    rate_limiter.init_app(app, jwt)
+    compressor.init_app(app)
+    password_hasher.init_app(app)
 
     from app.routes import bp as api_blueprint
+    from app.export import export_cli
+    from app.outbox import outbox_cli
+    from app.stats import stats_cli
+
+    app.cli.add_command(export_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(stats_cli)
 
     api = Api(app)
     api.register_blueprint(api_blueprint)
 
-    with app.app_context():
-        db.create_all()
-
     return app
@@ -0,0 +1,265 @@
+"""Async serving mode for the read endpoints, on SQLAlchemy's asyncio engine.
+
+The Starlette app mirrors the GET routes of :mod:`app.routes` (same paths,
+query arguments, JSON bodies, pagination header and ETags) with the same
+models and marshmallow schemas, but every request is a coroutine waiting on
+an async driver (asyncpg for PostgreSQL, aiosqlite for SQLite) instead of a
+thread blocked on the database. Writes, login and the docs stay on the Flask
+app, so route them there.
+
+Tokens issued by the Flask app are verified here with the same secret; revoked
+tokens are read from the revoked_tokens table every
+JWT_REVOCATION_SYNC_INTERVAL seconds.
+
+Needs the packages listed in requirements-async.txt. Run it with
+``uvicorn asgi:app``.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import jwt
+from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app import stats
+from app.config import Config, engine_options
+from app.etags import people_etag, person_etag
+from app.models import Person, RevokedToken, Vehicle
+from app.routes import filter_people, filter_vehicles
+from app.schemas import PersonListArgsSchema, VehicleSearchArgsSchema
+from app.serializers import dump_people, dump_person, dump_vehicle, dump_vehicles
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_uri(uri):
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def async_engine_options(config):
+    """engine_options() with the statement timeout in asyncpg's format"""
+    options = engine_options(config)
+    # The sync pool class does not fit the asyncio engine
+    options.pop("poolclass", None)
+    if config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        # aiosqlite engines default to NullPool, which takes no sizing
+        for key in ("pool_size", "max_overflow", "pool_timeout"):
+            options.pop(key, None)
+    if options.pop("connect_args", None):
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(config["DB_STATEMENT_TIMEOUT_MS"])
+            }
+        }
+    return options
+
+
+def error(status, message=None):
+    """Error body in the format flask-smorest uses"""
+    body = {"code": status, "status": HTTPStatus(status).phrase}
+    if message:
+        body["message"] = message
+    return JSONResponse(body, status_code=status)
+
+
+def tagged(request, data, tag, headers=None):
+    """JSON response with a weak ETag, or 304 when If-None-Match has it"""
+    headers = {**(headers or {}), "ETag": f'W/"{tag}"'}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(data, headers=headers)
+
+
+class RevokedTokens:
+    """In-memory copy of the unexpired revoked jtis, reloaded periodically"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.jtis = frozenset()
+        self.synced_at = None
+        self._lock = asyncio.Lock()
+
+    async def contains(self, sessionmaker, jti):
+        if self.synced_at is None or time.monotonic() - self.synced_at > self.interval:
+            async with self._lock:
+                if (
+                    self.synced_at is None
+                    or time.monotonic() - self.synced_at > self.interval
+                ):
+                    # expires_at is stored as naive UTC
+                    now = datetime.now(timezone.utc).replace(tzinfo=None)
+                    async with sessionmaker() as session:
+                        rows = await session.scalars(
+                            select(RevokedToken.jti).where(
+                                RevokedToken.expires_at > now
+                            )
+                        )
+                        self.jtis = frozenset(rows)
+                    self.synced_at = time.monotonic()
+        return jti in self.jtis
+
+
+def create_asgi_app(config_class=Config):
+    config = {
+        key: getattr(config_class, key) for key in dir(config_class) if key.isupper()
+    }
+    engine = create_async_engine(
+        async_database_uri(config["SQLALCHEMY_DATABASE_URI"]),
+        **async_engine_options(config),
+    )
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    revoked = RevokedTokens(config["JWT_REVOCATION_SYNC_INTERVAL"])
+
+    def authenticated(endpoint):
+        """Async counterpart of @jwt_required() for access tokens"""
+
+        async def wrapper(request):
+            scheme, _, token = request.headers.get("authorization", "").partition(" ")
+            if scheme != "Bearer" or not token:
+                return JSONResponse(
+                    {"msg": "Missing Authorization Header"}, status_code=401
+                )
+            try:
+                claims = jwt.decode(
+                    token,
+                    config["JWT_SECRET_KEY"],
+                    algorithms=[config.get("JWT_ALGORITHM", "HS256")],
+                )
+            except jwt.ExpiredSignatureError:
+                return JSONResponse({"msg": "Token has expired"}, status_code=401)
+            except jwt.InvalidTokenError as e:
+                return JSONResponse({"msg": str(e)}, status_code=422)
+            if claims.get("type") != "access":
+                return JSONResponse(
+                    {"msg": "Only non-refresh tokens are allowed"}, status_code=422
+                )
+            if await revoked.contains(sessionmaker, claims.get("jti")):
+                return JSONResponse({"msg": "Token has been revoked"}, status_code=401)
+            async with sessionmaker() as session:
+                return await endpoint(request, session)
+
+        return wrapper
+
+    def query_args(schema, request):
+        """Load the query string, or return the 422 flask-smorest would send"""
+        try:
+            return schema.load(request.query_params), None
+        except ValidationError as e:
+            return None, JSONResponse(
+                {
+                    "code": 422,
+                    "status": "Unprocessable Entity",
+                    "errors": {"query": e.messages},
+                },
+                status_code=422,
+            )
+
+    @authenticated
+    async def list_people(request, session):
+        args, invalid = query_args(PersonListArgsSchema(), request)
+        if invalid:
+            return invalid
+        limit = min(
+            args.get("limit") or config["PEOPLE_PAGE_SIZE"],
+            config["PEOPLE_MAX_PAGE_SIZE"],
+        )
+        query = filter_people(
+            select(Person).options(selectinload(Person.vehicles)), args
+        )
+        people = (await session.scalars(query.limit(limit + 1))).all()
+        next_after = None
+        if len(people) > limit:
+            people = people[:limit]
+            next_after = people[-1].id
+        pagination = {"limit": limit, "next_after": next_after}
+        return tagged(
+            request,
+            dump_people(people),
+            people_etag(people, sorted(args.items()), limit),
+            {"X-Pagination": json.dumps(pagination)},
+        )
+
+    @authenticated
+    async def get_person(request, session):
+        person = await session.get(
+            Person,
+            request.path_params["person_id"],
+            options=[selectinload(Person.vehicles)],
+        )
+        if person is None:
+            return error(404)
+        return tagged(request, dump_person(person), person_etag(person))
+
+    @authenticated
+    async def search_vehicles(request, session):
+        args, invalid = query_args(VehicleSearchArgsSchema(), request)
+        if invalid:
+            return invalid
+        limit = min(
+            args.get("limit") or config["VEHICLE_PAGE_SIZE"],
+            config["VEHICLE_MAX_PAGE_SIZE"],
+        )
+        query = filter_vehicles(select(Vehicle), args).limit(limit + 1)
+        vehicles = (await session.scalars(query)).all()
+        next_after = None
+        if len(vehicles) > limit:
+            vehicles = vehicles[:limit]
+            next_after = vehicles[-1].id
+        pagination = {"limit": limit, "next_after": next_after}
+        return JSONResponse(
+            dump_vehicles(vehicles), headers={"X-Pagination": json.dumps(pagination)}
+        )
+
+    @authenticated
+    async def list_vehicles(request, session):
+        person = await session.get(
+            Person,
+            request.path_params["person_id"],
+            options=[selectinload(Person.vehicles)],
+        )
+        if person is None:
+            return error(404)
+        return tagged(
+            request,
+            dump_vehicles(person.vehicles),
+            person_etag(person, "-vehicles"),
+        )
+
+    @authenticated
+    async def get_vehicle(request, session):
+        vehicle = await session.get(Vehicle, request.path_params["vehicle_id"])
+        if vehicle is None:
+            return error(404, "Vehicle not found.")
+        if vehicle.person_id != request.path_params["person_id"]:
+            return error(403, "Vehicle does not belong to person.")
+        return JSONResponse(dump_vehicle(vehicle))
+
+    @authenticated
+    async def fleet_stats(request, session):
+        rows = await session.execute(stats.counters_query())
+        return JSONResponse(stats.report(dict(rows.all())))
+
+    app = Starlette(
+        routes=[
+            Route("/api/people", list_people),
+            Route("/api/person/{person_id:int}", get_person),
+            Route("/api/vehicles", search_vehicles),
+            Route("/api/vehicles/person/{person_id:int}", list_vehicles),
+            Route("/api/vehicle/{vehicle_id:int}/person/{person_id:int}", get_vehicle),
+            Route("/api/stats", fleet_stats),
+        ],
+        on_shutdown=[engine.dispose],
+    )
+    app.state.engine = engine
+    return app
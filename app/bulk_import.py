@@ -0,0 +1,130 @@
+"""Bulk import of people with their vehicles.
+
+Rows are validated one by one with ``PersonImportSchema`` and the valid ones
+are written in chunks: one multi-row INSERT for the people, one for their
+vehicles and a single commit per chunk.
+"""
+
+import json
+from collections import Counter
+from itertools import islice
+
+from loguru import logger
+from marshmallow import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import outbox, stats
+from app.extensions import db
+from app.models import Person, Vehicle
+from app.schemas import PersonImportSchema
+
+
+def iter_ndjson(stream):
+    """Yield one decoded row per non-blank line, None for undecodable lines"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _error(index, errors):
+    return {"row": index, "status": "error", "errors": errors}
+
+
+def _insert_chunk(valid):
+    """Insert the validated rows of a chunk, returning the new person ids"""
+    person_ids = db.session.scalars(
+        insert(Person).returning(Person.id, sort_by_parameter_order=True),
+        [
+            {
+                "name": data["name"],
+                "sale_oportunity": data["sale_oportunity"],
+                "vehicle_count": len(data["vehicles"]),
+            }
+            for _, data in valid
+        ],
+    ).all()
+    vehicles = [
+        {
+            "name": vehicle["name"],
+            "color": vehicle["color"],
+            "model": vehicle["model"],
+            "person_id": person_id,
+        }
+        for person_id, (_, data) in zip(person_ids, valid)
+        for vehicle in data["vehicles"]
+    ]
+    vehicle_ids = []
+    if vehicles:
+        vehicle_ids = db.session.scalars(
+            insert(Vehicle).returning(Vehicle.id, sort_by_parameter_order=True),
+            vehicles,
+        ).all()
+    for person_id, (_, data) in zip(person_ids, valid):
+        outbox.record(
+            "person.created",
+            {
+                "id": person_id,
+                "name": data["name"],
+                "sale_oportunity": data["sale_oportunity"],
+            },
+        )
+    for vehicle_id, vehicle in zip(vehicle_ids, vehicles):
+        outbox.record("vehicle.added", {"id": vehicle_id, **vehicle})
+    deltas = Counter()
+    for _, data in valid:
+        deltas.update(
+            stats.person_deltas(len(data["vehicles"]), data["sale_oportunity"])
+        )
+    deltas.update(
+        stats.vehicles_key(vehicle["color"], vehicle["model"]) for vehicle in vehicles
+    )
+    stats.record(deltas)
+    db.session.commit()
+    return person_ids
+
+
+def import_people(rows, chunk_size):
+    """Import an iterable of person rows and return a per-row report"""
+    schema = PersonImportSchema()
+    report = {"created": 0, "failed": 0, "results": []}
+    rows = enumerate(rows)
+
+    while chunk := list(islice(rows, chunk_size)):
+        results, valid = [], []
+        for index, row in chunk:
+            if not isinstance(row, dict):
+                results.append(_error(index, {"_schema": ["Invalid row."]}))
+                continue
+            try:
+                valid.append((index, schema.load(row)))
+            except ValidationError as e:
+                results.append(_error(index, e.normalized_messages()))
+
+        if valid:
+            try:
+                person_ids = _insert_chunk(valid)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.warning(f"Error importing people: {e}")
+                results.extend(
+                    _error(index, {"_schema": ["Error adding person."]})
+                    for index, _ in valid
+                )
+            else:
+                results.extend(
+                    {"row": index, "status": "created", "id": person_id}
+                    for (index, _), person_id in zip(valid, person_ids)
+                )
+
+        results.sort(key=lambda result: result["row"])
+        report["results"].extend(results)
+
+    report["created"] = sum(r["status"] == "created" for r in report["results"])
+    report["failed"] = len(report["results"]) - report["created"]
+    return report
@@ -0,0 +1,307 @@
+"""Read-through cache for serialized person and vehicle responses.
+
+Entries are keyed under ``person:<id>:`` and stored in that person's group,
+so everything derived from a person (its detail, its vehicle list and each of
+its vehicles) is dropped together.
+Writes are picked up from the SQLAlchemy session: ORM changes are collected
+in ``after_flush``, bulk statements report the person they touched through
+:func:`invalidate_person`, and the keys are only evicted once the transaction
+commits.
+
+Eviction only reaches the process that committed. A process-local backend
+behind several worker processes (``WEB_WORKERS``) therefore keeps the
+person's version in each entry and checks it against ``persons.version``
+(bumped by every write to the person or its vehicles) before serving it:
+one primary-key lookup instead of loading and serializing the rows.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.etags import is_not_modified, not_modified
+from app.metrics import timed
+
+PENDING_KEY = "cache_invalidate_persons"
+
+
+def person_group(person_id):
+    return f"person:{person_id}"
+
+
+def person_key(person_id, suffix="detail"):
+    return f"{person_group(person_id)}:{suffix}"
+
+
+class InProcessBackend:
+    """Thread-safe LRU dictionary whose entries expire after a TTL"""
+
+    shared = False
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, group=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_group(self, group):
+        # Group members are keyed under the group, ``<group>:...``
+        prefix = f"{group}:"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ExternalBackend:
+    """Backend on a shared store client with the redis-py API.
+
+    Nothing scans the keyspace. The keys of a group are kept in a set
+    (``<namespace>group:<group>``), so invalidating a person reads and deletes
+    only that person's entries. Every entry's expiry is also kept in a sorted
+    set (``<namespace>expiries``), so the size is one ZCARD once the expired
+    ones are trimmed. Eviction is otherwise left to the store (e.g. an LRU
+    ``maxmemory-policy``); entries it evicts are counted until they expire.
+    """
+
+    shared = True
+
+    def __init__(self, client, namespace="car-management:cache:"):
+        self.client = client
+        self.namespace = namespace
+        self.expiries = f"{namespace}expiries"
+
+    def _group_key(self, group):
+        return f"{self.namespace}group:{group}"
+
+    def get(self, key):
+        return self.client.get(self.namespace + key)
+
+    def set(self, key, value, ttl, group=None):
+        now = time.time()
+        with self.client.pipeline() as pipe:
+            pipe.set(self.namespace + key, value, ex=ttl)
+            pipe.zadd(self.expiries, {key: now + ttl})
+            pipe.zremrangebyscore(self.expiries, "-inf", now)
+            if group is not None:
+                # The set outlives every entry it lists
+                pipe.sadd(self._group_key(group), key)
+                pipe.expire(self._group_key(group), ttl)
+            pipe.execute()
+
+    def delete_group(self, group):
+        keys = [key.decode() for key in self.client.smembers(self._group_key(group))]
+        if not keys:
+            return
+        # Removing only the keys read keeps those added meanwhile in the set
+        with self.client.pipeline() as pipe:
+            pipe.delete(*[self.namespace + key for key in keys])
+            pipe.srem(self._group_key(group), *keys)
+            pipe.zrem(self.expiries, *keys)
+            pipe.execute()
+
+    def __len__(self):
+        with self.client.pipeline() as pipe:
+            pipe.zremrangebyscore(self.expiries, "-inf", time.time())
+            pipe.zcard(self.expiries)
+            return pipe.execute()[-1]
+
+
+class NullBackend:
+    shared = True
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl, group=None):
+        pass
+
+    def delete_group(self, group):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class _CacheState:
+    def __init__(self, backend, ttl, processes=1):
+        self.backend = backend
+        self.ttl = ttl
+        self.processes = processes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @property
+    def check_versions(self):
+        return self.processes > 1 and not self.backend.shared
+
+
+def _make_backend(config):
+    name = config["CACHE_BACKEND"]
+    if name == "memory":
+        return InProcessBackend(config["CACHE_MAX_ENTRIES"])
+    if name == "redis":
+        import redis
+
+        return ExternalBackend(redis.Redis.from_url(config["CACHE_REDIS_URL"]))
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND {name!r}")
+
+
+class ResponseCache:
+    def init_app(self, app, backend=None):
+        app.extensions["cache"] = _CacheState(
+            backend or _make_backend(app.config),
+            app.config["CACHE_TTL"],
+            app.config["WEB_WORKERS"],
+        )
+        if not event.contains(Session, "after_flush", _collect_flushed_persons):
+            event.listen(Session, "after_flush", _collect_flushed_persons)
+            event.listen(Session, "after_commit", _evict_committed_persons)
+            event.listen(Session, "after_rollback", _discard_pending_persons)
+
+    @property
+    def state(self):
+        return current_app.extensions["cache"]
+
+    @property
+    def backend(self):
+        return self.state.backend
+
+    @backend.setter
+    def backend(self, backend):
+        self.state.backend = backend
+
+    def get(self, key):
+        value = self.state.backend.get(key)
+        self._count(value is not None)
+        return value
+
+    def _count(self, hit):
+        state = self.state
+        with state.lock:
+            if hit:
+                state.hits += 1
+            else:
+                state.misses += 1
+
+    def set(self, key, value, group=None):
+        self.state.backend.set(key, value, self.state.ttl, group)
+
+    def invalidate_persons(self, person_ids):
+        for person_id in person_ids:
+            self.state.backend.delete_group(person_group(person_id))
+
+    def stats(self):
+        state = self.state
+        return {"hits": state.hits, "misses": state.misses, "size": len(state.backend)}
+
+    def json_response(self, key, load, dump, etag=None, person_id=None):
+        """Serve the JSON body stored under key, building it on a miss
+
+        ``load`` fetches the object (it may abort, in which case nothing is
+        cached) and ``dump`` turns it into serializable data. When ``etag`` is
+        given the tag is stored next to the body, sent as a weak ETag and a
+        matching If-None-Match is answered with 304 without dumping.
+        ``person_id`` is the person the entry derives from: the entry joins
+        the person's group, and the person's version is checked when other
+        processes may have changed it.
+        """
+        from app.serializers import json_body
+
+        version = b""
+        if person_id is not None and self.state.check_versions:
+            # Read before loading, so a concurrent write can only make the
+            # stored version older than the data, never newer
+            version = _person_version(person_id)
+        entry = self.state.backend.get(key)
+        if entry is not None:
+            stored, tag, body = entry.split(b"\n", 2)
+            if stored != version:
+                entry = None
+        self._count(entry is not None)
+        if entry is not None:
+            tag = tag.decode() or None
+        else:
+            obj = load()
+            tag = etag(obj) if etag else None
+            if tag and is_not_modified(tag):
+                return not_modified(tag)
+            with timed("serialization"):
+                body = json_body(dump(obj))
+            self.set(
+                key,
+                version + b"\n" + (tag or "").encode() + b"\n" + body,
+                None if person_id is None else person_group(person_id),
+            )
+
+        if tag and is_not_modified(tag):
+            return not_modified(tag)
+        response = Response(body, mimetype="application/json")
+        if tag:
+            response.set_etag(tag, weak=True)
+        return response
+
+
+def _person_version(person_id):
+    from app.extensions import db
+    from app.models import Person
+
+    version = db.session.scalar(db.select(Person.version).where(Person.id == person_id))
+    return b"" if version is None else str(version).encode()
+
+
+def invalidate_person(session, person_id):
+    """Evict the cached responses of a person once the session commits"""
+    session.info.setdefault(PENDING_KEY, set()).add(person_id)
+
+
+def _collect_flushed_persons(session, flush_context):
+    from app.models import Person, Vehicle
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Person):
+            invalidate_person(session, obj.id)
+        elif isinstance(obj, Vehicle):
+            history = inspect(obj).attrs.person_id.history
+            for person_id in (*history.sum(), obj.person_id):
+                if person_id is not None:
+                    invalidate_person(session, person_id)
+
+
+def _evict_committed_persons(session):
+    person_ids = session.info.pop(PENDING_KEY, None)
+    if person_ids and has_app_context() and "cache" in current_app.extensions:
+        from app.extensions import cache
+
+        cache.invalidate_persons(person_ids)
+
+
+def _discard_pending_persons(session):
+    session.info.pop(PENDING_KEY, None)
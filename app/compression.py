@@ -0,0 +1,107 @@
+"""Negotiated compression of JSON responses.
+
+Responses of at least ``COMPRESSION_MIN_SIZE`` bytes are compressed with the
+first encoding of ``COMPRESSION_ENCODINGS`` that the client accepts (brotli
+and zstd need the ``brotli`` and ``zstandard`` packages and are skipped
+without them). Streamed responses are left alone.
+
+Encoded bodies are kept in an in-process LRU keyed by the response ETag, so a
+repeat request for unchanged data reuses them: :func:`cached_body` lets a view
+skip serialization and the ``after_request`` hook skips compression. This
+relies on the ETag contract that one tag always names one representation,
+which is what already lets clients revalidate with If-None-Match.
+"""
+
+import gzip
+
+from flask import current_app, request
+from loguru import logger
+
+from app.caching import InProcessBackend
+
+COMPRESSIBLE_MIMETYPES = {"application/json"}
+
+
+def _brotli(level):
+    import brotli
+
+    return lambda body: brotli.compress(body, quality=level)
+
+
+def _zstd(level):
+    import zstandard
+
+    # A ZstdCompressor must not be shared between threads
+    return lambda body: zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def _gzip(level):
+    return lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+
+
+ENCODERS = {"gzip": _gzip, "br": _brotli, "zstd": _zstd}
+
+
+class _CompressionState:
+    def __init__(self, config):
+        self.min_size = config["COMPRESSION_MIN_SIZE"]
+        self.ttl = config["CACHE_TTL"]
+        self.bodies = InProcessBackend(config["COMPRESSION_CACHE_ENTRIES"])
+        self.encoders = {}
+        for name in config["COMPRESSION_ENCODINGS"]:
+            try:
+                self.encoders[name] = ENCODERS[name](
+                    config["COMPRESSION_LEVELS"].get(name)
+                )
+            except ImportError as e:
+                logger.warning(f"{name} compression disabled: {e}")
+        self.encodings = list(self.encoders)
+
+
+class Compressor:
+    def init_app(self, app):
+        app.extensions["compression"] = _CompressionState(app.config)
+        app.after_request(self.compress_response)
+
+    @property
+    def state(self):
+        return current_app.extensions["compression"]
+
+    def cached_body(self, tag, build):
+        """The identity body stored for tag, calling build() on a miss"""
+        state = self.state
+        body = state.bodies.get(f"{tag}:identity")
+        if body is None:
+            body = build()
+            state.bodies.set(f"{tag}:identity", body, state.ttl)
+        return body
+
+    def compress_response(self, response):
+        state = self.state
+        if (
+            not state.encodings
+            or response.status_code != 200
+            or response.is_streamed
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.content_length is None
+            or response.content_length < state.min_size
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(state.encodings)
+        if encoding is None:
+            return response
+
+        tag, _ = response.get_etag()
+        key = f"{tag}:{encoding}"
+        body = state.bodies.get(key) if tag else None
+        if body is None:
+            body = state.encoders[encoding](response.get_data())
+            if tag:
+                state.bodies.set(key, body, state.ttl)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,39 @@
+"""Weak ETags for person resources.
+
+Tags are derived from ``Person.version``, which every write to a person or to
+one of its vehicles bumps, so they are computed without serializing the body.
+"""
+
+import hashlib
+
+from flask import Response, request
+from flask_smorest import abort
+
+
+def person_etag(person, suffix=""):
+    return f"person-{person.id}-v{person.version}{suffix}"
+
+
+def people_etag(people, *parts):
+    """Tag a page of people from their ids and versions plus the query parts"""
+    digest = hashlib.sha1(repr(parts).encode())
+    for person in people:
+        digest.update(f"{person.id}:{person.version};".encode())
+    return f"people-{digest.hexdigest()[:20]}"
+
+
+def is_not_modified(tag):
+    return request.if_none_match.contains_weak(tag)
+
+
+def not_modified(tag):
+    response = Response(status=304)
+    response.set_etag(tag, weak=True)
+    return response
+
+
+def check_if_match(tag):
+    """Abort with 412 unless If-Match is absent or matches the current tag"""
+    if_match = request.if_match
+    if if_match and not if_match.star_tag and not if_match.contains_weak(tag):
+        abort(412, message="Person was modified by another request.")
@@ -1,11 +1,25 @@
-from flask_jwt_extended import JWTManager
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 from flask_smorest import Api
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
-jwt = JWTManager()
+from app.caching import ResponseCache
+from app.compression import Compressor
+from app.hashing import PasswordHasher
+from app.metrics import Metrics
+from app.ratelimit import RateLimiter
+from app.replicas import ReplicaRouter, RoutingSession
+from app.tokens import CachingJWTManager, RevocationList
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+jwt = CachingJWTManager()
 migrate = Migrate()
 ma = Marshmallow()
 api = Api()
+cache = ResponseCache()
+compressor = Compressor()
+metrics = Metrics()
+password_hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+replicas = ReplicaRouter()
+revoked_tokens = RevocationList()
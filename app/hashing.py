@@ -0,0 +1,92 @@
+"""Password hashing off the request thread.
+
+Hashes are computed with werkzeug using ``PASSWORD_HASH_METHOD`` on a bounded
+process pool. At most ``PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE`` jobs
+are in flight; past that requests get a 503 with Retry-After instead of
+queueing, so a burst of logins cannot hold every API worker.
+``PASSWORD_HASH_WORKERS = 0`` hashes inline in the request thread.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from flask_smorest import abort
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+@lru_cache
+def hash_prefix(method, salt_length):
+    """The ``method`` part werkzeug writes for the configured parameters"""
+    return generate_password_hash("", method, salt_length).split("$", 1)[0]
+
+
+class _HasherState:
+    def __init__(self, config):
+        self.method = config["PASSWORD_HASH_METHOD"]
+        self.salt_length = config["PASSWORD_SALT_LENGTH"]
+        self.workers = config["PASSWORD_HASH_WORKERS"]
+        self.retry_after = config["PASSWORD_HASH_RETRY_AFTER"]
+        self.slots = threading.BoundedSemaphore(
+            max(self.workers + config["PASSWORD_HASH_MAX_QUEUE"], 1)
+        )
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def get_executor(self):
+        # Pools do not survive a fork, so each server process starts its own
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                self.executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self.pid = os.getpid()
+            return self.executor
+
+
+class PasswordHasher:
+    def init_app(self, app):
+        app.extensions["password_hasher"] = _HasherState(app.config)
+
+    @property
+    def state(self):
+        return current_app.extensions["password_hasher"]
+
+    def _run(self, fn, *args):
+        state = self.state
+        if not state.workers:
+            return fn(*args)
+        if not state.slots.acquire(blocking=False):
+            abort(
+                503,
+                message="Too many password checks in progress, retry later.",
+                headers={"Retry-After": str(state.retry_after)},
+            )
+        try:
+            return state.get_executor().submit(fn, *args).result()
+        finally:
+            state.slots.release()
+
+    def hash(self, password):
+        state = self.state
+        return self._run(
+            generate_password_hash, password, state.method, state.salt_length
+        )
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        state = self.state
+        return pwhash.split("$", 1)[0] != hash_prefix(state.method, state.salt_length)
+
+    def shutdown(self):
+        state = self.state
+        with state.lock:
+            if state.executor is not None:
+                state.executor.shutdown()
+                state.executor = None
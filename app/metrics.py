@@ -0,0 +1,261 @@
+"""Per-request performance metrics in the Prometheus text format.
+
+Every request is measured from ``before_request`` to the last
+``after_request`` hook and recorded by method and URL rule. The recorded
+values are latency, response size, SQL statement count and time (through
+SQLAlchemy cursor events), serialization time (:func:`timed` around schema
+dumps and JSON encoding) and pool checkout time. For streamed
+responses, latency covers the time to the headers only. The histograms are
+served on ``/metrics``. With ``METRICS_SLOW_REQUEST_MS`` set, slower requests
+are logged with the SQL they ran.
+
+Values live in the serving process, so with several gunicorn workers each
+scrape sees the worker that answered it (the ``pid`` label tells them
+apart).
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4"
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the text format"""
+
+    def __init__(self, name, description, buckets, labelnames):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self, extra_labels):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = [
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            ]
+        for labels, counts, total in sorted(series):
+            names = (*self.labelnames, *extra_labels)
+            values = (*labels, *extra_labels.values())
+            label_text = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+            )
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{label_text}}} {total!r}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _request_metrics():
+    if has_request_context():
+        return g.get("request_metrics")
+    return None
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to the current request's ``phase``
+
+    Nested blocks for the same phase are only counted once.
+    """
+    metrics = _request_metrics()
+    if metrics is None or metrics["nesting"].get(phase):
+        yield
+        return
+    metrics["nesting"][phase] = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics[phase] = metrics.get(phase, 0.0) + time.perf_counter() - start
+        metrics["nesting"][phase] = False
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, counting encoding as serialization time"""
+
+    def dumps(self, obj, **kwargs):
+        with timed("serialization"):
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        with timed("serialization"):
+            return super().response(*args, **kwargs)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited for a connection"""
+
+    def connect(self):
+        with timed("pool_wait"):
+            return super().connect()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _request_metrics()
+    if metrics is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _request_metrics()
+    starts = conn.info.get("query_start")
+    if metrics is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    metrics["sql_count"] += 1
+    metrics["sql_time"] += elapsed
+    if metrics["statements"] is not None:
+        metrics["statements"].append((elapsed, statement))
+
+
+class _MetricsState:
+    def __init__(self, config):
+        self.slow_request_ms = config["METRICS_SLOW_REQUEST_MS"]
+        self.max_statements = config["METRICS_SLOW_REQUEST_MAX_STATEMENTS"]
+        labels = ("method", "endpoint")
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Time to build the response.",
+            LATENCY_BUCKETS,
+            (*labels, "status"),
+        )
+        self.size = Histogram(
+            "http_response_size_bytes",
+            "Response body size, after compression.",
+            SIZE_BUCKETS,
+            labels,
+        )
+        self.sql_count = Histogram(
+            "db_statements_per_request",
+            "SQL statements executed per request.",
+            COUNT_BUCKETS,
+            labels,
+        )
+        self.sql_time = Histogram(
+            "db_statement_duration_seconds",
+            "Time spent executing SQL per request.",
+            LATENCY_BUCKETS,
+            labels,
+        )
+        self.serialization = Histogram(
+            "serialization_duration_seconds",
+            "Time spent dumping and encoding response bodies per request.",
+            LATENCY_BUCKETS,
+            labels,
+        )
+        self.pool_wait = Histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent checking out pooled connections per request.",
+            LATENCY_BUCKETS,
+            labels,
+        )
+        self.histograms = (
+            self.latency,
+            self.size,
+            self.sql_count,
+            self.sql_time,
+            self.serialization,
+            self.pool_wait,
+        )
+
+
+class Metrics:
+    def init_app(self, app):
+        if not app.config["METRICS_ENABLED"]:
+            return
+        app.extensions["metrics"] = _MetricsState(app.config)
+        app.json = TimedJSONProvider(app)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.add_url_rule("/metrics", "metrics", self.render)
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @property
+    def state(self):
+        return current_app.extensions["metrics"]
+
+    def start_request(self):
+        g.request_metrics = {
+            "start": time.perf_counter(),
+            "nesting": {},
+            "sql_count": 0,
+            "sql_time": 0.0,
+            "statements": [] if self.state.slow_request_ms else None,
+        }
+
+    def finish_request(self, response):
+        metrics = g.pop("request_metrics", None)
+        if metrics is None:
+            return response
+        elapsed = time.perf_counter() - metrics["start"]
+        state = self.state
+        labels = (request.method, request.url_rule.rule if request.url_rule else "")
+        state.latency.observe(elapsed, *labels, str(response.status_code))
+        if response.content_length is not None:
+            state.size.observe(response.content_length, *labels)
+        state.sql_count.observe(metrics["sql_count"], *labels)
+        state.sql_time.observe(metrics["sql_time"], *labels)
+        state.serialization.observe(metrics.get("serialization", 0.0), *labels)
+        state.pool_wait.observe(metrics.get("pool_wait", 0.0), *labels)
+
+        if state.slow_request_ms and elapsed * 1000 >= state.slow_request_ms:
+            statements = sorted(metrics["statements"], reverse=True)
+            queries = "".join(
+                f"\n  {seconds * 1000:.1f} ms: {statement}"
+                for seconds, statement in statements[: state.max_statements]
+            )
+            logger.warning(
+                f"Slow request {request.method} {request.full_path} "
+                f"{response.status_code} {elapsed * 1000:.1f} ms, "
+                f"{metrics['sql_count']} statements in "
+                f"{metrics['sql_time'] * 1000:.1f} ms{queries}"
+            )
+        return response
+
+    def render(self):
+        extra_labels = {"pid": os.getpid()}
+        lines = []
+        for histogram in self.state.histograms:
+            lines.extend(histogram.render(extra_labels))
+        return Response("\n".join(lines) + "\n", mimetype=PROMETHEUS_MIMETYPE)
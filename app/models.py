@@ -1,9 +1,34 @@
 import enum
+import sqlite3
 
+from sqlalchemy import DDL, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import validates
-from werkzeug.security import check_password_hash, generate_password_hash
 
-from app.extensions import db
+from app.extensions import db, password_hasher
+
+MAX_VEHICLES_PER_PERSON = 3
+
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+def include_object_for(dialect):
+    """Alembic ``include_object`` hook leaving out what only other dialects create
+
+    Autogenerate ignores ``ddl_if``, so without it a PostgreSQL-only index
+    would be reported missing on SQLite.
+    """
+
+    def include_object(object, name, type_, reflected, compare_to):
+        ddl_if = getattr(object, "_ddl_if", None)
+        return ddl_if is None or ddl_if.dialect in (None, dialect.name)
+
+    return include_object
 
 
 class User(db.Model):
@@ -11,11 +36,51 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
 
+    # Usernames are matched case-insensitively, see find_by_username
+    __table_args__ = (
+        db.Index("ix_user_username_lower", db.func.lower(username), unique=True),
+    )
+
+    @classmethod
+    def find_by_username(cls, username):
+        if not username:
+            return None
+        return cls.query.filter(db.func.lower(cls.username) == username.lower()).first()
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class FleetStat(db.Model):
+    """One shard of a fleet statistics counter, see app.stats"""
+
+    __tablename__ = "fleet_stats"
+    key = db.Column(db.String(64), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class OutboxEvent(db.Model):
+    """A committed person or vehicle change, see app.outbox"""
+
+    __tablename__ = "outbox_events"
+    id = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    type = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # Naive UTC, like RevokedToken.expires_at
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
 
 
 class VehicleColorEnum(enum.Enum):
@@ -43,13 +108,40 @@ class Person(db.Model):
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     sale_oportunity = db.Column(db.Boolean, default=False)
+    # Kept in step with the vehicles rows by the write paths so the vehicle
+    # limit can be checked and reserved with a single conditional UPDATE
+    vehicle_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Bumped on every change to the person or its vehicles; drives the ETags
+    # and makes ORM updates and deletes fail on a concurrent modification
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     vehicles = db.relationship(
         "Vehicle",
         backref="person",
-        lazy="dynamic",
+        lazy="select",
+        # The database removes the vehicles of a deleted person (ON DELETE
+        # CASCADE), so the ORM does not load them just to delete them
+        cascade="all, delete",
+        passive_deletes=True,
         primaryjoin="Person.id==Vehicle.person_id",
     )
 
+    __table_args__ = (
+        # Listing people with a sale oportunity walks this in id order
+        db.Index(
+            "ix_persons_sale_oportunity",
+            "id",
+            postgresql_where=sale_oportunity.is_(True),
+            sqlite_where=sale_oportunity.is_(True),
+        ),
+        # Serves the prefix match of the name filter (LIKE 'prefix%')
+        db.Index(
+            "ix_persons_name_prefix",
+            "name",
+            postgresql_ops={"name": "varchar_pattern_ops"},
+        ),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<Person '{self.id}'>"
 
@@ -60,7 +152,23 @@ class Vehicle(db.Model):
     name = db.Column(db.String(100), nullable=False)
     color = db.Column(db.Enum(VehicleColorEnum))
     model = db.Column(db.Enum(VehicleModelEnum))
-    person_id = db.Column(db.Integer, db.ForeignKey("persons.id"))
+    person_id = db.Column(db.Integer, db.ForeignKey("persons.id", ondelete="CASCADE"))
+
+    __table_args__ = (
+        # Covers the foreign key lookups and returns a person's vehicles in id order
+        db.Index("ix_vehicles_person_id_id", "person_id", "id"),
+        # Vehicle search by color and model, or by color alone, walked in id
+        # order for keyset pages
+        db.Index("ix_vehicles_color_model_id", "color", "model", "id"),
+        db.Index("ix_vehicles_color_id", "color", "id"),
+        # Name substring search (ILIKE '%text%') through pg_trgm trigrams
+        db.Index(
+            "ix_vehicles_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     @validates("color")
     def validate_color(self, key, color):
@@ -84,3 +192,11 @@ class Vehicle(db.Model):
 
     def __repr__(self):
         return f"<Vehicle '{self.id}'>"
+
+
+# gin_trgm_ops comes with the pg_trgm extension
+event.listen(
+    Vehicle.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,162 @@
+"""Transactional outbox of person and vehicle changes, served as a feed.
+
+Every write path passes its events to :func:`record` inside its own
+transaction. They are inserted into ``outbox_events`` just before the
+transaction commits, so an event exists exactly when its change does. On
+PostgreSQL the insert first takes a transaction-level advisory lock, which
+hands out event ids in commit order: a consumer resuming after the last id
+it saw can never miss an event committed later under a smaller id (SQLite
+serializes writers anyway).
+
+The events are:
+
+- ``person.created`` and ``person.updated``, with the person's fields;
+- ``person.deleted``, which also stands for the deletion of their vehicles;
+- ``vehicle.added``, with the vehicle's fields, and ``vehicle.deleted``.
+
+``GET /api/events`` returns the events after a cursor, waiting up to
+``wait`` seconds for one to arrive (long poll), or streams them as
+server-sent events. ``flask outbox prune`` deletes events older than
+``OUTBOX_RETENTION_DAYS``.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import OutboxEvent
+
+PENDING_KEY = "outbox_events"
+# pg_advisory_xact_lock key serializing the outbox inserts
+LOCK_KEY = 0x0B0C5
+
+outbox_cli = AppGroup("outbox", help="Change feed outbox.")
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _value(member):
+    return getattr(member, "value", member)
+
+
+def person_payload(person):
+    return {
+        "id": person.id,
+        "name": person.name,
+        "sale_oportunity": person.sale_oportunity,
+    }
+
+
+def vehicle_payload(vehicle):
+    return {
+        "id": vehicle.id,
+        "name": vehicle.name,
+        "color": _value(vehicle.color),
+        "model": _value(vehicle.model),
+        "person_id": vehicle.person_id,
+    }
+
+
+def record(event_type, payload, session=None):
+    """Add an event to the outbox when the current transaction commits"""
+    session = session or db.session
+    session.info.setdefault(PENDING_KEY, []).append(
+        {"type": event_type, "payload": payload, "created_at": _utcnow()}
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _insert_pending_events(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if not events:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    session.execute(insert(OutboxEvent), events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def read_events(after, limit):
+    """Up to limit events with an id above after, oldest first"""
+    return db.session.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.id > after)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+    ).all()
+
+
+def wait_for_events(after, limit, wait):
+    """read_events(), polling for up to wait seconds while there are none"""
+    deadline = time.monotonic() + wait
+    interval = current_app.config["EVENTS_POLL_INTERVAL"]
+    while True:
+        events = read_events(after, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        # Hand the connection back to the pool while waiting
+        db.session.rollback()
+        time.sleep(min(interval, remaining))
+
+
+def dump_event(outbox_event):
+    return {
+        "id": outbox_event.id,
+        "type": outbox_event.type,
+        "payload": outbox_event.payload,
+        "created_at": outbox_event.created_at.isoformat(),
+    }
+
+
+def stream_events(after, limit, seconds):
+    """Yield events as server-sent events for about seconds, then stop
+
+    A comment line is sent whenever the outbox had nothing new, so proxies
+    keep the connection open; clients reconnect with ``Last-Event-ID``.
+    """
+    interval = current_app.config["EVENTS_POLL_INTERVAL"]
+    deadline = time.monotonic() + seconds
+    yield f"retry: {int(interval * 1000)}\n\n"
+    while time.monotonic() < deadline:
+        events = read_events(after, limit)
+        db.session.rollback()
+        for outbox_event in events:
+            data = current_app.json.dumps(dump_event(outbox_event))
+            yield f"id: {outbox_event.id}\nevent: {outbox_event.type}\ndata: {data}\n\n"
+            after = outbox_event.id
+        if len(events) < limit:
+            if not events:
+                yield ": idle\n\n"
+            time.sleep(max(min(interval, deadline - time.monotonic()), 0))
+
+
+def prune(older_than):
+    """Delete the events created before older_than, returning how many"""
+    deleted = db.session.execute(
+        db.delete(OutboxEvent).where(OutboxEvent.created_at < older_than)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+@outbox_cli.command("prune")
+@click.option("--days", type=float, help="Defaults to OUTBOX_RETENTION_DAYS.")
+def prune_command(days):
+    """Delete old outbox events"""
+    if days is None:
+        days = current_app.config["OUTBOX_RETENTION_DAYS"]
+    deleted = prune(_utcnow() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} events.")
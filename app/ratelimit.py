@@ -0,0 +1,284 @@
+"""Per-client rate limiting and load shedding for the API blueprint.
+
+Every endpoint gets a token bucket per client: the bucket holds up to
+``burst`` requests and refills at ``rate`` per second, both taken from
+``RATE_LIMITS`` for the endpoint (``"default"`` for the others). Protected
+endpoints take from the bucket of the token's identity once the token is
+verified (a JWT token verification callback, so the token is only decoded
+once); the login and register endpoints take from the bucket of the IP
+address before anything else runs. An empty bucket answers 429 with
+Retry-After.
+
+With ``RATE_LIMIT_BACKEND = "memory"`` buckets live in the process or,
+when several ``WEB_WORKERS`` serve the app, in a table of shared memory
+that gunicorn's workers inherit from the master, which preloads the app. A
+client is therefore limited once per host, not once per worker. Redis
+(``"redis"``) shares them between hosts too. Any object with the ``take``
+method of :class:`InProcessBuckets` can be passed to ``init_app`` instead.
+
+Load shedding answers 503 with Retry-After when the worker already holds
+more than ``LOAD_SHED_MAX_IN_FLIGHT`` requests. Requests are counted from
+``before_request`` to ``teardown_request``. A gunicorn gthread worker queues
+accepted requests until one of its threads is free, which the app never
+sees, so ``gunicorn.conf.py`` sets ``queue_depth`` to the worker's count of
+running and queued requests instead. A request that waited in that queue
+then finds it still long and is answered at once, which drains the queue.
+
+The change feed holds its request for the length of a long poll or an event
+stream. Feed requests are left out of that count and capped on their own at
+``LOAD_SHED_MAX_LONG_LIVED`` per worker, so feed consumers cannot take every
+thread of a worker and get ordinary requests shed.
+"""
+
+import ctypes
+import hashlib
+import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask_smorest import abort
+from loguru import logger
+
+# Endpoints limited by IP address, before the view runs
+IP_ENDPOINTS = frozenset({"api.Login", "api.Register"})
+# Endpoints holding their request for long (long polls, event streams)
+LONG_LIVED_ENDPOINTS = frozenset({"api.EventFeedResource"})
+IN_FLIGHT_KEY = "car_management.in_flight"
+
+
+class InProcessBuckets:
+    """Token buckets of this process, least recently used dropped first"""
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Take a token from the bucket; return 0, or seconds until one is free"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SharedBuckets:
+    """Token buckets in shared memory, for the workers forked from one process
+
+    The buckets are a fixed table of slots (key hash, tokens, last update)
+    probed linearly from the key's hash. When the probed slots are all taken,
+    the least recently used one is replaced. time.monotonic() is the system
+    clock, the same in every process.
+    """
+
+    PROBES = 8
+
+    def __init__(self, slots=10_000):
+        context = multiprocessing.get_context("fork")
+        self.slots = slots
+        self._hashes = context.RawArray(ctypes.c_uint64, slots)
+        self._tokens = context.RawArray(ctypes.c_double, slots)
+        self._updated = context.RawArray(ctypes.c_double, slots)
+        self._lock = context.Lock()
+
+    def take(self, key, rate, burst):
+        """Take a token from the bucket; return 0, or seconds until one is free"""
+        # Stable across processes, unlike hash(); 0 marks an empty slot
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, "little") | 1
+        start = key_hash % self.slots
+        hashes, tokens, updated = self._hashes, self._tokens, self._updated
+        now = time.monotonic()
+        # A worker killed inside the lock must not stall the others for good:
+        # after a second, let the request through
+        if not self._lock.acquire(timeout=1):
+            return 0.0
+        try:
+            oldest = None
+            for probe in range(self.PROBES):
+                slot = (start + probe) % self.slots
+                if hashes[slot] == key_hash:
+                    break
+                if hashes[slot] == 0:
+                    hashes[slot], tokens[slot], updated[slot] = key_hash, burst, now
+                    break
+                if oldest is None or updated[slot] < updated[oldest]:
+                    oldest = slot
+            else:
+                slot = oldest
+                hashes[slot], tokens[slot], updated[slot] = key_hash, burst, now
+            elapsed = max(now - updated[slot], 0)
+            available = min(burst, tokens[slot] + elapsed * rate)
+            wait = 0.0
+            if available >= 1:
+                available -= 1
+            else:
+                wait = (1 - available) / rate
+            tokens[slot], updated[slot] = available, now
+        finally:
+            self._lock.release()
+        return wait
+
+
+# Same algorithm as InProcessBuckets.take, atomic in Redis and on its clock
+TAKE_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class ExternalBuckets:
+    """Token buckets in a store with the redis-py ``register_script`` API"""
+
+    def __init__(self, client, namespace="car-management:ratelimit:"):
+        self.script = client.register_script(TAKE_SCRIPT)
+        self.namespace = namespace
+
+    def take(self, key, rate, burst):
+        return float(self.script(keys=[self.namespace + key], args=[rate, burst]))
+
+
+class _RateLimitState:
+    def __init__(self, config, buckets):
+        self.enabled = config["RATE_LIMIT_ENABLED"]
+        self.limits = config["RATE_LIMITS"]
+        self.buckets = buckets
+        self.shed = config["LOAD_SHED_ENABLED"]
+        self.shed_retry_after = config["LOAD_SHED_RETRY_AFTER"]
+        self.max_in_flight = config["LOAD_SHED_MAX_IN_FLIGHT"]
+        self.max_long_lived = config["LOAD_SHED_MAX_LONG_LIVED"]
+        self.in_flight = 0
+        self.long_lived = 0
+        self.lock = threading.Lock()
+        # Requests running or queued in the serving worker, if it can tell
+        self.queue_depth = None
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            return self.in_flight
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def enter_long_lived(self):
+        """Count a long-lived request, unless the worker already holds enough"""
+        with self.lock:
+            if self.long_lived >= self.max_long_lived:
+                return False
+            self.long_lived += 1
+            return True
+
+    def leave_long_lived(self):
+        with self.lock:
+            self.long_lived -= 1
+
+
+def _make_buckets(config):
+    name = config["RATE_LIMIT_BACKEND"]
+    if name == "memory":
+        if config["WEB_WORKERS"] > 1:
+            return SharedBuckets(config["RATE_LIMIT_MAX_CLIENTS"])
+        return InProcessBuckets(config["RATE_LIMIT_MAX_CLIENTS"])
+    if name == "redis":
+        import redis
+
+        return ExternalBuckets(redis.Redis.from_url(config["CACHE_REDIS_URL"]))
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {name!r}")
+
+
+class RateLimiter:
+    def init_app(self, app, jwt, buckets=None):
+        app.extensions["ratelimit"] = _RateLimitState(
+            app.config, buckets or _make_buckets(app.config)
+        )
+        app.before_request(self.check_request)
+        app.teardown_request(self.release)
+        jwt.token_verification_loader(self._limit_identity)
+
+    @property
+    def state(self):
+        return current_app.extensions["ratelimit"]
+
+    def check_request(self):
+        if request.blueprint != "api":
+            return
+        state = self.state
+        if state.shed and request.endpoint in LONG_LIVED_ENDPOINTS:
+            if not state.enter_long_lived():
+                self.shed(f"{state.max_long_lived} long-lived requests in flight")
+            request.environ[IN_FLIGHT_KEY] = "long_lived"
+        elif state.shed:
+            request.environ[IN_FLIGHT_KEY] = "in_flight"
+            self.shed_if_overloaded(state, state.enter())
+        if state.enabled and request.endpoint in IP_ENDPOINTS:
+            self.limit(state, f"ip:{request.remote_addr}")
+
+    def release(self, exc):
+        # Event streams get here once the stream is over
+        counted = request.environ.pop(IN_FLIGHT_KEY, None)
+        if counted == "in_flight":
+            self.state.leave()
+        elif counted == "long_lived":
+            self.state.leave_long_lived()
+
+    def _limit_identity(self, jwt_header, jwt_data):
+        state = self.state
+        if state.enabled and request.blueprint == "api":
+            self.limit(
+                state, f"user:{jwt_data[current_app.config['JWT_IDENTITY_CLAIM']]}"
+            )
+        return True
+
+    def shed_if_overloaded(self, state, in_flight):
+        if state.queue_depth is not None:
+            # The server's count includes the long-lived requests
+            in_flight = state.queue_depth() - state.long_lived
+        if in_flight > state.max_in_flight:
+            self.shed(f"{in_flight} requests in flight")
+
+    def shed(self, reason):
+        logger.warning(f"{reason}, shedding {request.endpoint}")
+        abort(
+            503,
+            message="The server is busy, retry later.",
+            headers={"Retry-After": str(self.state.shed_retry_after)},
+        )
+
+    def limit(self, state, client):
+        rate, burst = state.limits.get(request.endpoint) or state.limits["default"]
+        wait = state.buckets.take(f"{request.endpoint}:{client}", rate, burst)
+        if wait > 0:
+            abort(
+                429,
+                message="Too many requests, retry later.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
@@ -0,0 +1,164 @@
+"""Routing of safe reads to read replicas.
+
+Every URI in ``DATABASE_REPLICA_URIS`` gets an engine with the primary's
+pool settings. Views decorated with :func:`replica_read` run their queries
+on one replica, picked at random per request, through
+:class:`RoutingSession`. Everything else (writes,
+authentication, undecorated views) stays on the primary.
+
+Replicas lag behind the primary, so a decorated view still reads from the
+primary for ``REPLICA_STICKY_SECONDS``:
+
+- after a write by the same client (JWT identity), so clients read their
+  own writes;
+- after a commit touching the person in the view's ``person_id``, so the
+  response cache is never filled with the person's rows from a lagging
+  replica.
+
+These marks are kept in the process, or in Redis, shared by every worker,
+when ``CACHE_BACKEND`` is "redis".
+"""
+
+import math
+import random
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.caching import PENDING_KEY, ExternalBackend, InProcessBackend
+from app.config import engine_options
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class RoutingSession(FlaskSession):
+    """Session sending the statements of replica_read views to their replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get("replica_bind")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class _ReplicaState:
+    def __init__(self, engines, marks, window):
+        self.engines = engines
+        self.marks = marks
+        self.window = window
+
+    def mark(self, key):
+        if self.window > 0:
+            self.marks.set(key, b"1", self.window)
+
+    def is_marked(self, key):
+        return self.window > 0 and self.marks.get(key) is not None
+
+
+class _WholeSecondsBackend:
+    """Redis expiries are whole seconds; round the window up"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, value, math.ceil(ttl))
+
+
+def _make_marks(config):
+    if config["CACHE_BACKEND"] == "redis":
+        import redis
+
+        return _WholeSecondsBackend(
+            ExternalBackend(
+                redis.Redis.from_url(config["CACHE_REDIS_URL"]),
+                namespace="car-management:replica:",
+            )
+        )
+    return InProcessBackend(config["CACHE_MAX_ENTRIES"])
+
+
+class ReplicaRouter:
+    def init_app(self, app, marks=None):
+        engines = [
+            create_engine(uri, **engine_options(app.config, uri))
+            for uri in app.config["DATABASE_REPLICA_URIS"]
+        ]
+        app.extensions["replicas"] = _ReplicaState(
+            engines,
+            marks or _make_marks(app.config),
+            app.config["REPLICA_STICKY_SECONDS"],
+        )
+        if engines:
+            app.after_request(self.mark_writer)
+            app.teardown_request(self.release)
+        # Must see the written persons before the cache's listener pops them
+        if not event.contains(Session, "after_commit", _mark_committed_persons):
+            event.listen(Session, "after_commit", _mark_committed_persons, insert=True)
+
+    @property
+    def state(self):
+        return current_app.extensions["replicas"]
+
+    def mark_writer(self, response):
+        # Batch reads are POSTs too, but write nothing
+        if g.get("replica_read"):
+            return response
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:
+                # Not a protected view (register, login)
+                return response
+            self.state.mark(f"client:{identity}")
+        return response
+
+    def release(self, exc):
+        # Also ends the session's replica transaction, so an app context that
+        # outlives the request (the tests' one) does not keep reading from it
+        g.pop("replica_read", None)
+        if g.pop("replica_bind", None) is not None:
+            from app.extensions import db
+
+            db.session.close()
+
+
+def route_to_replica(person_id=None):
+    """Send this request's queries to a replica unless a mark pins it"""
+    state = current_app.extensions["replicas"]
+    if not state.engines:
+        return
+    if state.is_marked(f"client:{get_jwt_identity()}"):
+        return
+    if person_id is not None and state.is_marked(f"person:{person_id}"):
+        return
+    g.replica_bind = random.choice(state.engines)
+
+
+def replica_read(view):
+    """Run the queries of a safe, authenticated view on a replica"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_read = True
+        route_to_replica(kwargs.get("person_id"))
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _mark_committed_persons(session):
+    person_ids = session.info.get(PENDING_KEY)
+    if person_ids and has_app_context() and "replicas" in current_app.extensions:
+        state = current_app.extensions["replicas"]
+        if state.engines:
+            for person_id in person_ids:
+                state.mark(f"person:{person_id}")
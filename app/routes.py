@@ -1,18 +1,57 @@
-from flask import jsonify, request
+import importlib.util
+import json
+from collections import Counter
+from itertools import islice
+
+from flask import Response, current_app, jsonify, request, stream_with_context
 from flask.views import MethodView
-from flask_jwt_extended import create_access_token, jwt_required
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
 from flask_smorest import Blueprint, abort
 from loguru import logger
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.extensions import db
-from app.models import Person, User, Vehicle
+from app.bulk_import import import_people, iter_ndjson
+from app.caching import invalidate_person, person_key
+from app.etags import (
+    check_if_match,
+    is_not_modified,
+    not_modified,
+    people_etag,
+    person_etag,
+)
+from app.export import MIMETYPES, export
+from app.extensions import cache, compressor, db, revoked_tokens
+from app.metrics import timed
+from app.replicas import replica_read
+from app import outbox, stats
+from app.serializers import (
+    dump_people,
+    dump_person,
+    dump_vehicle,
+    dump_vehicles,
+    json_body,
+)
+from app.models import MAX_VEHICLES_PER_PERSON, Person, User, Vehicle
 from app.schemas import (
+    BatchArgsSchema,
+    CacheStatsSchema,
+    EventFeedArgsSchema,
+    ExportArgsSchema,
+    FleetStatsSchema,
+    ImportReportSchema,
+    PeoplePurgeArgsSchema,
+    PeoplePurgeReportSchema,
+    PersonBatchSchema,
+    PersonListArgsSchema,
     PersonQueryArgsSchema,
     PersonSchema,
     UserArguments,
     UserSchema,
+    VehicleBatchSchema,
     VehicleQueryArgsSchema,
     VehicleSchema,
+    VehicleSearchArgsSchema,
 )
 
 body = {
@@ -25,6 +64,192 @@ body = {
 
 bp = Blueprint("api", __name__, url_prefix="/api", description="Car Management API")
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+EVENT_STREAM_MIMETYPE = "text/event-stream"
+# Writes to a person raced by other requests are applied again this many times
+PERSON_WRITE_ATTEMPTS = 3
+
+
+def filter_people(query, args):
+    """Apply the listing filters (keyset cursor included) to a Person query"""
+    if args.get("after") is not None:
+        query = query.filter(Person.id > args["after"])
+    if "sale_oportunity" in args:
+        if args["sale_oportunity"]:
+            query = query.filter(Person.sale_oportunity.is_(True))
+        else:
+            query = query.filter(
+                db.or_(
+                    Person.sale_oportunity.is_(False),
+                    Person.sale_oportunity.is_(None),
+                )
+            )
+    if args.get("name"):
+        query = query.filter(Person.name.startswith(args["name"], autoescape=True))
+    if "has_vehicles" in args:
+        if args["has_vehicles"]:
+            query = query.filter(Person.vehicle_count > 0)
+        else:
+            query = query.filter(Person.vehicle_count == 0)
+    return query.order_by(Person.id)
+
+
+def filter_vehicles(query, args):
+    """Apply the vehicle search filters (keyset cursor included) to a query"""
+    if args.get("after") is not None:
+        query = query.filter(Vehicle.id > args["after"])
+    if args.get("color"):
+        query = query.filter(Vehicle.color == args["color"])
+    if args.get("model"):
+        query = query.filter(Vehicle.model == args["model"])
+    if args.get("name"):
+        query = query.filter(Vehicle.name.icontains(args["name"], autoescape=True))
+    if "sale_oportunity" in args:
+        query = query.join(Person, Person.id == Vehicle.person_id)
+        if args["sale_oportunity"]:
+            query = query.filter(Person.sale_oportunity.is_(True))
+        else:
+            query = query.filter(
+                db.or_(
+                    Person.sale_oportunity.is_(False),
+                    Person.sale_oportunity.is_(None),
+                )
+            )
+    return query.order_by(Vehicle.id)
+
+
+def stream_people(query, chunk_size):
+    """Yield people as NDJSON, fetching chunk_size rows per round-trip"""
+    lines = []
+    for person in query.yield_per(chunk_size):
+        lines.append(current_app.json.dumps(dump_person(person)))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def fetch_batch(query, model, ids):
+    """Rows of query whose id is in ids, in one IN query, and the ids not found"""
+    ids = list(dict.fromkeys(ids))
+    rows = query.filter(model.id.in_(ids)).order_by(model.id).all()
+    found = {row.id for row in rows}
+    return rows, [row_id for row_id in ids if row_id not in found]
+
+
+def batch_response(key, rows, missing, dump):
+    with timed("serialization"):
+        body = json_body(
+            {key: {str(row.id): dump(row) for row in rows}, "missing": missing}
+        )
+    return Response(body, mimetype="application/json")
+
+
+def write_person(person_id, write):
+    """Load a person, apply write(person) and commit, returning what write returns
+
+    The commit fails on a version mismatch when another request changed the
+    person meanwhile. A client that sent If-Match asked to change the version
+    it had seen, so it gets a 412; otherwise the person is reloaded and the
+    write applied again.
+    """
+    for _ in range(PERSON_WRITE_ATTEMPTS):
+        person = Person.query.get_or_404(person_id)
+        check_if_match(person_etag(person))
+        result = write(person)
+        try:
+            db.session.commit()
+            return result
+        except StaleDataError:
+            db.session.rollback()
+            if request.if_match:
+                abort(412, message="Person was modified by another request.")
+    abort(409, message="Person is being modified by other requests, try again.")
+
+
+def delete_vehicles_of(person_ids):
+    """Delete the vehicles of people about to be deleted, returning stats deltas
+
+    ON DELETE CASCADE would remove them too, but deleting them here reports
+    what went away so the fleet statistics stay exact.
+    """
+    deltas = Counter()
+    for color, model in db.session.execute(
+        db.delete(Vehicle)
+        .where(Vehicle.person_id.in_(person_ids))
+        .returning(Vehicle.color, Vehicle.model)
+        .execution_options(synchronize_session=False)
+    ):
+        deltas[stats.vehicles_key(color, model)] -= 1
+    return deltas
+
+
+def delete_owned_vehicle(person_id, vehicle_id):
+    """Delete a person's vehicle, returning whether it exists and its color and model
+
+    (color, model) is None unless the vehicle was deleted. On PostgreSQL the
+    vehicle is read in a CTE of the DELETE statement itself, so a foreign
+    vehicle (403) is told from a missing one (404) without another query.
+    SQLite has no DELETE in a CTE: it looks the vehicle up, only when nothing
+    was deleted.
+    """
+    delete = (
+        db.delete(Vehicle)
+        .where(Vehicle.id == vehicle_id, Vehicle.person_id == person_id)
+        .returning(Vehicle.id, Vehicle.color, Vehicle.model)
+    )
+    if db.session.get_bind().dialect.name == "postgresql":
+        # Both CTEs see the table as it was before the DELETE
+        target = db.select(Vehicle.id).where(Vehicle.id == vehicle_id).cte("target")
+        deleted = delete.cte("deleted")
+        row = db.session.execute(
+            db.select(deleted.c.id, deleted.c.color, deleted.c.model).select_from(
+                target.outerjoin(deleted, db.true())
+            )
+        ).first()
+        if row is None:
+            return False, None
+        return True, None if row.id is None else (row.color, row.model)
+
+    row = db.session.execute(
+        delete.execution_options(synchronize_session=False)
+    ).first()
+    if row is not None:
+        return True, (row.color, row.model)
+    exists = db.session.scalar(db.select(Vehicle.id).where(Vehicle.id == vehicle_id))
+    return exists is not None, None
+
+
+def purge_people(person_ids, chunk_size):
+    """Delete people by id with their vehicles, one commit per chunk of ids
+
+    The people of a chunk are locked first so no vehicle can be added to them
+    meanwhile. Ids are handled in ascending order so concurrent purges lock
+    rows in the same order.
+    """
+    person_ids = iter(sorted(set(person_ids)))
+    deleted = []
+    while chunk := list(islice(person_ids, chunk_size)):
+        db.session.execute(
+            db.select(Person.id).where(Person.id.in_(chunk)).with_for_update()
+        )
+        deltas = delete_vehicles_of(chunk)
+        removed = db.session.execute(
+            db.delete(Person)
+            .where(Person.id.in_(chunk))
+            .returning(Person.id, Person.vehicle_count, Person.sale_oportunity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for person_id, vehicle_count, sale_oportunity in removed:
+            invalidate_person(db.session, person_id)
+            deltas.update(stats.person_deltas(vehicle_count, sale_oportunity, -1))
+            outbox.record("person.deleted", {"id": person_id})
+        stats.record(deltas)
+        db.session.commit()
+        deleted.extend(person_id for person_id, _, _ in removed)
+    return deleted
+
 
 # User registration route
 @bp.route("/register")
@@ -34,7 +259,7 @@ class Register(MethodView):
     @bp.doc(description="Create a new user")
     def post(self, user_data):
         """Create a new user"""
-        if User.query.filter_by(username=user_data.get("username")).first():
+        if User.find_by_username(user_data.get("username")):
             abort(409, message="User already exists")
         user = User(username=user_data.get("username"))
         user.set_password(user_data.get("password"))
@@ -50,25 +275,87 @@ class Login(MethodView):
     @bp.response(200, content_type="application/json")
     def post(self, login_data):
         data = request.get_json()
-        user = User.query.filter_by(username=login_data.get("username")).first()
+        user = User.find_by_username(login_data.get("username"))
 
         if user and user.check_password(data["password"]):
+            if user.password_needs_rehash():
+                user.set_password(data["password"])
+                db.session.commit()
             access_token = create_access_token(identity=user.id)
             return jsonify(access_token=access_token), 200
         else:
             abort(401, message="Invalid username or password")
 
 
+# User logout route
+@bp.route("/logout")
+class Logout(MethodView):
+    @jwt_required()
+    @bp.response(204)
+    @bp.doc(description="Revoke the access token used for this request")
+    @bp.doc(parameters=[body])
+    def post(self):
+        """Revoke the current access token"""
+        claims = get_jwt()
+        revoked_tokens.revoke(claims["jti"], claims["exp"])
+
+
 # Get all people
 @bp.route("/people")
 class PeopleListResource(MethodView):
     @jwt_required()
+    @bp.arguments(PersonListArgsSchema, location="query")
     @bp.response(200, PersonSchema(many=True))
-    @bp.doc(description="Get all people with their vehicles")
+    @bp.doc(
+        description=(
+            "Get people with their vehicles, paginated by `limit` and the `after` "
+            "cursor (the X-Pagination header carries the next cursor). Send "
+            f"`Accept: {NDJSON_MIMETYPE}` to stream every matching person instead"
+        )
+    )
     @bp.doc(parameters=[body])
-    def get(self):
-        """Get all people with their vehicles"""
-        return Person.query.all()
+    @replica_read
+    def get(self, args):
+        """Get people with their vehicles"""
+        query = filter_people(Person.query.options(selectinload(Person.vehicles)), args)
+        config = current_app.config
+
+        if (
+            request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+            == NDJSON_MIMETYPE
+        ):
+            if args.get("limit"):
+                query = query.limit(args["limit"])
+            return Response(
+                stream_with_context(stream_people(query, config["STREAM_CHUNK_SIZE"])),
+                mimetype=NDJSON_MIMETYPE,
+            )
+
+        limit = min(
+            args.get("limit") or config["PEOPLE_PAGE_SIZE"],
+            config["PEOPLE_MAX_PAGE_SIZE"],
+        )
+        people = query.limit(limit + 1).all()
+        next_after = None
+        if len(people) > limit:
+            people = people[:limit]
+            next_after = people[-1].id
+        pagination = {"limit": limit, "next_after": next_after}
+        headers = {"X-Pagination": json.dumps(pagination)}
+
+        tag = people_etag(people, sorted(args.items()), limit)
+        if is_not_modified(tag):
+            response = not_modified(tag)
+            response.headers.update(headers)
+            return response
+        headers["ETag"] = f'W/"{tag}"'
+
+        def serialize():
+            with timed("serialization"):
+                return json_body(dump_people(people))
+
+        body = compressor.cached_body(tag, serialize)
+        return Response(body, mimetype="application/json", headers=headers)
 
     @jwt_required()
     @bp.arguments(PersonQueryArgsSchema)
@@ -83,22 +370,141 @@ class PeopleListResource(MethodView):
         )
         try:
             db.session.add(person)
+            stats.record(stats.person_deltas(0, person.sale_oportunity))
+            db.session.flush()
+            outbox.record("person.created", outbox.person_payload(person))
             db.session.commit()
         except Exception as e:
+            db.session.rollback()
             logger.warning(f"Error adding person: {e}")
             abort(400, message="Error adding person.")
         return person
 
 
+# Bulk import people with their vehicles
+@bp.route("/people/import")
+class PeopleImportResource(MethodView):
+    @jwt_required()
+    @bp.response(200, ImportReportSchema)
+    @bp.doc(
+        description=(
+            "Import people with nested vehicles from a JSON array or an NDJSON "
+            f"body (`Content-Type: {NDJSON_MIMETYPE}`). Rows are validated "
+            "individually and the report lists the outcome of every row"
+        )
+    )
+    @bp.doc(parameters=[body])
+    def post(self):
+        """Bulk import people with their vehicles"""
+        if request.mimetype == NDJSON_MIMETYPE:
+            rows = iter_ndjson(request.stream)
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                abort(400, message="Expected a JSON array of people.")
+        return import_people(rows, current_app.config["IMPORT_CHUNK_SIZE"])
+
+
+@bp.route("/people/export")
+class PeopleExportResource(MethodView):
+    @jwt_required()
+    @bp.arguments(ExportArgsSchema, location="query")
+    @bp.response(200)
+    @bp.doc(
+        description=(
+            "Stream every person joined with their vehicles (one row per vehicle, "
+            "or one with empty vehicle columns) as CSV or Parquet (`format`)"
+        )
+    )
+    @bp.doc(parameters=[body])
+    @replica_read
+    def get(self, args):
+        """Export people with their vehicles"""
+        export_format = args["format"]
+        if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            abort(501, message="Parquet export needs pyarrow installed.")
+        return Response(
+            stream_with_context(
+                export(export_format, current_app.config["EXPORT_CHUNK_SIZE"])
+            ),
+            mimetype=MIMETYPES[export_format],
+            headers={
+                "Content-Disposition": f"attachment; filename=people.{export_format}"
+            },
+        )
+
+
+@bp.route("/people/purge")
+class PeoplePurgeResource(MethodView):
+    @jwt_required()
+    @bp.arguments(PeoplePurgeArgsSchema)
+    @bp.response(200, PeoplePurgeReportSchema)
+    @bp.doc(
+        description=(
+            "Delete many people with their vehicles. Unknown ids are ignored "
+            "and the report lists the ids that were deleted"
+        )
+    )
+    @bp.doc(parameters=[body])
+    def post(self, args):
+        """Delete people by ID together with their vehicles"""
+        deleted = purge_people(args["ids"], current_app.config["PURGE_CHUNK_SIZE"])
+        return {"deleted": len(deleted), "ids": deleted}
+
+
 # Get or add vehicles to a person
+@bp.route("/vehicles")
+class VehicleSearchResource(MethodView):
+    @jwt_required()
+    @bp.arguments(VehicleSearchArgsSchema, location="query")
+    @bp.response(200, VehicleSchema(many=True))
+    @bp.doc(
+        description=(
+            "Search vehicles across owners by color, model, a case-insensitive "
+            "name substring and the owner's sale_oportunity, paginated by `limit` "
+            "and the `after` cursor (the X-Pagination header carries the next "
+            "cursor)"
+        )
+    )
+    @bp.doc(parameters=[body])
+    @replica_read
+    def get(self, args):
+        """Search vehicles"""
+        config = current_app.config
+        limit = min(
+            args.get("limit") or config["VEHICLE_PAGE_SIZE"],
+            config["VEHICLE_MAX_PAGE_SIZE"],
+        )
+        vehicles = filter_vehicles(Vehicle.query, args).limit(limit + 1).all()
+        next_after = None
+        if len(vehicles) > limit:
+            vehicles = vehicles[:limit]
+            next_after = vehicles[-1].id
+        pagination = {"limit": limit, "next_after": next_after}
+        with timed("serialization"):
+            body = json_body(dump_vehicles(vehicles))
+        return Response(
+            body,
+            mimetype="application/json",
+            headers={"X-Pagination": json.dumps(pagination)},
+        )
+
+
 @bp.route("/vehicles/person/<int:person_id>")
 class PersonVehiclesResource(MethodView):
     @jwt_required()
-    @bp.response(200, PersonSchema)
+    @bp.response(200, VehicleSchema(many=True))
+    @replica_read
     def get(self, person_id):
         """Get a person by ID with their vehicles"""
-        person = Person.query.get_or_404(person_id)
-        return person.vehicles.all()
+
+        return cache.json_response(
+            person_key(person_id, "vehicles"),
+            load=lambda: Person.query.get_or_404(person_id),
+            dump=lambda person: dump_vehicles(person.vehicles),
+            etag=lambda person: person_etag(person, "-vehicles"),
+            person_id=person_id,
+        )
 
     @jwt_required()
     @bp.arguments(VehicleQueryArgsSchema)
@@ -111,10 +517,24 @@ class PersonVehiclesResource(MethodView):
     )
     def post(self, vehicle_data, person_id):
         """Add a vehicle to a person (max 3 vehicles)"""
-        person = Person.query.get_or_404(person_id)
-        if not person.sale_oportunity:
-            abort(403, message="Person cannot buy vehicles yet.")
-        if len(person.vehicles.all()) >= 3:
+        # Reserve a slot and check the rules in one statement; the row lock
+        # taken by the UPDATE serializes concurrent requests for the person
+        vehicle_count = db.session.execute(
+            db.update(Person)
+            .where(
+                Person.id == person_id,
+                Person.sale_oportunity.is_(True),
+                Person.vehicle_count < MAX_VEHICLES_PER_PERSON,
+            )
+            .values(vehicle_count=Person.vehicle_count + 1, version=Person.version + 1)
+            .returning(Person.vehicle_count)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if vehicle_count is None:
+            db.session.rollback()
+            person = Person.query.get_or_404(person_id)
+            if not person.sale_oportunity:
+                abort(403, message="Person cannot buy vehicles yet.")
             abort(400, message="A person can only have up to 3 vehicles.")
         try:
             vehicle = Vehicle(
@@ -124,9 +544,16 @@ class PersonVehiclesResource(MethodView):
                 person_id=person_id,
             )
             db.session.add(vehicle)
+            deltas = Counter({stats.vehicles_key(vehicle.color, vehicle.model): 1})
+            deltas[stats.owners_key(vehicle_count - 1)] -= 1
+            deltas[stats.owners_key(vehicle_count)] += 1
+            stats.record(deltas)
+            db.session.flush()
+            outbox.record("vehicle.added", outbox.vehicle_payload(vehicle))
             db.session.commit()
             return vehicle
         except Exception as e:
+            db.session.rollback()
             logger.warning(f"Error adding vehicle: {e}")
             abort(400, message=str(e))
 
@@ -137,49 +564,135 @@ class PersonVehicleResource(MethodView):
     @jwt_required()
     @bp.response(200, VehicleSchema)
     @bp.doc(description="Get vehicle information")
+    @replica_read
     def get(self, vehicle_id, person_id):
-        """Add a vehicle to a person (max 3 vehicles)"""
-        if not Vehicle.query.get_or_404(vehicle_id):
-            abort(404, message="Vehicle not found.")
-        if not Vehicle.query.get_or_404(vehicle_id).person_id == person_id:
-            abort(403, message="Vehicle does not belong to person.")
-        try:
-            return Vehicle.query.get_or_404(vehicle_id)
-        except Exception as e:
-            logger.warning(e)
-            abort(400, message="Error deleting vehicle.")
+        """Get a vehicle of a person"""
+
+        def load():
+            vehicle = db.session.get(Vehicle, vehicle_id)
+            if vehicle is None:
+                abort(404, message="Vehicle not found.")
+            if vehicle.person_id != person_id:
+                abort(403, message="Vehicle does not belong to person.")
+            return vehicle
+
+        return cache.json_response(
+            person_key(person_id, f"vehicle:{vehicle_id}"),
+            load=load,
+            dump=dump_vehicle,
+            person_id=person_id,
+        )
 
     @jwt_required()
     @bp.response(204)
     @bp.doc(description="Delete a vehicle from a person")
     def delete(self, vehicle_id, person_id):
-        """Add a vehicle to a person (max 3 vehicles)"""
-        if not Vehicle.query.get_or_404(vehicle_id):
-            abort(404, message="Vehicle not found.")
-        if not Vehicle.query.get_or_404(vehicle_id).person_id == person_id:
-            abort(403, message="Vehicle does not belong to person.")
+        """Delete a vehicle from a person"""
         try:
-            db.session.delete(Vehicle.query.get_or_404(vehicle_id))
-            db.session.commit()
+            exists, deleted = delete_owned_vehicle(person_id, vehicle_id)
+            if deleted is not None:
+                color, model = deleted
+                invalidate_person(db.session, person_id)
+                vehicle_count = db.session.execute(
+                    db.update(Person)
+                    .where(Person.id == person_id)
+                    .values(
+                        vehicle_count=Person.vehicle_count - 1,
+                        version=Person.version + 1,
+                    )
+                    .returning(Person.vehicle_count)
+                    .execution_options(synchronize_session=False)
+                ).scalar()
+                deltas = Counter({stats.vehicles_key(color, model): -1})
+                deltas[stats.owners_key(vehicle_count + 1)] -= 1
+                deltas[stats.owners_key(vehicle_count)] += 1
+                stats.record(deltas)
+                outbox.record(
+                    "vehicle.deleted", {"id": vehicle_id, "person_id": person_id}
+                )
+                db.session.commit()
+                return
+            db.session.rollback()
         except Exception as e:
+            db.session.rollback()
             logger.warning(e)
             abort(400, message="Error deleting vehicle.")
+        if not exists:
+            abort(404, message="Vehicle not found.")
+        abort(403, message="Vehicle does not belong to person.")
+
+
+@bp.route("/vehicle/batch")
+class VehicleBatchResource(MethodView):
+    @jwt_required()
+    @bp.arguments(BatchArgsSchema)
+    @bp.response(200, VehicleBatchSchema)
+    @bp.doc(
+        description=(
+            "Get many vehicles by ID in one request: `vehicles` maps each id "
+            "found to its vehicle and `missing` lists the ids that do not exist"
+        )
+    )
+    @bp.doc(parameters=[body])
+    @replica_read
+    def post(self, args):
+        """Get vehicles by ID"""
+        vehicles, missing = fetch_batch(Vehicle.query, Vehicle, args["ids"])
+        return batch_response("vehicles", vehicles, missing, dump_vehicle)
+
+
+@bp.route("/person/batch")
+class PersonBatchResource(MethodView):
+    @jwt_required()
+    @bp.arguments(BatchArgsSchema)
+    @bp.response(200, PersonBatchSchema)
+    @bp.doc(
+        description=(
+            "Get many people with their vehicles by ID in one request: `people` "
+            "maps each id found to the person and `missing` lists the ids that "
+            "do not exist"
+        )
+    )
+    @bp.doc(parameters=[body])
+    @replica_read
+    def post(self, args):
+        """Get people with their vehicles by ID"""
+        # One statement for the people, one batched statement for all vehicles
+        people, missing = fetch_batch(
+            Person.query.options(selectinload(Person.vehicles)), Person, args["ids"]
+        )
+        return batch_response("people", people, missing, dump_person)
 
 
 @bp.route("/person/<int:person_id>")
 class PersonById(MethodView):
     @jwt_required()
     @bp.response(200, PersonSchema)
+    @replica_read
     def get(self, person_id):
-        person = Person.query.get_or_404(person_id)
-        return person
+        return cache.json_response(
+            person_key(person_id),
+            load=lambda: Person.query.options(joinedload(Person.vehicles)).get_or_404(
+                person_id
+            ),
+            dump=dump_person,
+            etag=person_etag,
+            person_id=person_id,
+        )
 
     @jwt_required()
     @bp.response(204)
     def delete(self, person_id):
-        person = Person.query.get_or_404(person_id)
-        db.session.delete(person)
-        db.session.commit()
+        def write(person):
+            deltas = delete_vehicles_of([person_id])
+            deltas.update(
+                stats.person_deltas(person.vehicle_count, person.sale_oportunity, -1)
+            )
+            stats.record(deltas)
+            outbox.record("person.deleted", {"id": person_id})
+            db.session.delete(person)
+
+        write_person(person_id, write)
         return "", 204
 
     @jwt_required()
@@ -187,13 +700,105 @@ class PersonById(MethodView):
     @bp.response(200, PersonSchema)
     @bp.doc(description="Edit a person")
     def patch(self, data, person_id):
-        person = Person.query.get_or_404(person_id)
         data = request.get_json()
-        if data.get("name"):
-            person.name = data.get("name")
-        if data.get("sale_oportunity"):
-            person.sale_oportunity = data.get("sale_oportunity")
-        db.session.add(person)
-        db.session.commit()
 
-        return person
+        def write(person):
+            if data.get("name"):
+                person.name = data.get("name")
+            if data.get("sale_oportunity"):
+                if not person.sale_oportunity:
+                    stats.record({stats.SALE_OPORTUNITY_KEY: 1})
+                person.sale_oportunity = data.get("sale_oportunity")
+            db.session.add(person)
+            # Setting a field to its current value changes nothing
+            if db.session.is_modified(person):
+                outbox.record("person.updated", outbox.person_payload(person))
+            return person
+
+        person = write_person(person_id, write)
+        return person, 200, {"ETag": f'W/"{person_etag(person)}"'}
+
+
+@bp.route("/events")
+class EventFeedResource(MethodView):
+    @jwt_required()
+    @bp.arguments(EventFeedArgsSchema, location="query")
+    @bp.response(200)
+    @bp.doc(
+        description=(
+            "Person and vehicle changes after the `after` event id, oldest first "
+            "(the X-Pagination header carries the next cursor). With `wait`, "
+            "waits up to that many seconds for an event. Send "
+            f"`Accept: {EVENT_STREAM_MIMETYPE}` to receive them as server-sent "
+            "events instead, resuming from `Last-Event-ID`"
+        )
+    )
+    @bp.doc(parameters=[body])
+    def get(self, args):
+        """Get the change feed"""
+        config = current_app.config
+        limit = min(
+            args.get("limit") or config["EVENTS_PAGE_SIZE"],
+            config["EVENTS_MAX_PAGE_SIZE"],
+        )
+        after = args["after"]
+
+        if (
+            request.accept_mimetypes.best_match(
+                ["application/json", EVENT_STREAM_MIMETYPE]
+            )
+            == EVENT_STREAM_MIMETYPE
+        ):
+            last_event_id = request.headers.get("Last-Event-ID", "")
+            if last_event_id.isdigit():
+                after = int(last_event_id)
+            return Response(
+                stream_with_context(
+                    outbox.stream_events(after, limit, config["EVENTS_STREAM_SECONDS"])
+                ),
+                mimetype=EVENT_STREAM_MIMETYPE,
+                headers={"Cache-Control": "no-cache"},
+            )
+
+        events = outbox.wait_for_events(
+            after, limit, min(args["wait"], config["EVENTS_MAX_WAIT"])
+        )
+        pagination = {
+            "limit": limit,
+            "next_after": events[-1].id if events else after,
+        }
+        with timed("serialization"):
+            body = json_body([outbox.dump_event(event) for event in events])
+        return Response(
+            body,
+            mimetype="application/json",
+            headers={"X-Pagination": json.dumps(pagination)},
+        )
+
+
+@bp.route("/stats")
+class FleetStatsResource(MethodView):
+    @jwt_required()
+    @bp.response(200, FleetStatsSchema)
+    @bp.doc(
+        description=(
+            "Vehicles by color and model, people by number of vehicles and the "
+            "share of people with a sale oportunity"
+        )
+    )
+    @bp.doc(parameters=[body])
+    @replica_read
+    def get(self):
+        """Get the fleet statistics"""
+        return stats.report(stats.read_counters())
+
+
+@bp.route("/cache/stats")
+class CacheStatsResource(MethodView):
+    @jwt_required()
+    @bp.response(200, CacheStatsSchema)
+    @bp.doc(description="Hit and miss counters of the response cache")
+    @bp.doc(parameters=[body])
+    def get(self):
+        """Get the response cache counters"""
+        return cache.stats()
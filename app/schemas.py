@@ -1,6 +1,24 @@
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from flask import current_app
+from flask_smorest import abort
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
 import marshmallow as ma
-from app.models import Person, User, Vehicle
+from app.metrics import timed
+from app.models import (
+    MAX_VEHICLES_PER_PERSON,
+    Person,
+    User,
+    Vehicle,
+    VehicleColorEnum,
+    VehicleModelEnum,
+)
+
+
+class TimedDumpMixin:
+    """Count dumps of response schemas towards the serialization metric"""
+
+    def dump(self, obj, *, many=None):
+        with timed("serialization"):
+            return super().dump(obj, many=many)
 
 
 class UserSchema(SQLAlchemyAutoSchema):
@@ -10,18 +28,23 @@ class UserSchema(SQLAlchemyAutoSchema):
         load_instance = True
 
 
-class VehicleSchema(SQLAlchemyAutoSchema):
+class VehicleSchema(TimedDumpMixin, SQLAlchemyAutoSchema):
     class Meta:
         model = Vehicle
         include_relationships = True
         load_instance = True
 
+    # Read the owner id from the FK column so dumping a list of vehicles does
+    # not lazy load each owner
+    person = auto_field("person_id")
 
-class PersonSchema(SQLAlchemyAutoSchema):
+
+class PersonSchema(TimedDumpMixin, SQLAlchemyAutoSchema):
     class Meta:
         model = Person
         include_relationships = True
         load_instance = True
+        exclude = ("vehicle_count", "version")
 
 
 class PersonQueryArgsSchema(ma.Schema):
@@ -30,6 +53,14 @@ class PersonQueryArgsSchema(ma.Schema):
     vehicles = ma.fields.List(ma.fields.Nested(VehicleSchema))
 
 
+class PersonListArgsSchema(ma.Schema):
+    limit = ma.fields.Integer(validate=ma.validate.Range(min=1))
+    after = ma.fields.Integer(validate=ma.validate.Range(min=0))
+    sale_oportunity = ma.fields.Boolean()
+    name = ma.fields.String(validate=ma.validate.Length(min=1))
+    has_vehicles = ma.fields.Boolean()
+
+
 class VehicleQueryArgsSchema(ma.Schema):
     name = ma.fields.String()
     color = ma.fields.String()
@@ -37,6 +68,149 @@ class VehicleQueryArgsSchema(ma.Schema):
     person_id = ma.fields.Integer()
 
 
+class VehicleSearchArgsSchema(ma.Schema):
+    limit = ma.fields.Integer(validate=ma.validate.Range(min=1))
+    after = ma.fields.Integer(validate=ma.validate.Range(min=0))
+    color = ma.fields.String(
+        validate=ma.validate.OneOf(
+            [color.value for color in VehicleColorEnum], error="Color not available."
+        )
+    )
+    model = ma.fields.String(
+        validate=ma.validate.OneOf(
+            [model.value for model in VehicleModelEnum], error="Model not available."
+        )
+    )
+    name = ma.fields.String(validate=ma.validate.Length(min=1))
+    sale_oportunity = ma.fields.Boolean()
+
+
+class VehicleImportSchema(VehicleQueryArgsSchema):
+    class Meta:
+        exclude = ("person_id",)
+
+    name = ma.fields.String(
+        required=True, validate=ma.validate.Length(max=Vehicle.name.type.length)
+    )
+    color = ma.fields.String(
+        required=True,
+        validate=ma.validate.OneOf(
+            [color.value for color in VehicleColorEnum], error="Color not available."
+        ),
+    )
+    model = ma.fields.String(
+        required=True,
+        validate=ma.validate.OneOf(
+            [model.value for model in VehicleModelEnum], error="Model not available."
+        ),
+    )
+
+
+class PersonImportSchema(PersonQueryArgsSchema):
+    # Lengths come from the columns so an overlong name fails its own row
+    # instead of the insert of the whole chunk
+    name = ma.fields.String(
+        required=True, validate=ma.validate.Length(max=Person.name.type.length)
+    )
+    sale_oportunity = ma.fields.Boolean(load_default=False)
+    vehicles = ma.fields.List(ma.fields.Nested(VehicleImportSchema), load_default=list)
+
+    @ma.validates_schema
+    def validate_vehicles(self, data, **kwargs):
+        if not data.get("vehicles"):
+            return
+        if not data.get("sale_oportunity"):
+            raise ma.ValidationError("Person cannot buy vehicles yet.", "vehicles")
+        if len(data["vehicles"]) > MAX_VEHICLES_PER_PERSON:
+            raise ma.ValidationError(
+                "A person can only have up to 3 vehicles.", "vehicles"
+            )
+
+
+class ImportRowResultSchema(ma.Schema):
+    row = ma.fields.Integer()
+    status = ma.fields.String()
+    id = ma.fields.Integer()
+    errors = ma.fields.Dict()
+
+
+class ImportReportSchema(TimedDumpMixin, ma.Schema):
+    created = ma.fields.Integer()
+    failed = ma.fields.Integer()
+    results = ma.fields.List(ma.fields.Nested(ImportRowResultSchema))
+
+
+class PeoplePurgeArgsSchema(ma.Schema):
+    ids = ma.fields.List(
+        ma.fields.Integer(), required=True, validate=ma.validate.Length(min=1)
+    )
+
+
+class PeoplePurgeReportSchema(TimedDumpMixin, ma.Schema):
+    deleted = ma.fields.Integer()
+    ids = ma.fields.List(ma.fields.Integer())
+
+
+class BatchArgsSchema(ma.Schema):
+    ids = ma.fields.List(
+        ma.fields.Integer(), required=True, validate=ma.validate.Length(min=1)
+    )
+
+    @ma.pre_load
+    def limit_ids(self, data, **kwargs):
+        """Refuse an oversized batch before deserializing any of its ids"""
+        ids = data.get("ids") if isinstance(data, dict) else None
+        max_ids = current_app.config["BATCH_MAX_IDS"]
+        if isinstance(ids, list) and len(ids) > max_ids:
+            abort(400, message=f"At most {max_ids} ids per batch.")
+        return data
+
+
+class PersonBatchSchema(TimedDumpMixin, ma.Schema):
+    people = ma.fields.Dict(
+        keys=ma.fields.String(), values=ma.fields.Nested(PersonSchema)
+    )
+    missing = ma.fields.List(ma.fields.Integer())
+
+
+class VehicleBatchSchema(TimedDumpMixin, ma.Schema):
+    vehicles = ma.fields.Dict(
+        keys=ma.fields.String(), values=ma.fields.Nested(VehicleSchema)
+    )
+    missing = ma.fields.List(ma.fields.Integer())
+
+
+class FleetStatsSchema(TimedDumpMixin, ma.Schema):
+    vehicles = ma.fields.Dict(
+        keys=ma.fields.String(),
+        values=ma.fields.Dict(keys=ma.fields.String(), values=ma.fields.Integer()),
+    )
+    persons = ma.fields.Integer()
+    persons_by_vehicle_count = ma.fields.Dict(
+        keys=ma.fields.String(), values=ma.fields.Integer()
+    )
+    sale_oportunity = ma.fields.Integer()
+    sale_oportunity_share = ma.fields.Float()
+
+
+class ExportArgsSchema(ma.Schema):
+    format = ma.fields.String(
+        load_default="csv", validate=ma.validate.OneOf(["csv", "parquet"])
+    )
+
+
+class EventFeedArgsSchema(ma.Schema):
+    after = ma.fields.Integer(load_default=0, validate=ma.validate.Range(min=0))
+    limit = ma.fields.Integer(validate=ma.validate.Range(min=1))
+    wait = ma.fields.Float(load_default=0, validate=ma.validate.Range(min=0))
+
+
+class CacheStatsSchema(TimedDumpMixin, ma.Schema):
+    hits = ma.fields.Integer()
+    misses = ma.fields.Integer()
+    size = ma.fields.Integer()
+
+
 class UserArguments(ma.Schema):
     username = ma.fields.String()
     password = ma.fields.String()
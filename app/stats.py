@@ -0,0 +1,188 @@
+"""Fleet statistics served from the ``fleet_stats`` counters table.
+
+Every write path that creates or removes people or vehicles, or flips a
+person's sale oportunity, passes its deltas to :func:`record` inside its own
+transaction, so the counters commit (or roll back) together with the change.
+Each counter is spread over ``STATS_COUNTER_SHARDS`` rows and a transaction
+bumps a random shard, which keeps concurrent writers from queueing on a single
+hot row. Reading the statistics sums a few dozen rows whatever the fleet size.
+
+``flask stats check`` recomputes the counters from the base tables and reports
+(``--fix``: rewrites) any drift.
+"""
+
+import random
+from collections import Counter
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from loguru import logger
+from sqlalchemy import BigInteger, cast, func, select, text
+
+from app.extensions import db
+from app.models import (
+    FleetStat,
+    MAX_VEHICLES_PER_PERSON,
+    Person,
+    Vehicle,
+    VehicleColorEnum,
+    VehicleModelEnum,
+)
+
+PERSONS_KEY = "persons:total"
+SALE_OPORTUNITY_KEY = "persons:sale_oportunity"
+
+stats_cli = AppGroup("stats", help="Fleet statistics counters.")
+
+
+def _value(member):
+    return getattr(member, "value", member)
+
+
+def owners_key(vehicle_count):
+    return f"persons:vehicles:{vehicle_count}"
+
+
+def vehicles_key(color, model):
+    return f"vehicles:{_value(color)}:{_value(model)}"
+
+
+def person_deltas(vehicle_count, sale_oportunity, sign=1):
+    """Deltas for adding (sign=1) or removing (sign=-1) a person"""
+    deltas = Counter({PERSONS_KEY: sign, owners_key(vehicle_count): sign})
+    if sale_oportunity:
+        deltas[SALE_OPORTUNITY_KEY] += sign
+    return deltas
+
+
+def _upsert(rows):
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(FleetStat).values(rows)
+        return statement.on_duplicate_key_update(
+            value=FleetStat.value + statement.inserted.value
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(FleetStat).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[FleetStat.key, FleetStat.shard],
+        set_={"value": FleetStat.value + statement.excluded.value},
+    )
+
+
+def record(deltas):
+    """Add deltas (counter key -> change) to the counters in the current session"""
+    shard = random.randrange(current_app.config["STATS_COUNTER_SHARDS"])
+    # Sorted keys make concurrent upserts lock their rows in the same order
+    rows = [
+        {"key": key, "shard": shard, "value": delta}
+        for key, delta in sorted(deltas.items())
+        if delta
+    ]
+    if rows:
+        db.session.execute(_upsert(rows))
+
+
+def counters_query():
+    # PostgreSQL sums bigints as numeric, which the driver returns as Decimal
+    total = cast(func.sum(FleetStat.value), BigInteger)
+    return select(FleetStat.key, total).group_by(FleetStat.key)
+
+
+def read_counters():
+    return dict(db.session.execute(counters_query()).all())
+
+
+def compute_counters():
+    """Recompute every counter from the persons and vehicles tables"""
+    counters = Counter()
+    for vehicle_count, sale_oportunity, count in db.session.execute(
+        select(Person.vehicle_count, Person.sale_oportunity, func.count()).group_by(
+            Person.vehicle_count, Person.sale_oportunity
+        )
+    ):
+        for key, delta in person_deltas(vehicle_count, sale_oportunity).items():
+            counters[key] += delta * count
+    for color, model, count in db.session.execute(
+        select(Vehicle.color, Vehicle.model, func.count())
+        .where(Vehicle.person_id.is_not(None))
+        .group_by(Vehicle.color, Vehicle.model)
+    ):
+        counters[vehicles_key(color, model)] += count
+    return counters
+
+
+def report(counters):
+    """Shape the counters for the /stats response"""
+    persons = counters.get(PERSONS_KEY, 0)
+    sale_oportunity = counters.get(SALE_OPORTUNITY_KEY, 0)
+    return {
+        "vehicles": {
+            color.value: {
+                model.value: counters.get(vehicles_key(color, model), 0)
+                for model in VehicleModelEnum
+            }
+            for color in VehicleColorEnum
+        },
+        "persons": persons,
+        "persons_by_vehicle_count": {
+            str(count): counters.get(owners_key(count), 0)
+            for count in range(MAX_VEHICLES_PER_PERSON + 1)
+        },
+        "sale_oportunity": sale_oportunity,
+        "sale_oportunity_share": sale_oportunity / persons if persons else 0.0,
+    }
+
+
+def check(fix=False):
+    """Compare the counters with a full recompute, returning the drifted keys
+
+    With ``fix`` the counters are replaced by the recomputed values. On
+    PostgreSQL both sides are read from one snapshot, and when fixing the
+    counters table is locked first so no increment lands in between.
+    """
+    if db.engine.dialect.name == "postgresql":
+        # The isolation level only applies to a transaction that has not begun
+        db.session.close()
+        db.session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        if fix:
+            db.session.execute(text("LOCK TABLE fleet_stats IN EXCLUSIVE MODE"))
+    stored, actual = read_counters(), compute_counters()
+    drift = {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(stored.keys() | actual.keys())
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+    for key, (found, expected) in drift.items():
+        logger.warning(f"Fleet stats drift on {key}: stored {found}, actual {expected}")
+    if fix and drift:
+        db.session.execute(db.delete(FleetStat))
+        rows = [
+            {"key": key, "shard": 0, "value": value}
+            for key, value in sorted(actual.items())
+            if value
+        ]
+        if rows:
+            db.session.execute(db.insert(FleetStat), rows)
+    db.session.commit()
+    return drift
+
+
+@stats_cli.command("check")
+@click.option("--fix", is_flag=True, help="Rewrite the counters that drifted.")
+def check_command(fix):
+    """Recompute the fleet statistics and compare them with the counters"""
+    drift = check(fix=fix)
+    for key, (found, expected) in drift.items():
+        click.echo(f"{key}: stored {found}, actual {expected}")
+    if not drift:
+        click.echo("Fleet statistics are consistent.")
+    elif not fix:
+        raise SystemExit(1)
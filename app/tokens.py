@@ -0,0 +1,112 @@
+"""JWT verification fast path and token revocation.
+
+``CachingJWTManager`` keeps the claims of tokens it already verified, keyed by
+the SHA-256 of the encoded token, so a client reusing its token does not pay
+the signature check on every request. Entries never outlive the token's
+``exp``. Revoked tokens are tracked by ``jti`` in an in-memory set that can be
+synced with the ``revoked_tokens`` table so every worker process sees them.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+
+from app.caching import InProcessBackend
+
+
+class CachingJWTManager(JWTManager):
+    def init_app(self, app, add_context_processor=False):
+        super().init_app(app, add_context_processor)
+        app.extensions["jwt_decode_cache"] = InProcessBackend(
+            app.config["JWT_DECODE_CACHE_SIZE"]
+        )
+
+    def _decode_jwt_from_config(
+        self, encoded_token, csrf_value=None, allow_expired=False
+    ):
+        ttl = current_app.config["JWT_DECODE_CACHE_TTL"]
+        if not ttl or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(
+                encoded_token, csrf_value, allow_expired
+            )
+
+        decoded = current_app.extensions["jwt_decode_cache"]
+        key = hashlib.sha256(encoded_token.encode()).hexdigest()
+        claims = decoded.get(key)
+        if claims is not None and claims.get("exp", float("inf")) > time.time():
+            return dict(claims)
+
+        claims = super()._decode_jwt_from_config(encoded_token)
+        if "exp" in claims:
+            ttl = min(ttl, claims["exp"] - time.time())
+        if ttl > 0:
+            decoded.set(key, claims, ttl)
+        return dict(claims)
+
+
+class _RevocationState:
+    def __init__(self, config):
+        self.db_sync = config["JWT_REVOCATION_DB_SYNC"]
+        self.sync_interval = config["JWT_REVOCATION_SYNC_INTERVAL"]
+        self.revoked = {}
+        self.last_sync = float("-inf")
+        self.lock = threading.Lock()
+
+
+class RevocationList:
+    def init_app(self, app, jwt):
+        app.extensions["revoked_tokens"] = _RevocationState(app.config)
+        jwt.token_in_blocklist_loader(self._token_in_blocklist)
+
+    @property
+    def state(self):
+        return current_app.extensions["revoked_tokens"]
+
+    def revoke(self, jti, expires):
+        """Revoke a token until its ``exp`` (a unix timestamp)"""
+        from app.extensions import db
+        from app.models import RevokedToken
+
+        state = self.state
+        with state.lock:
+            state.revoked[jti] = expires
+        if state.db_sync:
+            db.session.merge(
+                RevokedToken(
+                    jti=jti,
+                    expires_at=datetime.fromtimestamp(expires, timezone.utc).replace(
+                        tzinfo=None
+                    ),
+                )
+            )
+            db.session.commit()
+
+    def sync(self):
+        """Reload the still-valid revoked tokens from the database"""
+        from app.models import RevokedToken
+
+        state = self.state
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        rows = RevokedToken.query.filter(RevokedToken.expires_at > now).all()
+        with state.lock:
+            state.revoked = {
+                **{jti: exp for jti, exp in state.revoked.items() if exp > time.time()},
+                **{
+                    row.jti: row.expires_at.replace(tzinfo=timezone.utc).timestamp()
+                    for row in rows
+                },
+            }
+            state.last_sync = time.monotonic()
+
+    def is_revoked(self, jti):
+        state = self.state
+        if state.db_sync and time.monotonic() - state.last_sync > state.sync_interval:
+            self.sync()
+        return jti in state.revoked
+
+    def _token_in_blocklist(self, jwt_header, jwt_payload):
+        return self.is_revoked(jwt_payload["jti"])
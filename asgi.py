@@ -0,0 +1,8 @@
+"""Async entry point for the read endpoints (see app/asgi.py):
+
+uvicorn asgi:app --workers 4
+"""
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
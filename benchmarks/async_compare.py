@@ -0,0 +1,202 @@
+"""The sync (gunicorn) and async (uvicorn) apps side by side under many clients.
+
+Both servers are started in turn on the same seeded database (SQLite by
+default, or --database-uri) and every read endpoint is hit by --concurrency
+keep-alive clients for --seconds. The clients are coroutines on one event loop,
+so a thousand of them cost a thousand sockets rather than a thousand threads.
+
+Usage: python -m benchmarks.async_compare --concurrency 1000 --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from benchmarks.seed import make_config, seeded_database
+
+GRACE = 5
+ENDPOINTS = {
+    "list": "/api/people?limit=50",
+    "detail": "/api/person/{person_id}",
+    "vehicles": "/api/vehicles/person/{person_id}",
+}
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/stats", timeout=1).read()
+            return
+        except urllib.error.HTTPError:
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length, close = 0, False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip().lower() == b"close":
+            close = True
+    await reader.readexactly(length)
+    return status, close
+
+
+async def client(index, port, path, token, deadline, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        request = (
+            f"GET {path.format(person_id=index % 1000 + 1)} HTTP/1.1\r\n"
+            f"Host: 127.0.0.1:{port}\r\nAuthorization: Bearer {token}\r\n\r\n"
+        ).encode()
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            # Requests still queued at the deadline get a grace period, then
+            # count as errors
+            status, close = await asyncio.wait_for(
+                read_response(reader), deadline - time.monotonic() + GRACE
+            )
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            errors.append(e)
+            writer = None
+            continue
+        if status != 200:
+            errors.append(status)
+        else:
+            latencies.append(time.perf_counter() - start)
+        if close:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def hammer(port, path, token, concurrency, seconds):
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(
+        *(
+            client(index, port, path, token, deadline, latencies, errors)
+            for index in range(concurrency)
+        )
+    )
+    latencies.sort()
+    return {
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": (
+            round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 1)
+            if latencies
+            else None
+        ),
+        "errors": len(errors),
+    }
+
+
+def server_command(mode, options, port):
+    if mode == "sync":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "asgi:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(options.workers),
+        "--no-access-log",
+        "--log-level",
+        "warning",
+    ]
+
+
+def run(mode, options, database_uri, token):
+    port = options.port
+    env = {
+        **os.environ,
+        "DATABASE_URI": database_uri,
+        "WEB_BIND": f"127.0.0.1:{port}",
+        "WEB_WORKERS": str(options.workers),
+        "WEB_THREADS": str(options.threads),
+        "WEB_WORKER_CONNECTIONS": str(options.concurrency + 100),
+        "WEB_ACCESS_LOG": "/dev/null",
+        "DB_POOL_SIZE": str(options.pool_size),
+        "DB_MAX_OVERFLOW": "0",
+        "CACHE_BACKEND": "none",
+    }
+    server = subprocess.Popen(
+        server_command(mode, options, port),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}")
+        return {
+            name: asyncio.run(
+                hammer(port, path, token, options.concurrency, options.seconds)
+            )
+            for name, path in ENDPOINTS.items()
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--database-uri")
+    parser.add_argument("--port", type=int, default=5056)
+    options = parser.parse_args()
+
+    database_uri = options.database_uri or "sqlite:///" + seeded_database(
+        options.persons
+    )
+    with create_app(make_config(":memory:")).app_context():
+        token = create_access_token(identity=1)
+
+    print(
+        f"{'mode':>5} {'endpoint':>9} {'rps':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>6}"
+    )
+    for mode in options.modes:
+        for endpoint, result in run(mode, options, database_uri, token).items():
+            print(
+                f"{mode:>5} {endpoint:>9} {result['rps']:>8} "
+                f"{result['p50_ms']!s:>8} {result['p99_ms']!s:>8} "
+                f"{result['errors']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
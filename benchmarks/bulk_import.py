@@ -0,0 +1,105 @@
+"""Wall time of importing people one POST at a time vs POST /api/people/import.
+
+Usage: python -m benchmarks.bulk_import --rows 1000 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import db
+from app.models import VehicleColorEnum, VehicleModelEnum
+from benchmarks.seed import make_config
+
+
+def make_rows(count, seed_value=42):
+    rng = random.Random(seed_value)
+    colors = [color.value for color in VehicleColorEnum]
+    models = [model.value for model in VehicleModelEnum]
+    rows = []
+    for index in range(count):
+        sale_oportunity = rng.random() < 0.6
+        vehicles = [
+            {
+                "name": f"Vehicle {index}-{number}",
+                "color": rng.choice(colors),
+                "model": rng.choice(models),
+            }
+            for number in range(rng.randint(0, 3) if sale_oportunity else 0)
+        ]
+        rows.append(
+            {
+                "name": f"Person {index}",
+                "sale_oportunity": sale_oportunity,
+                "vehicles": vehicles,
+            }
+        )
+    return rows
+
+
+def fresh_client():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app = create_app(make_config(path))
+    with app.app_context():
+        db.create_all()
+        token = create_access_token(identity="benchmark")
+    return app.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def one_by_one(rows):
+    client, headers = fresh_client()
+    start = time.perf_counter()
+    for row in rows:
+        person = client.post(
+            "/api/people",
+            json={"name": row["name"], "sale_oportunity": row["sale_oportunity"]},
+            headers=headers,
+        ).get_json()
+        for vehicle in row["vehicles"]:
+            client.post(
+                f"/api/vehicles/person/{person['id']}", json=vehicle, headers=headers
+            )
+    return time.perf_counter() - start
+
+
+def bulk(rows):
+    client, headers = fresh_client()
+    body = "\n".join(json.dumps(row) for row in rows)
+    start = time.perf_counter()
+    response = client.post(
+        "/api/people/import",
+        data=body,
+        content_type="application/x-ndjson",
+        headers=headers,
+    )
+    elapsed = time.perf_counter() - start
+    assert response.get_json()["created"] == len(rows)
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument(
+        "--skip-one-by-one-above",
+        type=int,
+        default=10_000,
+        help="only time the per-row POSTs up to this many rows",
+    )
+    options = parser.parse_args()
+
+    print(f"{'rows':>8} {'one by one s':>13} {'bulk s':>8}")
+    for count in options.rows:
+        rows = make_rows(count)
+        single = (
+            f"{one_by_one(rows):>13.2f}"
+            if count <= options.skip_one_by_one_above
+            else f"{'-':>13}"
+        )
+        print(f"{count:>8} {single} {bulk(rows):>8.2f}")
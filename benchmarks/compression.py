@@ -0,0 +1,61 @@
+"""Bandwidth and CPU of walking the whole people listing per Accept-Encoding.
+
+Every page of ``/api/people?limit=1000`` is fetched twice in-process: the cold
+pass serializes and compresses each page, and the warm pass repeats the walk
+with the data unchanged, so the bodies come from the ETag-keyed cache. CPU is
+the process time spent per pass.
+
+Usage: python -m benchmarks.compression --persons 100000
+"""
+
+import argparse
+import json
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from benchmarks.seed import make_config, seeded_database
+
+ENCODINGS = ("identity", "gzip", "br", "zstd")
+
+
+def walk(client, headers):
+    total, after = 0, 0
+    while after is not None:
+        response = client.get(f"/api/people?limit=1000&after={after}", headers=headers)
+        total += len(response.data)
+        after = json.loads(response.headers["X-Pagination"])["next_after"]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=100_000)
+    parser.add_argument("--encodings", nargs="+", default=list(ENCODINGS))
+    options = parser.parse_args()
+
+    class BenchmarkConfig(make_config(seeded_database(options.persons))):
+        COMPRESSION_CACHE_ENTRIES = 100_000
+
+    print(f"{'encoding':>9} {'MB out':>8} {'cold CPU s':>11} {'warm CPU s':>11}")
+    for encoding in options.encodings:
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            token = create_access_token(identity="benchmark")
+        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": encoding}
+        client = app.test_client()
+
+        timings = []
+        for _ in range(2):
+            start = time.process_time()
+            size = walk(client, headers)
+            timings.append(time.process_time() - start)
+        print(
+            f"{encoding:>9} {size / 1_000_000:>8.2f} "
+            f"{timings[0]:>11.2f} {timings[1]:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Time and peak RSS of exporting people joined with their vehicles.
+
+Each mode runs in its own process so the peak RSS is not polluted by the
+previous one:
+
+- json: the naive export, every joined row fetched with ``.all()`` and
+  dumped as one JSON body
+- csv / parquet: GET /api/people/export streamed chunk by chunk
+
+Usage: python -m benchmarks.export --sizes 100000 1450000
+       python -m benchmarks.export --sizes 1450000 --chunk-size 50000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks.seed import make_config, seeded_database
+
+MODES = ("json", "csv", "parquet")
+
+
+def run_mode(mode, database_path, chunk_size):
+    from app import create_app
+    from app.export import export_query
+    from app.extensions import db
+
+    class ExportConfig(make_config(database_path)):
+        EXPORT_CHUNK_SIZE = chunk_size
+
+    app = create_app(ExportConfig)
+    client = app.test_client()
+    with app.app_context():
+        token = create_access_token(identity="benchmark")
+    headers = {"Authorization": f"Bearer {token}"}
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == "json":
+        with app.app_context():
+            rows = db.session.execute(export_query()).all()
+            body = app.json.dumps([list(row) for row in rows])
+        size, count = len(body), len(rows)
+    else:
+        response = client.get(
+            f"/api/people/export?format={mode}", headers=headers, buffered=False
+        )
+        size = 0
+        for chunk in response.response:
+            size += len(chunk)
+        response.close()
+        count = None
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "seconds": round(elapsed, 3),
+        "bytes": size,
+        "rows": count,
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "rss_growth_mb": round((peak_rss - baseline_rss) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.run:
+        result = run_mode(options.run, options.database, options.chunk_size)
+        print(json.dumps(result))
+        return
+
+    print(f"{'persons':>10} {'mode':>8} {'seconds':>9} {'MB out':>8} {'RSS +MB':>8}")
+    for persons in options.sizes:
+        database_path = seeded_database(persons)
+        for mode in options.modes:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.export",
+                    "--run",
+                    mode,
+                    "--database",
+                    database_path,
+                    "--chunk-size",
+                    str(options.chunk_size),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{persons:>10} {mode:>8} {result['seconds']:>9} "
+                f"{result['bytes'] / 2**20:>8.1f} {result['rss_growth_mb']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
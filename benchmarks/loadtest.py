@@ -0,0 +1,165 @@
+"""HTTP load test of the gunicorn deployment for several worker/pool sizes.
+
+For every combination of --workers, --threads and --pool-sizes a gunicorn
+server is started on a seeded database (SQLite by default, or --database-uri)
+and each endpoint is hit by --concurrency clients for --seconds. Reports
+requests per second and p50/p99 latency per endpoint.
+
+Usage: python -m benchmarks.loadtest --workers 1 4 --threads 1 4 --pool-sizes 2 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.seed import seeded_database
+
+ENDPOINTS = {
+    "list": "/api/people?limit=50",
+    "detail": "/api/person/{person_id}",
+    "vehicles": "/api/vehicles/person/{person_id}",
+}
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/swagger-ui", timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+
+def get_token(base_url):
+    credentials = json.dumps({"username": "loadtest", "password": "loadtest"})
+    for path in ("/api/register", "/api/login"):
+        request = urllib.request.Request(
+            base_url + path,
+            data=credentials.encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                body = json.loads(response.read())
+        except urllib.error.HTTPError:
+            continue
+    return body["access_token"]
+
+
+def hammer(url, token, concurrency, seconds):
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        while time.monotonic() < deadline:
+            request = urllib.request.Request(
+                url.format(person_id=index % 1000 + 1),
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+            except (urllib.error.URLError, ConnectionError) as e:
+                errors.append(e)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    threads = [
+        threading.Thread(target=client, args=(index,)) for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": (
+            round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 1)
+            if latencies
+            else None
+        ),
+        "errors": len(errors),
+    }
+
+
+def run(options, workers, threads, pool_size, database_uri, port):
+    env = {
+        **os.environ,
+        "DATABASE_URI": database_uri,
+        "WEB_BIND": f"127.0.0.1:{port}",
+        "WEB_WORKERS": str(workers),
+        "WEB_THREADS": str(threads),
+        "WEB_ACCESS_LOG": "/dev/null",
+        "DB_POOL_SIZE": str(pool_size),
+        "DB_MAX_OVERFLOW": "0",
+        "CACHE_BACKEND": options.cache,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(base_url)
+        token = get_token(base_url)
+        results = {}
+        for name, path in ENDPOINTS.items():
+            results[name] = hammer(
+                base_url + path, token, options.concurrency, options.seconds
+            )
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--cache", default="none", choices=["none", "memory"])
+    parser.add_argument("--database-uri")
+    parser.add_argument("--port", type=int, default=5055)
+    options = parser.parse_args()
+
+    database_uri = options.database_uri or "sqlite:///" + seeded_database(
+        options.persons
+    )
+    print(
+        f"{'workers':>7} {'threads':>7} {'pool':>4} {'endpoint':>9} "
+        f"{'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    for workers, threads, pool_size in itertools.product(
+        options.workers, options.threads, options.pool_sizes
+    ):
+        results = run(options, workers, threads, pool_size, database_uri, options.port)
+        for endpoint, result in results.items():
+            print(
+                f"{workers:>7} {threads:>7} {pool_size:>4} {endpoint:>9} "
+                f"{result['rps']:>8} {result['p50_ms']!s:>8} "
+                f"{result['p99_ms']!s:>8} {result['errors']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
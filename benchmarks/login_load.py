@@ -0,0 +1,127 @@
+"""Login throughput against CRUD tail latency, with and without the hashing pool.
+
+A threaded werkzeug server runs the app in-process. Login clients hammer
+POST /api/login while CRUD clients time GET /api/people?limit=20; the run is
+repeated for each PASSWORD_HASH_WORKERS value.
+
+Usage: python -m benchmarks.login_load --workers 0 2 --seconds 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from app.extensions import db, password_hasher
+from app.models import User
+from benchmarks.seed import make_config, seed
+
+
+def request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers=headers or {})
+    if body is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def run(workers, max_queue, seconds, login_clients, crud_clients):
+    config = make_config(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    config.PASSWORD_HASH_WORKERS = workers
+    config.PASSWORD_HASH_MAX_QUEUE = max_queue
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        seed(1000)
+        user = User(username="bench")
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity="bench")
+
+    server = make_server(
+        "127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/api"
+    deadline = time.monotonic() + seconds
+    logins, crud_latencies = [], []
+
+    def login_client():
+        while time.monotonic() < deadline:
+            logins.append(
+                request(
+                    f"{base}/login", {"username": "bench", "password": "password123"}
+                )
+            )
+
+    def crud_client():
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            request(f"{base}/people?limit=20", headers=headers)
+            crud_latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=login_client) for _ in range(login_clients)]
+    threads += [threading.Thread(target=crud_client) for _ in range(crud_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    with app.app_context():
+        password_hasher.shutdown()
+
+    crud_latencies.sort()
+    return {
+        "workers": workers,
+        "login_ok_per_s": round(logins.count(200) / seconds, 1),
+        "login_503": logins.count(503),
+        "crud_per_s": round(len(crud_latencies) / seconds, 1),
+        "crud_p50_ms": round(statistics.median(crud_latencies) * 1000, 1),
+        "crud_p99_ms": round(
+            crud_latencies[int(len(crud_latencies) * 0.99) - 1] * 1000, 1
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--max-queue", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--crud-clients", type=int, default=4)
+    options = parser.parse_args()
+
+    for workers in options.workers:
+        print(
+            json.dumps(
+                run(
+                    workers,
+                    options.max_queue,
+                    options.seconds,
+                    options.login_clients,
+                    options.crud_clients,
+                )
+            )
+        )
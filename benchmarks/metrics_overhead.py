@@ -0,0 +1,101 @@
+"""Per-request cost of the /metrics instrumentation.
+
+The same requests are replayed in-process against an app with
+``METRICS_ENABLED`` on and off (and with the slow-request SQL capture on),
+alternating runs so drift affects every mode alike. The reported time is the
+best run's mean per request. Whole requests are noisier than the
+instrumentation itself, so the cost of the hooks alone (three SQL statements
+and one serialization block per request) is timed directly as well.
+
+Usage: python -m benchmarks.metrics_overhead --requests 2000
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from flask import Response
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import metrics
+from app.metrics import _after_cursor_execute, _before_cursor_execute, timed
+from benchmarks.seed import make_config, seeded_database
+
+ENDPOINTS = {
+    "detail": "/api/person/{person_id}",
+    "vehicles": "/api/vehicles/person/{person_id}",
+    "list": "/api/people?limit=100&after={person_id}",
+}
+MODES = {
+    "off": {"METRICS_ENABLED": False},
+    "on": {"METRICS_ENABLED": True},
+    "slow log": {"METRICS_ENABLED": True, "METRICS_SLOW_REQUEST_MS": 10_000},
+}
+
+
+def make_client(database_path, settings):
+    config = type("MetricsConfig", (make_config(database_path),), dict(settings))
+    # Measure the instrumentation, not the response cache
+    config.CACHE_BACKEND = "none"
+    app = create_app(config)
+    with app.app_context():
+        token = create_access_token(identity="benchmark")
+    return app.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def run(client, headers, path, requests):
+    start = time.perf_counter()
+    for index in range(requests):
+        client.get(path.format(person_id=index % 1000 + 1), headers=headers)
+    return (time.perf_counter() - start) / requests
+
+
+def hook_cost(app, requests):
+    connection = SimpleNamespace(info={})
+    response = Response(b"{}", mimetype="application/json")
+    with app.test_request_context("/api/person/1"):
+        start = time.perf_counter()
+        for _ in range(requests):
+            metrics.start_request()
+            for _ in range(3):
+                _before_cursor_execute(connection, None, "SELECT 1", (), None, False)
+                _after_cursor_execute(connection, None, "SELECT 1", (), None, False)
+            with timed("serialization"):
+                pass
+            metrics.finish_request(response)
+        return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    options = parser.parse_args()
+
+    database_path = seeded_database(options.persons)
+    clients = {name: make_client(database_path, mode) for name, mode in MODES.items()}
+
+    print(f"{'endpoint':>9} {'mode':>9} {'us/request':>11} {'overhead us':>12}")
+    for endpoint, path in ENDPOINTS.items():
+        best = {name: float("inf") for name in MODES}
+        for _ in range(options.rounds):
+            for name, (client, headers) in clients.items():
+                best[name] = min(
+                    best[name], run(client, headers, path, options.requests)
+                )
+        for name in MODES:
+            overhead = (best[name] - best["off"]) * 1e6
+            print(
+                f"{endpoint:>9} {name:>9} {best[name] * 1e6:>11.0f} {overhead:>12.0f}"
+            )
+
+    for name in ("on", "slow log"):
+        app = clients[name][0].application
+        cost = min(hook_cost(app, options.requests * 10) for _ in range(options.rounds))
+        print(f"{'hooks':>9} {name:>9} {cost * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Latency and peak RSS of GET /api/people at several table sizes.
+
+Each mode runs in its own process so the peak RSS is not polluted by the
+previous one:
+
+- all: the old behaviour, ``Person.query.all()`` dumped in a single body
+- page: one keyset page (``?limit=100``) from the middle of the table
+- stream: the whole table as NDJSON (``Accept: application/x-ndjson``)
+
+Usage: python -m benchmarks.people_list --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks.seed import make_config, seeded_database
+
+MODES = ("all", "page", "stream")
+
+
+def run_mode(mode, database_path):
+    from app import create_app
+    from app.models import Person
+    from app.schemas import PersonSchema
+
+    app = create_app(make_config(database_path))
+    client = app.test_client()
+    with app.app_context():
+        token = create_access_token(identity="benchmark")
+        middle = Person.query.count() // 2
+    headers = {"Authorization": f"Bearer {token}"}
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == "all":
+        with app.app_context():
+            body = app.json.dumps(PersonSchema(many=True).dump(Person.query.all()))
+        size = len(body)
+    elif mode == "page":
+        response = client.get(f"/api/people?limit=100&after={middle}", headers=headers)
+        size = len(response.data)
+    else:
+        headers["Accept"] = "application/x-ndjson"
+        response = client.get("/api/people", headers=headers, buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "seconds": round(elapsed, 3),
+        "bytes": size,
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "rss_growth_mb": round((peak_rss - baseline_rss) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.run:
+        print(json.dumps(run_mode(options.run, options.database)))
+        return
+
+    print(f"{'persons':>10} {'mode':>8} {'seconds':>9} {'MB out':>8} {'RSS +MB':>8}")
+    for persons in options.sizes:
+        database_path = seeded_database(persons)
+        for mode in options.modes:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.people_list",
+                    "--run",
+                    mode,
+                    "--database",
+                    database_path,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{persons:>10} {mode:>8} {result['seconds']:>9} "
+                f"{result['bytes'] / 2**20:>8.1f} {result['rss_growth_mb']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Per-request cost of rate limiting and load shedding.
+
+The same person detail requests are replayed in-process against an app with
+neither, with load shedding only and with both, alternating runs so drift
+affects every mode alike. The reported time is the best run's mean per
+request. The limits are set high enough that no request is refused. The
+work added to each API request (the pool probe and the bucket take of the
+token's identity) is timed directly as well.
+
+Usage: python -m benchmarks.ratelimit_overhead --requests 2000
+"""
+
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import rate_limiter
+from benchmarks.seed import make_config, seeded_database
+
+MODES = {
+    "off": {"RATE_LIMIT_ENABLED": False, "LOAD_SHED_ENABLED": False},
+    "shedding": {"RATE_LIMIT_ENABLED": False, "LOAD_SHED_ENABLED": True},
+    "both": {"RATE_LIMIT_ENABLED": True, "LOAD_SHED_ENABLED": True},
+}
+
+
+def make_client(database_path, settings):
+    config = type("RateLimitConfig", (make_config(database_path),), dict(settings))
+    config.RATE_LIMITS = {"default": (1e9, 10**9)}
+    # Measure the limiter, not the response cache or the metrics hooks
+    config.CACHE_BACKEND = "none"
+    config.METRICS_ENABLED = False
+    app = create_app(config)
+    with app.app_context():
+        token = create_access_token(identity="benchmark")
+    return app.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def run(client, headers, requests):
+    start = time.perf_counter()
+    for index in range(requests):
+        response = client.get(f"/api/person/{index % 1000 + 1}", headers=headers)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / requests
+
+
+def check_cost(app, headers, requests):
+    claims = {app.config["JWT_IDENTITY_CLAIM"]: "benchmark"}
+    with app.test_request_context("/api/person/1", headers=headers):
+        start = time.perf_counter()
+        for _ in range(requests):
+            rate_limiter.check_request()
+            rate_limiter._limit_identity({}, claims)
+        return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    options = parser.parse_args()
+
+    database_path = seeded_database(options.persons)
+    clients = {name: make_client(database_path, mode) for name, mode in MODES.items()}
+
+    print(f"{'mode':>9} {'us/request':>11} {'overhead us':>12}")
+    best = {name: float("inf") for name in MODES}
+    for _ in range(options.rounds):
+        for name, (client, headers) in clients.items():
+            best[name] = min(best[name], run(client, headers, options.requests))
+    for name in MODES:
+        overhead = (best[name] - best["off"]) * 1e6
+        print(f"{name:>9} {best[name] * 1e6:>11.0f} {overhead:>12.0f}")
+
+    client, headers = clients["both"]
+    cost = min(
+        check_cost(client.application, headers, options.requests * 10)
+        for _ in range(options.rounds)
+    )
+    print(f"{'check':>9} {cost * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""One scenario per API route for benchmarks.suite.
+
+A scenario is a function of a :class:`Session`. It makes exactly one timed
+request through ``session.timed`` and may prepare its target with untimed
+``session.call`` requests first (deleting a vehicle needs one to exist).
+Writes only touch people the session created itself, so concurrent sessions
+never contend for the same rows and the seeded data stays readable.
+"""
+
+import itertools
+
+from app.models import MAX_VEHICLES_PER_PERSON
+from benchmarks.seed import FIRST_NAMES
+
+PASSWORD = "benchmark"
+_usernames = itertools.count()
+
+
+class Session:
+    """A benchmark client: a transport connection, a token and its own people"""
+
+    def __init__(self, connection, token, persons, rng, name):
+        self.connection = connection
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.persons = persons
+        self.rng = rng
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.recording = True
+        self.owned = []
+        self.vehicles = 0
+
+    def call(self, method, path, body=None, headers=None, expect=(200,)):
+        """Untimed request; raises if the status is not expected"""
+        status, data, _ = self.connection.request(
+            method, path, body, {**self.headers, **(headers or {})}
+        )
+        if status not in expect:
+            raise RuntimeError(f"{method} {path} answered {status}")
+        return data
+
+    def timed(self, method, path, body=None, headers=None, expect=(200,)):
+        """Timed request; returns whether the status was expected"""
+        status, _, elapsed = self.connection.request(
+            method, path, body, {**self.headers, **(headers or {})}
+        )
+        ok = status in expect
+        if self.recording:
+            if ok:
+                self.latencies.append(elapsed)
+            else:
+                self.errors += 1
+        return ok
+
+    def seeded_person(self):
+        return self.rng.randint(1, self.persons)
+
+    def new_person(self):
+        person = self.call(
+            "POST",
+            "/api/people",
+            {"name": f"{self.name} owned", "sale_oportunity": True},
+            expect=(201,),
+        )
+        self.owned.append(person["id"])
+        self.vehicles = 0
+        return person["id"]
+
+    def own_person(self):
+        """A person of this session with room for one more vehicle"""
+        if not self.owned or self.vehicles >= MAX_VEHICLES_PER_PERSON:
+            return self.new_person()
+        return self.owned[-1]
+
+    def new_vehicle(self):
+        person_id = self.own_person()
+        vehicle = self.call(
+            "POST",
+            f"/api/vehicles/person/{person_id}",
+            {"name": "Onix", "color": "gray", "model": "hatch"},
+            expect=(201,),
+        )
+        self.vehicles += 1
+        return vehicle["id"], person_id
+
+
+def register(session):
+    session.timed(
+        "POST",
+        "/api/register",
+        {"username": f"{session.name}-{next(_usernames)}", "password": PASSWORD},
+        expect=(201,),
+    )
+
+
+def login(session):
+    session.timed("POST", "/api/login", {"username": "benchmark", "password": PASSWORD})
+
+
+def logout(session):
+    token = session.call(
+        "POST", "/api/login", {"username": "benchmark", "password": PASSWORD}
+    )["access_token"]
+    session.timed(
+        "POST",
+        "/api/logout",
+        headers={"Authorization": f"Bearer {token}"},
+        expect=(204,),
+    )
+
+
+def people_list(session):
+    session.timed("GET", f"/api/people?limit=50&after={session.seeded_person()}")
+
+
+def people_search(session):
+    name = session.rng.choice(FIRST_NAMES)
+    session.timed("GET", f"/api/people?limit=50&name={name}")
+
+
+def person_detail(session):
+    session.timed("GET", f"/api/person/{session.seeded_person()}")
+
+
+def person_batch(session, size=100):
+    ids = [session.seeded_person() for _ in range(size)]
+    session.timed("POST", "/api/person/batch", {"ids": ids})
+
+
+def vehicle_batch(session, size=100):
+    # Seeded vehicle ids run to about 0.7 per person; some may be missing
+    ids = [session.seeded_person() for _ in range(size)]
+    session.timed("POST", "/api/vehicle/batch", {"ids": ids})
+
+
+def person_vehicles(session):
+    session.timed("GET", f"/api/vehicles/person/{session.seeded_person()}")
+
+
+def vehicle_detail(session):
+    if not session.owned:
+        session.new_vehicle()
+    person_id = session.owned[0]
+    vehicles = session.call("GET", f"/api/vehicles/person/{person_id}")
+    vehicle_id = session.rng.choice(vehicles)["id"]
+    session.timed("GET", f"/api/vehicle/{vehicle_id}/person/{person_id}")
+
+
+def fleet_stats(session):
+    session.timed("GET", "/api/stats")
+
+
+def change_feed(session):
+    session.timed("GET", "/api/events?limit=100")
+
+
+def create_person(session):
+    session.timed(
+        "POST",
+        "/api/people",
+        {"name": f"{session.name} created", "sale_oportunity": True},
+        expect=(201,),
+    )
+
+
+def update_person(session):
+    person_id = session.owned[0] if session.owned else session.new_person()
+    session.timed(
+        "PATCH",
+        f"/api/person/{person_id}",
+        {"sale_oportunity": session.rng.random() < 0.5},
+    )
+
+
+def add_vehicle(session):
+    person_id = session.own_person()
+    if session.timed(
+        "POST",
+        f"/api/vehicles/person/{person_id}",
+        {"name": "Corolla", "color": "blue", "model": "sedan"},
+        expect=(201,),
+    ):
+        session.vehicles += 1
+
+
+def delete_vehicle(session):
+    vehicle_id, person_id = session.new_vehicle()
+    if session.timed(
+        "DELETE", f"/api/vehicle/{vehicle_id}/person/{person_id}", expect=(204,)
+    ):
+        session.vehicles -= 1
+
+
+def delete_person(session):
+    person_id = session.call(
+        "POST", "/api/people", {"name": f"{session.name} doomed"}, expect=(201,)
+    )["id"]
+    session.timed("DELETE", f"/api/person/{person_id}", expect=(204,))
+
+
+def import_people(session, rows=10):
+    session.timed("POST", "/api/people/import", _import_rows(session, rows))
+
+
+def purge_people(session, rows=10):
+    report = session.call("POST", "/api/people/import", _import_rows(session, rows))
+    ids = [result["id"] for result in report["results"]]
+    session.timed("POST", "/api/people/purge", {"ids": ids})
+
+
+def _import_rows(session, count):
+    return [
+        {
+            "name": f"{session.name} imported",
+            "sale_oportunity": True,
+            "vehicles": [{"name": "Polo", "color": "gray", "model": "hatch"}],
+        }
+        for _ in range(count)
+    ]
+
+
+SCENARIOS = {
+    "register": register,
+    "login": login,
+    "logout": logout,
+    "people_list": people_list,
+    "people_search": people_search,
+    "person_detail": person_detail,
+    "person_batch": person_batch,
+    "person_vehicles": person_vehicles,
+    "vehicle_detail": vehicle_detail,
+    "vehicle_batch": vehicle_batch,
+    "stats": fleet_stats,
+    "events": change_feed,
+    "create_person": create_person,
+    "update_person": update_person,
+    "add_vehicle": add_vehicle,
+    "delete_vehicle": delete_vehicle,
+    "delete_person": delete_person,
+    "import_people": import_people,
+    "purge_people": purge_people,
+}
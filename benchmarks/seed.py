@@ -0,0 +1,151 @@
+"""Deterministic data seeder for the benchmarks.
+
+People get names drawn from common first and last names, 60% are sale
+opportunities, and only those own vehicles: 0-3 each, mostly one, with
+colors and models skewed the way a real fleet is (gray and blue hatches and
+sedans far more often than yellow convertibles). The fleet statistics
+counters are filled in to match.
+
+Usage: python -m benchmarks.seed --persons 100000 --database /tmp/bench.db
+       python -m benchmarks.seed --persons 100000 \\
+           --database-uri postgresql://localhost/car_management_bench
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import func, insert, select, text
+
+from app import create_app, stats
+from app.config import Config
+from app.extensions import db
+from app.models import FleetStat, Person, Vehicle
+
+CHUNK_SIZE = 10_000
+# Bump when the generated data changes, so stale cached databases are not reused
+SEED_VERSION = 2
+FIRST_NAMES = (
+    "Ana Bruno Carla Daniel Eduarda Felipe Gabriela Hugo Isabela João Julia "
+    "Lucas Maria Mateus Natália Pedro Rafael Sofia Thiago Vitória"
+).split()
+LAST_NAMES = (
+    "Almeida Barbosa Carvalho Costa Ferreira Gomes Lima Martins Oliveira "
+    "Pereira Ribeiro Rodrigues Santos Silva Souza"
+).split()
+VEHICLE_COUNT_WEIGHTS = {0: 25, 1: 45, 2: 20, 3: 10}
+COLOR_WEIGHTS = {"gray": 45, "blue": 35, "yellow": 20}
+MODEL_WEIGHTS = {"hatch": 50, "sedan": 40, "convertible": 10}
+VEHICLE_NAMES = {
+    "hatch": ("Gol", "Onix", "HB20", "Polo"),
+    "sedan": ("Corolla", "Civic", "Virtus", "Cruze"),
+    "convertible": ("Mini Cabrio", "MX-5", "Beetle Cabriolet"),
+}
+
+
+def make_uri_config(database_uri):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        # Every benchmark client shares one user; measure the app, not the limiter
+        RATE_LIMIT_ENABLED = False
+
+    return BenchmarkConfig
+
+
+def make_config(database_path):
+    return make_uri_config("sqlite:///" + database_path)
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def seed(persons, seed_value=42):
+    """Insert `persons` people with 0-3 vehicles each into the bound database"""
+    rng = random.Random(seed_value)
+    person_id = db.session.scalar(select(func.max(Person.id))) or 0
+    for start in range(0, persons, CHUNK_SIZE):
+        people, vehicles = [], []
+        for _ in range(min(CHUNK_SIZE, persons - start)):
+            person_id += 1
+            sale_oportunity = rng.random() < 0.6
+            vehicle_count = (
+                _weighted(rng, VEHICLE_COUNT_WEIGHTS) if sale_oportunity else 0
+            )
+            people.append(
+                {
+                    "id": person_id,
+                    "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "sale_oportunity": sale_oportunity,
+                    "vehicle_count": vehicle_count,
+                }
+            )
+            for _ in range(vehicle_count):
+                model = _weighted(rng, MODEL_WEIGHTS)
+                vehicles.append(
+                    {
+                        "name": rng.choice(VEHICLE_NAMES[model]),
+                        "color": _weighted(rng, COLOR_WEIGHTS),
+                        "model": model,
+                        "person_id": person_id,
+                    }
+                )
+        db.session.execute(insert(Person), people)
+        if vehicles:
+            db.session.execute(insert(Vehicle), vehicles)
+        db.session.commit()
+
+    if db.engine.dialect.name == "postgresql":
+        # Explicit ids do not advance the sequence that POST /api/people uses
+        db.session.execute(
+            text("SELECT setval(pg_get_serial_sequence('persons', 'id'), :id)"),
+            {"id": person_id},
+        )
+    db.session.execute(db.delete(FleetStat))
+    counters = stats.compute_counters()
+    db.session.execute(
+        insert(FleetStat),
+        [
+            {"key": key, "shard": 0, "value": value}
+            for key, value in sorted(counters.items())
+            if value
+        ],
+    )
+    db.session.commit()
+
+
+def seed_uri(database_uri, persons):
+    """Create the tables behind database_uri and seed them unless people exist"""
+    app = create_app(make_uri_config(database_uri))
+    with app.app_context():
+        db.create_all()
+        if db.session.scalar(select(func.count()).select_from(Person)) == 0:
+            seed(persons)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def seeded_database(persons, directory=None):
+    """Return the path of a database seeded with `persons`, creating it once
+
+    Tables added to the models since the file was seeded are created on reuse.
+    """
+    directory = directory or tempfile.gettempdir()
+    path = os.path.join(directory, f"car-management-bench-v{SEED_VERSION}-{persons}.db")
+    seed_uri("sqlite:///" + path, persons)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=10_000)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--database")
+    target.add_argument("--database-uri")
+    options = parser.parse_args()
+
+    seed_uri(
+        options.database_uri or "sqlite:///" + os.path.abspath(options.database),
+        options.persons,
+    )
@@ -0,0 +1,55 @@
+"""Time to dump and encode a people list: marshmallow + Flask JSON vs the fast path.
+
+Both sides serialize the same loaded rows (vehicles eager-loaded) to the bytes
+of a JSON response; the fast path is ``dump_people`` + ``json_body``.
+
+Usage: python -m benchmarks.serialization --persons 10000 --repeat 5
+"""
+
+import argparse
+import time
+
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from app.models import Person
+from app.schemas import PersonSchema
+from app.serializers import dump_people, json_body
+from benchmarks.seed import make_config, seeded_database
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    app = create_app(make_config(seeded_database(options.persons)))
+    with app.app_context():
+        people = Person.query.options(selectinload(Person.vehicles)).all()
+        schema = PersonSchema(many=True)
+        baseline, expected = best_of(
+            options.repeat, lambda: app.json.response(schema.dump(people)).get_data()
+        )
+        fast, body = best_of(options.repeat, lambda: json_body(dump_people(people)))
+
+    assert body == expected, "fast path output differs"
+    print(f"{'path':>12} {'ms':>9}")
+    print(f"{'marshmallow':>12} {baseline * 1000:>9.1f}")
+    print(f"{'fast':>12} {fast * 1000:>9.1f}")
+    print(
+        f"speed-up: {baseline / fast:.1f}x for {len(people)} people, {len(body)} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Cold start cost of a worker: importing the app package and calling create_app.
+
+Each sample runs in a fresh interpreter so nothing is cached in-process. The
+``create_all`` line adds a ``db.create_all()`` call after ``create_app`` to
+show what boot cost before the schema moved to migrations.
+
+Usage: python -m benchmarks.startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+from app.extensions import db
+from benchmarks.seed import make_config
+imported = time.perf_counter()
+app = create_app(make_config(sys.argv[1]))
+created = time.perf_counter()
+if sys.argv[2] == "1":
+    with app.app_context():
+        db.create_all()
+done = time.perf_counter()
+print(json.dumps([imported - start, created - imported, done - start]))
+"""
+
+
+def sample(database_path, create_all):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, database_path, "1" if create_all else "0"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    options = parser.parse_args()
+
+    database_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"{'mode':>10} {'import ms':>10} {'create ms':>10} {'total ms':>10}")
+    for create_all in (False, True):
+        runs = [sample(database_path, create_all) for _ in range(options.runs)]
+        medians = [statistics.median(run[i] for run in runs) * 1000 for i in range(3)]
+        mode = "create_all" if create_all else "migrations"
+        print(f"{mode:>10} " + " ".join(f"{value:10.1f}" for value in medians))
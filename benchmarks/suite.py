@@ -0,0 +1,265 @@
+"""Scenario benchmark of every API route with a JSON report and regression check.
+
+Each scenario in benchmarks.scenarios is run by --concurrency client threads
+for --seconds, after --warmup seconds whose requests are not counted. Clients
+either call the app in-process through Flask's test client or talk HTTP to a
+running server (--url, e.g. gunicorn). In-process runs use a copy of a
+database seeded by benchmarks.seed (SQLite by default, or --database-uri,
+e.g. a local PostgreSQL), so repeated runs start from the same data. For
+--url, seed the server's database with the same --persons first.
+
+The report holds requests per second and p50/p95/p99 latency per scenario.
+With --baseline, each scenario is compared with a stored report. It counts
+as a regression when its rps drops, or its p95 grows, by more than
+--threshold; the exit status is then 1.
+
+Usage: python -m benchmarks.suite --output benchmarks/baseline.json
+       python -m benchmarks.suite --baseline benchmarks/baseline.json
+       python -m benchmarks.suite --url http://127.0.0.1:5000 --scenarios login
+"""
+
+import argparse
+import atexit
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from functools import partial
+from urllib.parse import urlsplit
+
+from app import create_app
+from benchmarks.scenarios import PASSWORD, SCENARIOS, Session
+from benchmarks.seed import make_uri_config, seed_uri, seeded_database
+
+
+class InProcessConnection:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body, headers):
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        data = response.get_data()
+        return response.status_code, data, time.perf_counter() - start
+
+
+class HttpConnection:
+    """Keep-alive HTTP/1.1 connection, reopened after a failure"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body, headers):
+        payload = None if body is None else json.dumps(body).encode()
+        if payload is not None:
+            headers = {**headers, "Content-Type": "application/json"}
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=30
+                )
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            return 0, b"", time.perf_counter() - start
+        return response.status, data, time.perf_counter() - start
+
+
+class JsonSession(Session):
+    def call(self, *args, **kwargs):
+        data = super().call(*args, **kwargs)
+        return json.loads(data) if data else None
+
+
+def in_process_target(options):
+    if options.database_uri:
+        database_uri = options.database_uri
+        seed_uri(database_uri, options.persons)
+    else:
+        # Writes go to a throwaway copy so the seeded database stays pristine
+        directory = tempfile.mkdtemp(prefix="car-management-suite-")
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "suite.db")
+        shutil.copy(seeded_database(options.persons), path)
+        database_uri = "sqlite:///" + path
+
+    class SuiteConfig(make_uri_config(database_uri)):
+        CACHE_BACKEND = options.cache
+
+    app = create_app(SuiteConfig)
+    return database_uri, lambda: InProcessConnection(app)
+
+
+def get_token(connection):
+    credentials = {"username": "benchmark", "password": PASSWORD}
+    connection.request("POST", "/api/register", credentials, {})
+    status, data, _ = connection.request("POST", "/api/login", credentials, {})
+    if status != 200:
+        raise RuntimeError(f"login failed with status {status}")
+    return json.loads(data)["access_token"]
+
+
+def percentile(latencies, fraction):
+    """Nearest-rank percentile of sorted latencies, in milliseconds"""
+    if not latencies:
+        return None
+    index = max(math.ceil(len(latencies) * fraction) - 1, 0)
+    return round(latencies[index] * 1000, 2)
+
+
+def run_scenario(name, connect, token, options):
+    sessions = [
+        JsonSession(
+            connect(),
+            token,
+            options.persons,
+            random.Random(f"{options.seed}-{name}-{index}"),
+            f"suite-{name}-{index}",
+        )
+        for index in range(options.concurrency)
+    ]
+    scenario = SCENARIOS[name]
+    start = time.monotonic()
+    measure_from = start + options.warmup
+    deadline = measure_from + options.seconds
+
+    def worker(session):
+        session.recording = False
+        while time.monotonic() < deadline:
+            session.recording = time.monotonic() >= measure_from
+            try:
+                scenario(session)
+            except RuntimeError as e:
+                # An untimed setup request failed; this client cannot go on
+                session.errors += 1
+                print(f"{name}: {e}", file=sys.stderr)
+                return
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(latency for s in sessions for latency in s.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(s.errors for s in sessions),
+        "rps": round(len(latencies) / options.seconds, 1),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Rows of (scenario, metric, baseline, current, change, regressed)"""
+    rows = []
+    for name, current in report["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        for metric, worse in (("rps", -1), ("p95_ms", 1)):
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = after / before - 1
+            rows.append(
+                (name, metric, before, after, change, change * worse > threshold)
+            )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--database-uri", help="in-process database (seeded if empty)")
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--warmup", type=float, default=0.5)
+    parser.add_argument("--cache", default="memory", choices=["memory", "none"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    options = parser.parse_args()
+
+    if options.url:
+        target, connect = options.url, partial(HttpConnection, options.url)
+    else:
+        database_uri, connect = in_process_target(options)
+        target = f"in-process {database_uri}"
+    token = get_token(connect())
+
+    report = {
+        "meta": {
+            "target": target,
+            "persons": options.persons,
+            "concurrency": options.concurrency,
+            "seconds": options.seconds,
+            "cache": None if options.url else options.cache,
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": {},
+    }
+    print(
+        f"{'scenario':>16} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>6}"
+    )
+    for name in options.scenarios:
+        result = report["scenarios"][name] = run_scenario(name, connect, token, options)
+        print(
+            f"{name:>16} {result['rps']:>9} {result['p50_ms']!s:>8} "
+            f"{result['p95_ms']!s:>8} {result['p99_ms']!s:>8} {result['errors']:>6}"
+        )
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        for key in ("target", "persons", "concurrency", "seconds", "cache"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                print(f"warning: baseline {key} differs: {baseline['meta'].get(key)}")
+        rows = compare(report, baseline, options.threshold)
+        print(
+            f"\n{'scenario':>16} {'metric':>7} {'baseline':>9} "
+            f"{'current':>9} {'change':>8}"
+        )
+        for name, metric, before, after, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(
+                f"{name:>16} {metric:>7} {before:>9} {after:>9} {change:>+8.1%}{flag}"
+            )
+        if any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Latency of the vehicle search on a fleet of about a million vehicles.
+
+Each search runs --repeat times, from the first page and from a cursor in the
+middle of the table. Two latencies are reported: the query alone (the
+filtered, id-ordered keyset page) and the whole GET /api/vehicles request.
+The query plan is printed so the index choice can be checked. The default
+--persons seeds about 1M vehicles.
+
+Usage: python -m benchmarks.vehicle_search --persons 1450000
+       python -m benchmarks.vehicle_search --database-uri postgresql://...
+"""
+
+import argparse
+import statistics
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select, text
+
+from app import create_app
+from app.extensions import db
+from app.models import Vehicle
+from app.routes import filter_vehicles
+from benchmarks.seed import make_uri_config, seed_uri, seeded_database
+
+SEARCHES = {
+    "blue convertibles": {"color": "blue", "model": "convertible"},
+    "yellow convertibles": {"color": "yellow", "model": "convertible"},
+    "gray": {"color": "gray"},
+    "sedans": {"model": "sedan"},
+    "name 'civic'": {"name": "civic"},
+    "name 'tesla' (none)": {"name": "tesla"},
+    "blue hatch 'polo'": {"color": "blue", "model": "hatch", "name": "polo"},
+    "for sale, blue": {"color": "blue", "sale_oportunity": True},
+}
+
+
+def explain(args):
+    query = filter_vehicles(select(Vehicle.id), args).limit(101)
+    compiled = query.compile(db.engine, compile_kwargs={"literal_binds": True})
+    if db.engine.dialect.name == "sqlite":
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return "; ".join(row[-1] for row in rows)
+    rows = db.session.execute(text(f"EXPLAIN {compiled}")).all()
+    return "; ".join(row[0].strip() for row in rows)
+
+
+def timings(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=1_450_000)
+    parser.add_argument("--database-uri")
+    parser.add_argument("--repeat", type=int, default=50)
+    options = parser.parse_args()
+
+    if options.database_uri:
+        database_uri = options.database_uri
+        seed_uri(database_uri, options.persons)
+    else:
+        database_uri = "sqlite:///" + seeded_database(options.persons)
+
+    app = create_app(make_uri_config(database_uri))
+    client = app.test_client()
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='b')}"}
+        vehicles = db.session.scalar(select(func.count()).select_from(Vehicle))
+        middle = db.session.scalar(select(func.max(Vehicle.id))) // 2
+        print(f"{vehicles} vehicles, page size 100\n")
+        print(
+            f"{'search':>20} {'cursor':>6} {'query p50':>9} {'p95':>7} "
+            f"{'request p50':>11} {'p95':>7}"
+        )
+        plans = {}
+        for name, args in SEARCHES.items():
+            plans[name] = explain(args)
+            for cursor, after in (("first", None), ("middle", middle)):
+                page_args = {**args, "after": after} if after else args
+                query_p50, query_p95 = timings(
+                    lambda: filter_vehicles(Vehicle.query, page_args).limit(101).all(),
+                    options.repeat,
+                )
+                url = "/api/vehicles?" + "&".join(
+                    f"{key}={str(value).lower()}" for key, value in page_args.items()
+                )
+                request_p50, request_p95 = timings(
+                    lambda: client.get(url, headers=headers), options.repeat
+                )
+                print(
+                    f"{name:>20} {cursor:>6} {query_p50:>9.2f} {query_p95:>7.2f} "
+                    f"{request_p50:>11.2f} {request_p95:>7.2f}"
+                )
+                db.session.remove()
+        print()
+        for name, plan in plans.items():
+            print(f"{name}: {plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""gunicorn settings, overridable through the environment.
+
+WEB_WORKERS processes each run WEB_THREADS threads; size the database pool
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) to at least WEB_THREADS so a request never
+waits for a connection.
+"""
+
+import os
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+threads = int(os.getenv("WEB_THREADS", 4))
+# Tell the app (app.config.Config) how many processes and threads serve it
+os.environ["WEB_WORKERS"] = str(workers)
+os.environ["WEB_THREADS"] = str(threads)
+worker_class = "gthread" if threads > 1 else "sync"
+# Open (keep-alive) connections a gthread worker holds before it stops accepting
+worker_connections = int(os.getenv("WEB_WORKER_CONNECTIONS", 1000))
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+keepalive = int(os.getenv("WEB_KEEPALIVE", 5))
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 0))
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")
+# Import the app once in the master so workers fork with it already loaded
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Drop the master's connections and expose the worker's request queue"""
+    from app.extensions import db
+
+    flask_app = worker.app.wsgi()
+    with flask_app.app_context():
+        engines = [*db.engines.values(), *flask_app.extensions["replicas"].engines]
+        for engine in engines:
+            # Without closing them: they belong to the master
+            engine.dispose(close=False)
+    # gthread workers queue accepted requests until a thread is free; let load
+    # shedding count those too (see app.ratelimit)
+    futures = getattr(worker, "futures", None)
+    if futures is not None:
+        flask_app.extensions["ratelimit"].queue_depth = lambda: len(futures)
@@ -0,0 +1,35 @@
+"""outbox events
+
+Revision ID: 041984e596d3
+Revises: 4a5fa3470ce2
+Create Date: 2026-10-18 14:42:55.969919
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "041984e596d3"
+down_revision = "4a5fa3470ce2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("type", sa.String(length=32), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_outbox_events_created_at", "outbox_events", ["created_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_outbox_events_created_at", table_name="outbox_events")
+    op.drop_table("outbox_events")
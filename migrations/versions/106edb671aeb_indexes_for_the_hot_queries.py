@@ -0,0 +1,49 @@
+"""indexes for the hot queries
+
+Revision ID: 106edb671aeb
+Revises: d8e2f4a6b913
+Create Date: 2026-10-18 13:57:05.270916
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "106edb671aeb"
+down_revision = "d8e2f4a6b913"
+branch_labels = None
+depends_on = None
+
+SALE_OPORTUNITY = sa.column("sale_oportunity", sa.Boolean).is_(True)
+
+
+def upgrade():
+    op.create_index(
+        "ix_user_username_lower",
+        "user",
+        [sa.text("lower(username)")],
+        unique=True,
+    )
+    op.create_index(
+        "ix_persons_name_prefix",
+        "persons",
+        ["name"],
+        postgresql_ops={"name": "varchar_pattern_ops"},
+    )
+    op.create_index(
+        "ix_persons_sale_oportunity",
+        "persons",
+        ["id"],
+        postgresql_where=SALE_OPORTUNITY,
+        sqlite_where=SALE_OPORTUNITY,
+    )
+    op.create_index("ix_vehicles_person_id_id", "vehicles", ["person_id", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_vehicles_person_id_id", table_name="vehicles")
+    op.drop_index("ix_persons_sale_oportunity", table_name="persons")
+    op.drop_index("ix_persons_name_prefix", table_name="persons")
+    op.drop_index("ix_user_username_lower", table_name="user")
@@ -0,0 +1,25 @@
+"""vehicle search indexes
+
+Revision ID: 4a5fa3470ce2
+Revises: 652df5e549f7
+Create Date: 2026-10-18 14:29:02.546760
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4a5fa3470ce2"
+down_revision = "652df5e549f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_vehicles_color_model_id", "vehicles", ["color", "model", "id"])
+    op.create_index("ix_vehicles_color_id", "vehicles", ["color", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_vehicles_color_id", table_name="vehicles")
+    op.drop_index("ix_vehicles_color_model_id", table_name="vehicles")
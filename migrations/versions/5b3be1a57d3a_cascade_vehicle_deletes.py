@@ -0,0 +1,41 @@
+"""cascade vehicle deletes
+
+Revision ID: 5b3be1a57d3a
+Revises: 106edb671aeb
+Create Date: 2026-10-18 14:10:12.412870
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b3be1a57d3a"
+down_revision = "106edb671aeb"
+branch_labels = None
+depends_on = None
+
+# The initial foreign key was created unnamed. This matches the name PostgreSQL
+# gave it and lets batch mode name the reflected constraint on SQLite
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def replace_person_fk(ondelete):
+    with op.batch_alter_table(
+        "vehicles", naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint("vehicles_person_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key(
+            "vehicles_person_id_fkey",
+            "persons",
+            ["person_id"],
+            ["id"],
+            ondelete=ondelete,
+        )
+
+
+def upgrade():
+    replace_person_fk("CASCADE")
+
+
+def downgrade():
+    replace_person_fk(None)
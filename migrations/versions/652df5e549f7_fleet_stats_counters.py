@@ -0,0 +1,67 @@
+"""fleet stats counters
+
+Revision ID: 652df5e549f7
+Revises: 5b3be1a57d3a
+Create Date: 2026-10-18 14:01:33.219455
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "652df5e549f7"
+down_revision = "5b3be1a57d3a"
+branch_labels = None
+depends_on = None
+
+persons = sa.table(
+    "persons", sa.column("vehicle_count"), sa.column("sale_oportunity", sa.Boolean)
+)
+vehicles = sa.table(
+    "vehicles", sa.column("color"), sa.column("model"), sa.column("person_id")
+)
+fleet_stats = sa.table(
+    "fleet_stats", sa.column("key"), sa.column("shard"), sa.column("value")
+)
+
+
+def counter(key, *parts):
+    """SELECT producing the key, shard 0 and a row count for a counter"""
+    for part in parts:
+        key = key + sa.cast(part, sa.String)
+    return sa.select(key, sa.literal(0), sa.func.count())
+
+
+def upgrade():
+    op.create_table(
+        "fleet_stats",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("shard", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("key", "shard"),
+    )
+    # Start the counters from the existing rows, like `flask stats check --fix`
+    backfill = [
+        counter(sa.literal("persons:total")).select_from(persons),
+        counter(sa.literal("persons:sale_oportunity"))
+        .select_from(persons)
+        .where(persons.c.sale_oportunity.is_(True)),
+        counter(sa.literal("persons:vehicles:"), persons.c.vehicle_count).group_by(
+            persons.c.vehicle_count
+        ),
+        counter(
+            sa.literal("vehicles:"),
+            vehicles.c.color,
+            sa.literal(":"),
+            vehicles.c.model,
+        )
+        .where(vehicles.c.person_id.is_not(None))
+        .group_by(vehicles.c.color, vehicles.c.model),
+    ]
+    for select in backfill:
+        op.execute(fleet_stats.insert().from_select(["key", "shard", "value"], select))
+
+
+def downgrade():
+    op.drop_table("fleet_stats")
@@ -0,0 +1,32 @@
+"""persons vehicle count
+
+Revision ID: b7c41e9d2f10
+Revises: a1e2c7af85ea
+Create Date: 2026-10-18 13:55:10.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b7c41e9d2f10"
+down_revision = "a1e2c7af85ea"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "persons",
+        sa.Column("vehicle_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    # Count the vehicles people already own, so the 3-vehicle limit holds
+    op.execute(
+        "UPDATE persons SET vehicle_count = "
+        "(SELECT count(*) FROM vehicles WHERE vehicles.person_id = persons.id)"
+    )
+
+
+def downgrade():
+    op.drop_column("persons", "vehicle_count")
@@ -0,0 +1,27 @@
+"""persons version
+
+Revision ID: c3d9a5e8f721
+Revises: b7c41e9d2f10
+Create Date: 2026-10-18 13:55:20.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c3d9a5e8f721"
+down_revision = "b7c41e9d2f10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "persons",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column("persons", "version")
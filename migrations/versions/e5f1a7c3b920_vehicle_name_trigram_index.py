@@ -0,0 +1,35 @@
+"""vehicle name trigram index
+
+Revision ID: e5f1a7c3b920
+Revises: 041984e596d3
+Create Date: 2026-10-18 17:05:41.113502
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5f1a7c3b920"
+down_revision = "041984e596d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Other databases scan for the name substring search
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_vehicles_name_trgm",
+        "vehicles",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_vehicles_name_trgm", table_name="vehicles")
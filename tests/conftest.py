@@ -1,4 +1,8 @@
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
+
 from app.extensions import db
 from app import create_app
 from app.config import TestConfig
@@ -43,3 +47,23 @@ def get_jwt_token(test_client):
         return response.get_json()["access_token"]
 
     return _get_jwt_token
+
+
+@pytest.fixture
+def count_queries(test_app):
+    """Collect the SQL statements executed inside a ``with`` block"""
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    return _count_queries
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+
+from app.asgi import create_asgi_app  # noqa: E402
+from app.config import TestConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def asgi_call(test_app):
+    """Call the async app on one event loop, returning (status, headers, body)"""
+    loop = asyncio.new_event_loop()
+    app = create_asgi_app(TestConfig)
+
+    def call(url, headers=None):
+        path, _, query = url.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        loop.run_until_complete(app(scope, receive, send))
+        start, body = messages[0], b"".join(m.get("body", b"") for m in messages[1:])
+        headers = {k.decode(): v.decode() for k, v in start["headers"]}
+        return start["status"], headers, json.loads(body) if body else None
+
+    yield call
+    loop.run_until_complete(app.state.engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def seeded(test_client):
+    test_client.post("/api/register", json={"username": "async", "password": "pw"})
+    token = test_client.post(
+        "/api/login", json={"username": "async", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for index in range(3):
+        person_id = test_client.post(
+            "/api/people",
+            json={"name": f"Async {index}", "sale_oportunity": True},
+            headers=headers,
+        ).get_json()["id"]
+        test_client.post(
+            f"/api/vehicles/person/{person_id}",
+            json={"name": "Golf", "color": "blue", "model": "hatch"},
+            headers=headers,
+        )
+    return headers
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/people",
+        "/api/people?limit=2",
+        "/api/people?limit=2&after=2",
+        "/api/people?name=Async%201",
+        "/api/person/2",
+        "/api/person/999",
+        "/api/vehicles/person/1",
+        "/api/vehicles?color=blue&limit=2",
+        "/api/vehicles?name=golf&sale_oportunity=true&after=1",
+        "/api/vehicles?model=boat",
+        "/api/vehicle/1/person/1",
+        "/api/vehicle/1/person/2",
+        "/api/stats",
+    ],
+)
+def test_async_app_matches_sync_app(test_client, asgi_call, seeded, url):
+    expected = test_client.get(url, headers=seeded)
+    status, headers, body = asgi_call(url, seeded)
+    assert status == expected.status_code
+    assert body == expected.get_json()
+    for header in ("ETag", "X-Pagination"):
+        assert headers.get(header.lower()) == expected.headers.get(header)
+
+
+def test_async_app_conditional_get(asgi_call, seeded):
+    _, headers, _ = asgi_call("/api/person/1", seeded)
+    status, _, body = asgi_call(
+        "/api/person/1", {**seeded, "If-None-Match": headers["etag"]}
+    )
+    assert status == 304
+    assert body is None
+
+
+def test_async_app_rejects_bad_requests(asgi_call, seeded):
+    assert asgi_call("/api/people")[0] == 401
+    assert asgi_call("/api/people", {"Authorization": "Bearer nope"})[0] == 422
+    status, _, body = asgi_call("/api/people?limit=0", seeded)
+    assert status == 422
+    assert "limit" in body["errors"]["query"]
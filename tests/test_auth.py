@@ -1,3 +1,11 @@
+import time
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db, password_hasher, revoked_tokens
+
+
 def test_register_user(test_client, register_user):
     response = register_user("john", "password123")
     assert response.status_code == 201
@@ -17,8 +25,141 @@ def test_login_user(test_client, register_user):
     assert "access_token" in response.get_json()
 
 
+def test_usernames_are_case_insensitive(test_client, register_user):
+    register_user("Mary", "password123")
+    assert register_user("mary", "password123").status_code == 409
+
+    response = test_client.post(
+        "/api/login", json={"username": "MARY", "password": "password123"}
+    )
+    assert response.status_code == 200
+
+
 def test_login_invalid_user(test_client):
     response = test_client.post(
         "/api/login", json={"username": "invalid", "password": "invalid"}
     )
     assert response.status_code == 401
+
+
+def test_login_without_username(test_client):
+    response = test_client.post("/api/login", json={"password": "invalid"})
+    assert response.status_code == 401
+
+
+def test_login_rehashes_password_when_parameters_change(
+    test_app, test_client, register_user
+):
+    from app.models import User
+
+    register_user("rehash", "password123")
+    old_hash = User.query.filter_by(username="rehash").first().password_hash
+    assert old_hash.startswith("pbkdf2:sha256:1000$")
+
+    test_app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    password_hasher.init_app(test_app)
+    try:
+        response = test_client.post(
+            "/api/login", json={"username": "rehash", "password": "password123"}
+        )
+        assert response.status_code == 200
+        db.session.expire_all()
+        new_hash = User.query.filter_by(username="rehash").first().password_hash
+        assert new_hash.startswith("pbkdf2:sha256:2000$")
+
+        response = test_client.post(
+            "/api/login", json={"username": "rehash", "password": "password123"}
+        )
+        assert response.status_code == 200
+    finally:
+        test_app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+        password_hasher.init_app(test_app)
+
+
+def test_login_on_hashing_pool(test_app, test_client, register_user):
+    register_user("pooled", "password123")
+    test_app.config["PASSWORD_HASH_WORKERS"] = 1
+    test_app.config["PASSWORD_HASH_MAX_QUEUE"] = 0
+    password_hasher.init_app(test_app)
+    try:
+        response = test_client.post(
+            "/api/login", json={"username": "pooled", "password": "password123"}
+        )
+        assert response.status_code == 200
+
+        # Every slot is taken: shed the login instead of queueing it
+        slots = test_app.extensions["password_hasher"].slots
+        slots.acquire()
+        response = test_client.post(
+            "/api/login", json={"username": "pooled", "password": "password123"}
+        )
+        slots.release()
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        password_hasher.shutdown()
+        test_app.config["PASSWORD_HASH_WORKERS"] = 0
+        password_hasher.init_app(test_app)
+
+
+def test_logout_revokes_token(test_client, get_jwt_token):
+    token = get_jwt_token("leaving", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get("/api/people", headers=headers).status_code == 200
+
+    response = test_client.post("/api/logout", headers=headers)
+    assert response.status_code == 204
+    assert test_client.get("/api/people", headers=headers).status_code == 401
+
+    # Another token of the same user is still valid
+    other = get_jwt_token("leaving", "password123")
+    response = test_client.get(
+        "/api/people", headers={"Authorization": f"Bearer {other}"}
+    )
+    assert response.status_code == 200
+
+
+def test_revocations_are_synced_from_database(test_app, test_client, get_jwt_token):
+    token = get_jwt_token("synced", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+    test_client.post("/api/logout", headers=headers)
+
+    # A process that has not seen the logout picks it up from the table
+    test_app.extensions["revoked_tokens"].revoked.clear()
+    assert test_client.get("/api/people", headers=headers).status_code == 200
+    revoked_tokens.sync()
+    assert test_client.get("/api/people", headers=headers).status_code == 401
+
+
+def test_verified_tokens_are_cached(test_app, test_client, get_jwt_token, monkeypatch):
+    from flask_jwt_extended import jwt_manager
+
+    calls = []
+    decode = jwt_manager._decode_jwt
+
+    def counting_decode(**kwargs):
+        calls.append(kwargs["encoded_token"])
+        return decode(**kwargs)
+
+    monkeypatch.setattr(jwt_manager, "_decode_jwt", counting_decode)
+    token = get_jwt_token("cached", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(3):
+        assert test_client.get("/api/people", headers=headers).status_code == 200
+    assert calls.count(token) == 1
+
+    test_app.config["JWT_DECODE_CACHE_TTL"] = 0
+    try:
+        test_client.get("/api/people", headers=headers)
+        assert calls.count(token) == 2
+    finally:
+        test_app.config["JWT_DECODE_CACHE_TTL"] = 300
+
+
+def test_cached_token_expires(test_app, test_client):
+    token = create_access_token(identity=1, expires_delta=timedelta(seconds=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get("/api/people", headers=headers).status_code == 200
+
+    time.sleep(2)
+    assert test_client.get("/api/people", headers=headers).status_code == 401
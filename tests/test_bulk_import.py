@@ -0,0 +1,131 @@
+import json
+
+
+def test_import_people_without_auth(test_client):
+    response = test_client.post("/api/people/import", json=[{"name": "Bob"}])
+    assert response.status_code == 401
+
+
+def test_import_people_json(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = [
+        {"name": "Alice", "sale_oportunity": False},
+        {
+            "name": "Bob",
+            "sale_oportunity": True,
+            "vehicles": [
+                {"name": "Golf", "color": "yellow", "model": "hatch"},
+                {"name": "BMW M4", "color": "blue", "model": "sedan"},
+            ],
+        },
+        {"sale_oportunity": True},
+        {
+            "name": "Carla",
+            "sale_oportunity": False,
+            "vehicles": [{"name": "Golf", "color": "yellow", "model": "hatch"}],
+        },
+        {
+            "name": "Dan",
+            "sale_oportunity": True,
+            "vehicles": [{"name": "Golf", "color": "yellow", "model": "hatch"}] * 4,
+        },
+        {
+            "name": "Eve",
+            "sale_oportunity": True,
+            "vehicles": [{"name": "Golf", "color": "pink", "model": "hatch"}],
+        },
+        "not a person",
+    ]
+
+    response = test_client.post("/api/people/import", json=rows, headers=headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["created"] == 2
+    assert report["failed"] == 5
+
+    results = report["results"]
+    assert [result["row"] for result in results] == list(range(len(rows)))
+    assert [result["status"] for result in results] == [
+        "created",
+        "created",
+        "error",
+        "error",
+        "error",
+        "error",
+        "error",
+    ]
+    assert results[2]["errors"] == {"name": ["Missing data for required field."]}
+    assert results[3]["errors"] == {"vehicles": ["Person cannot buy vehicles yet."]}
+    assert results[4]["errors"] == {
+        "vehicles": ["A person can only have up to 3 vehicles."]
+    }
+    assert results[5]["errors"] == {
+        "vehicles": {"0": {"color": ["Color not available."]}}
+    }
+
+    person = test_client.get(
+        f"/api/person/{results[1]['id']}", headers=headers
+    ).get_json()
+    assert person["name"] == "Bob"
+    assert len(person["vehicles"]) == 2
+
+
+def test_import_people_ndjson_in_chunks(test_app, test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    test_app.config["IMPORT_CHUNK_SIZE"] = 2
+    lines = [json.dumps({"name": f"Lead {index}"}) for index in range(5)]
+    lines.insert(2, "{not json")
+
+    response = test_client.post(
+        "/api/people/import",
+        data="\n".join(lines) + "\n",
+        content_type="application/x-ndjson",
+        headers=headers,
+    )
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["created"] == 5
+    assert report["results"][2] == {
+        "row": 2,
+        "status": "error",
+        "errors": {"_schema": ["Invalid row."]},
+    }
+    ids = [result["id"] for result in report["results"] if "id" in result]
+    assert ids == sorted(ids)
+
+
+def test_import_people_overlong_names(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = [
+        {"name": "x" * 101},
+        {
+            "name": "Bob",
+            "sale_oportunity": True,
+            "vehicles": [{"name": "x" * 101, "color": "yellow", "model": "hatch"}],
+        },
+        {"name": "x" * 100},
+    ]
+
+    response = test_client.post("/api/people/import", json=rows, headers=headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["created"] == 1
+    assert report["results"][0]["errors"] == {
+        "name": ["Longer than maximum length 100."]
+    }
+    assert report["results"][1]["errors"] == {
+        "vehicles": {"0": {"name": ["Longer than maximum length 100."]}}
+    }
+    assert report["results"][2]["status"] == "created"
+
+
+def test_import_people_rejects_non_array(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.post(
+        "/api/people/import", json={"name": "Bob"}, headers=headers
+    )
+    assert response.status_code == 400
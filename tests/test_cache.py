@@ -0,0 +1,241 @@
+import pytest
+
+from app import create_app
+from app.caching import ExternalBackend, InProcessBackend
+from app.config import TestConfig
+from app.extensions import cache, db
+
+
+class FakePipeline:
+    """Queues commands and runs them on the fake client on execute()"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Dictionary standing in for the redis-py client (no scans on purpose)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def expire(self, key, seconds):
+        pass
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(member.encode() for member in members)
+
+    def srem(self, key, *members):
+        self.data.get(key, set()).difference_update(
+            member.encode() for member in members
+        )
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.data.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        scores = self.data.get(key, {})
+        for member in [member for member, score in scores.items() if score <= high]:
+            del scores[member]
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+
+@pytest.fixture(params=["memory", "external"])
+def backend(request, test_app):
+    previous = cache.backend
+    if request.param == "memory":
+        cache.backend = InProcessBackend()
+    else:
+        cache.backend = ExternalBackend(FakeRedis())
+    yield cache.backend
+    cache.backend = previous
+
+
+def test_in_process_backend_evicts_least_recently_used():
+    backend = InProcessBackend(max_entries=2)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", ttl=60)
+    assert backend.get("a") == b"1"
+    assert backend.get("b") is None
+    assert backend.get("c") == b"3"
+
+
+def test_in_process_backend_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.caching.time.monotonic", lambda: now[0])
+    backend = InProcessBackend()
+    backend.set("a", b"1", ttl=10)
+    assert backend.get("a") == b"1"
+    now[0] += 10
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_person_reads_are_cached(backend, test_client, get_jwt_token, count_queries):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = test_client.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+    before = cache.stats()
+
+    first = test_client.get(f"/api/person/{person_id}", headers=headers)
+    with count_queries() as statements:
+        second = test_client.get(f"/api/person/{person_id}", headers=headers)
+    assert second.data == first.data
+    assert second.mimetype == "application/json"
+    assert statements == []
+
+    stats = cache.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_writes_invalidate_cached_person(backend, test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = test_client.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+    person_url = f"/api/person/{person_id}"
+    vehicles_url = f"/api/vehicles/person/{person_id}"
+
+    assert test_client.get(vehicles_url, headers=headers).get_json() == []
+    test_client.get(person_url, headers=headers)
+    test_client.patch(person_url, json={"name": "Robert"}, headers=headers)
+    assert test_client.get(person_url, headers=headers).get_json()["name"] == "Robert"
+
+    vehicle_id = test_client.post(
+        vehicles_url,
+        json={"name": "Golf", "color": "yellow", "model": "hatch"},
+        headers=headers,
+    ).get_json()["id"]
+    vehicle_url = f"/api/vehicle/{vehicle_id}/person/{person_id}"
+    assert test_client.get(person_url, headers=headers).get_json()["vehicles"] == [
+        vehicle_id
+    ]
+    assert len(test_client.get(vehicles_url, headers=headers).get_json()) == 1
+    assert test_client.get(vehicle_url, headers=headers).status_code == 200
+
+    test_client.delete(vehicle_url, headers=headers)
+    assert test_client.get(vehicle_url, headers=headers).status_code == 404
+    assert test_client.get(vehicles_url, headers=headers).get_json() == []
+    assert test_client.get(person_url, headers=headers).get_json()["vehicles"] == []
+
+    test_client.delete(person_url, headers=headers)
+    assert test_client.get(person_url, headers=headers).status_code == 404
+
+
+def test_external_backend_invalidates_one_group(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.caching.time.time", lambda: now[0])
+    client = FakeRedis()
+    client.set("car-management:ratelimit:client", b"not a cache entry")
+    backend = ExternalBackend(client)
+    backend.set("person:1:detail", b"1", ttl=60, group="person:1")
+    backend.set("person:1:vehicles", b"2", ttl=60, group="person:1")
+    backend.set("person:2:detail", b"3", ttl=30, group="person:2")
+    assert len(backend) == 3
+
+    backend.delete_group("person:1")
+    assert backend.get("person:1:detail") is None
+    assert backend.get("person:1:vehicles") is None
+    assert backend.get("person:2:detail") == b"3"
+    assert client.get("car-management:ratelimit:client") == b"not a cache entry"
+    assert len(backend) == 1
+
+    now[0] += 30
+    assert len(backend) == 0
+
+
+def test_errors_are_not_cached(backend, test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    test_client.get("/api/person/9999", headers=headers)
+    assert len(backend) == 0
+
+
+def test_cache_stats_endpoint(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.get("/api/cache/stats", headers=headers)
+    assert response.status_code == 200
+    assert set(response.get_json()) == {"hits", "misses", "size"}
+
+
+def test_process_local_caches_check_versions_across_workers(tmp_path):
+    class WorkerConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'workers.db'}"
+        CACHE_BACKEND = "memory"
+        WEB_WORKERS = 2
+
+    reader, writer = (create_app(WorkerConfig).test_client() for _ in range(2))
+    with reader.application.app_context():
+        db.create_all()
+    writer.post("/api/register", json={"username": "w", "password": "pw"})
+    token = writer.post(
+        "/api/login", json={"username": "w", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = writer.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+    person_url = f"/api/person/{person_id}"
+    vehicles_url = f"/api/vehicles/person/{person_id}"
+
+    assert reader.get(person_url, headers=headers).get_json()["name"] == "Bob"
+    assert reader.get(vehicles_url, headers=headers).get_json() == []
+    assert reader.get(person_url, headers=headers).get_json()["name"] == "Bob"
+
+    # The writes evict the writer's entries only; the reader sees new versions
+    writer.patch(person_url, json={"name": "Robert"}, headers=headers)
+    writer.post(
+        vehicles_url,
+        json={"name": "Golf", "color": "yellow", "model": "hatch"},
+        headers=headers,
+    )
+    assert reader.get(person_url, headers=headers).get_json()["name"] == "Robert"
+    assert len(reader.get(vehicles_url, headers=headers).get_json()) == 1
+
+    writer.delete(person_url, headers=headers)
+    assert reader.get(person_url, headers=headers).status_code == 404
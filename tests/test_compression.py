@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+
+from app.extensions import compressor
+
+
+@pytest.fixture(scope="module")
+def headers(test_client):
+    test_client.post("/api/register", json={"username": "gz", "password": "pw"})
+    token = test_client.post(
+        "/api/login", json={"username": "gz", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for index in range(40):
+        test_client.post(
+            "/api/people",
+            json={"name": f"Compressed person {index}", "sale_oportunity": True},
+            headers=headers,
+        )
+    return headers
+
+
+def decode(response):
+    encoding = response.headers.get("Content-Encoding")
+    if encoding == "gzip":
+        return gzip.decompress(response.data)
+    if encoding == "br":
+        return pytest.importorskip("brotli").decompress(response.data)
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(response.data)
+    return response.data
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_negotiated_encoding_round_trips(test_client, headers, encoding):
+    if encoding not in compressor.state.encodings:
+        pytest.skip(f"{encoding} encoder not installed")
+    plain = test_client.get("/api/people", headers=headers)
+    response = test_client.get(
+        "/api/people", headers={**headers, "Accept-Encoding": f"{encoding}, identity"}
+    )
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == plain.headers["ETag"]
+    assert len(response.data) < len(plain.data)
+    assert decode(response) == plain.data
+
+
+def test_encoding_preference_and_quality(test_client, headers):
+    response = test_client.get(
+        "/api/people", headers={**headers, "Accept-Encoding": "gzip;q=1, br;q=0.5"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    response = test_client.get(
+        "/api/people", headers={**headers, "Accept-Encoding": "gzip;q=0"}
+    )
+    assert "Content-Encoding" not in response.headers
+
+
+def test_small_and_error_responses_are_not_compressed(test_client, headers):
+    gzip_headers = {**headers, "Accept-Encoding": "gzip"}
+    response = test_client.get("/api/people?limit=1", headers=gzip_headers)
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    response = test_client.get("/api/person/999999", headers=gzip_headers)
+    assert response.status_code == 404
+    assert "Content-Encoding" not in response.headers
+
+
+def test_repeat_requests_reuse_the_encoded_bodies(test_app, test_client, headers):
+    gzip_headers = {**headers, "Accept-Encoding": "gzip"}
+    first = test_client.get("/api/people", headers=gzip_headers)
+    tag = first.get_etag()[0]
+    bodies = compressor.state.bodies
+    assert bodies.get(f"{tag}:gzip") == first.data
+
+    # Poison the cached entries: a hit must serve them as is
+    poison = b"[]" + b" " * 2048
+    bodies.set(f"{tag}:identity", poison, 60)
+    bodies.set(f"{tag}:gzip", gzip.compress(b"[]"), 60)
+    assert test_client.get("/api/people", headers=headers).data == poison
+    assert decode(test_client.get("/api/people", headers=gzip_headers)) == b"[]"
+
+    # A write changes the tag, so fresh bodies are built
+    test_client.post("/api/people", json={"name": "Changes the tag"}, headers=headers)
+    response = test_client.get("/api/people", headers=gzip_headers)
+    assert response.get_etag()[0] != tag
+    assert b"Changes the tag" in decode(response)
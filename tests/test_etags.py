@@ -0,0 +1,188 @@
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.extensions import cache, db
+from app.models import Person
+
+
+def _create_person(test_client, headers, name="Bob"):
+    return test_client.post(
+        "/api/people", json={"name": name, "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+
+
+def test_get_person_conditional(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = _create_person(test_client, headers)
+
+    response = test_client.get(f"/api/person/{person_id}", headers=headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    # Served from the cache
+    response = test_client.get(
+        f"/api/person/{person_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+
+    # Served from the database
+    cache.invalidate_persons([person_id])
+    response = test_client.get(
+        f"/api/person/{person_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    test_client.post(
+        f"/api/vehicles/person/{person_id}",
+        json={"name": "Golf", "color": "yellow", "model": "hatch"},
+        headers=headers,
+    )
+    response = test_client.get(
+        f"/api/person/{person_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_list_people_conditional(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = test_client.get("/api/people", headers=headers)
+    etag = response.headers["ETag"]
+    response = test_client.get(
+        "/api/people", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert "X-Pagination" in response.headers
+
+    # Another page or filter gets another tag
+    response = test_client.get(
+        "/api/people?limit=1", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+    person_id = response.get_json()[0]["id"]
+    test_client.patch(f"/api/person/{person_id}", json={"name": "Ed"}, headers=headers)
+    response = test_client.get(
+        "/api/people", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+def test_patch_person_if_match(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = _create_person(test_client, headers)
+    etag = test_client.get(f"/api/person/{person_id}", headers=headers).headers["ETag"]
+
+    response = test_client.patch(
+        f"/api/person/{person_id}",
+        json={"name": "First"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+
+    response = test_client.patch(
+        f"/api/person/{person_id}",
+        json={"name": "Second"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 412
+    response = test_client.get(f"/api/person/{person_id}", headers=headers)
+    assert response.get_json()["name"] == "First"
+    assert response.headers["ETag"] == new_etag
+
+    response = test_client.delete(
+        f"/api/person/{person_id}", headers={**headers, "If-Match": etag}
+    )
+    assert response.status_code == 412
+    response = test_client.delete(
+        f"/api/person/{person_id}", headers={**headers, "If-Match": new_etag}
+    )
+    assert response.status_code == 204
+
+
+def test_concurrent_update_is_detected(test_app):
+    person = Person(name="Bob", sale_oportunity=True)
+    db.session.add(person)
+    db.session.commit()
+
+    # Another transaction changes the row after we loaded it
+    with db.engine.begin() as connection:
+        connection.execute(
+            db.update(Person)
+            .where(Person.id == person.id)
+            .values(version=Person.version + 1)
+        )
+
+    person.name = "Stale write"
+    with pytest.raises(StaleDataError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def _bump_version_once(monkeypatch, person_id):
+    """Make another transaction change the person once, right after it is loaded"""
+    from app import routes
+
+    check_if_match = routes.check_if_match
+    bumped = []
+
+    def racing_check_if_match(tag):
+        check_if_match(tag)
+        if not bumped:
+            bumped.append(True)
+            with db.engine.begin() as connection:
+                connection.execute(
+                    db.update(Person)
+                    .where(Person.id == person_id)
+                    .values(version=Person.version + 1)
+                )
+
+    monkeypatch.setattr(routes, "check_if_match", racing_check_if_match)
+
+
+@pytest.mark.parametrize("method", ["patch", "delete"])
+def test_raced_write_without_if_match_is_retried(
+    test_client, get_jwt_token, monkeypatch, method
+):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = _create_person(test_client, headers)
+    _bump_version_once(monkeypatch, person_id)
+
+    response = getattr(test_client, method)(
+        f"/api/person/{person_id}", json={"name": "Retried"}, headers=headers
+    )
+    assert response.status_code in (200, 204)
+    response = test_client.get(f"/api/person/{person_id}", headers=headers)
+    if method == "patch":
+        assert response.get_json()["name"] == "Retried"
+    else:
+        assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method", ["patch", "delete"])
+def test_raced_write_with_if_match_is_refused(
+    test_client, get_jwt_token, monkeypatch, method
+):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = _create_person(test_client, headers)
+    etag = test_client.get(f"/api/person/{person_id}", headers=headers).headers["ETag"]
+    _bump_version_once(monkeypatch, person_id)
+
+    response = getattr(test_client, method)(
+        f"/api/person/{person_id}",
+        json={"name": "Refused"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 412
+    response = test_client.get(f"/api/person/{person_id}", headers=headers)
+    assert response.get_json()["name"] == "Bob"
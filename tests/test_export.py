@@ -0,0 +1,106 @@
+import csv
+import io
+
+import pytest
+
+from app.export import COLUMNS
+
+
+@pytest.fixture(scope="module")
+def owners(test_client):
+    test_client.post("/api/register", json={"username": "exporter", "password": "pw"})
+    token = test_client.post(
+        "/api/login", json={"username": "exporter", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    alice = test_client.post(
+        "/api/people",
+        json={"name": "Alice, Jr.", "sale_oportunity": True},
+        headers=headers,
+    ).get_json()["id"]
+    bob = test_client.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": False}, headers=headers
+    ).get_json()["id"]
+    vehicles = [
+        test_client.post(
+            f"/api/vehicles/person/{alice}",
+            json={"name": name, "color": color, "model": model},
+            headers=headers,
+        ).get_json()["id"]
+        for name, color, model in (
+            ("Golf", "gray", "hatch"),
+            ('The "Cabrio"', "yellow", "convertible"),
+        )
+    ]
+    expected = [
+        [str(alice), "Alice, Jr.", "True", str(vehicles[0]), "Golf", "gray", "hatch"],
+        [
+            str(alice),
+            "Alice, Jr.",
+            "True",
+            str(vehicles[1]),
+            'The "Cabrio"',
+            "yellow",
+            "convertible",
+        ],
+        [str(bob), "Bob", "False", "", "", "", ""],
+    ]
+    return headers, expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 10_000])
+def test_export_csv(test_app, test_client, owners, chunk_size):
+    headers, expected = owners
+    test_app.config["EXPORT_CHUNK_SIZE"] = chunk_size
+    response = test_client.get("/api/people/export", headers=headers)
+    test_app.config["EXPORT_CHUNK_SIZE"] = 10_000
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert "filename=people.csv" in response.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows == [list(COLUMNS), *expected]
+
+
+def test_export_parquet(test_app, test_client, owners):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    headers, expected = owners
+    test_app.config["EXPORT_CHUNK_SIZE"] = 2
+    response = test_client.get("/api/people/export?format=parquet", headers=headers)
+    test_app.config["EXPORT_CHUNK_SIZE"] = 10_000
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.get_data()))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column_names == list(COLUMNS)
+    assert table.schema.field("vehicle_color").type == pa.dictionary(
+        pa.int8(), pa.string()
+    )
+    rows = [
+        ["" if value is None else str(value) for value in row.values()]
+        for row in table.to_pylist()
+    ]
+    assert rows == expected
+
+
+def test_export_rejects_unknown_formats(test_client, owners):
+    headers, _ = owners
+    response = test_client.get("/api/people/export?format=xlsx", headers=headers)
+    assert response.status_code == 422
+    assert test_client.get("/api/people/export").status_code == 401
+
+
+def test_export_command(test_app, owners, tmp_path):
+    _, expected = owners
+    output = tmp_path / "people.csv"
+    result = test_app.test_cli_runner().invoke(
+        args=["export", "people", "--output", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    rows = list(csv.reader(output.open(newline="")))
+    assert rows == [list(COLUMNS), *expected]
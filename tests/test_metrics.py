@@ -0,0 +1,86 @@
+import re
+
+import pytest
+from loguru import logger
+
+from app.metrics import Histogram
+
+
+@pytest.fixture(scope="module")
+def headers(test_client):
+    test_client.post("/api/register", json={"username": "metrics", "password": "pw"})
+    token = test_client.post(
+        "/api/login", json={"username": "metrics", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = test_client.post(
+        "/api/people", json={"name": "Measured"}, headers=headers
+    ).get_json()["id"]
+    return headers, person_id
+
+
+def sample(body, name, **labels):
+    """Value of the first sample of name whose labels include the given ones"""
+    for line in body.splitlines():
+        match = re.fullmatch(rf"{name}\{{(.*)\}} (\S+)", line)
+        if match and all(
+            f'{key}="{value}"' in match[1] for key, value in labels.items()
+        ):
+            return float(match[2])
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", (0.1, 1), ("endpoint",))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "/x")
+    lines = histogram.render({"pid": 1})
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert lines[2:] == [
+        'demo_seconds_bucket{endpoint="/x",pid="1",le="0.1"} 2',
+        'demo_seconds_bucket{endpoint="/x",pid="1",le="1.0"} 3',
+        'demo_seconds_bucket{endpoint="/x",pid="1",le="+Inf"} 4',
+        'demo_seconds_sum{endpoint="/x",pid="1"} 3.65',
+        'demo_seconds_count{endpoint="/x",pid="1"} 4',
+    ]
+
+
+def test_metrics_record_each_request(test_client, headers):
+    headers, person_id = headers
+    rule = "/api/person/<int:person_id>"
+    before = test_client.get("/metrics").get_data(as_text=True)
+    count = sample(before, "http_request_duration_seconds_count", endpoint=rule) or 0
+
+    response = test_client.get(f"/api/person/{person_id}", headers=headers)
+    assert response.status_code == 200
+    body = test_client.get("/metrics").get_data(as_text=True)
+
+    assert sample(body, "http_request_duration_seconds_count", endpoint=rule) == (
+        count + 1
+    )
+    assert sample(
+        body, "http_request_duration_seconds_count", endpoint=rule, status="200"
+    )
+    assert sample(body, "http_response_size_bytes_sum", endpoint=rule) >= len(
+        response.data
+    )
+    assert sample(body, "db_statements_per_request_sum", endpoint=rule) >= 1
+    assert sample(body, "db_statement_duration_seconds_sum", endpoint=rule) > 0
+    assert sample(body, "serialization_duration_seconds_sum", endpoint=rule) > 0
+    assert sample(body, "db_pool_checkout_wait_seconds_count", endpoint=rule)
+
+
+def test_slow_requests_are_logged_with_their_sql(test_app, test_client, headers):
+    headers, _ = headers
+    messages = []
+    sink = logger.add(messages.append, level="WARNING")
+    state = test_app.extensions["metrics"]
+    state.slow_request_ms = 0.000001
+    try:
+        test_client.get("/api/people", headers=headers)
+    finally:
+        state.slow_request_ms = 0
+        logger.remove(sink)
+    assert len(messages) == 1
+    assert "Slow request GET /api/people" in messages[0]
+    assert "SELECT" in messages[0]
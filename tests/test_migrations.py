@@ -0,0 +1,72 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect, text
+
+from app import create_app
+from app.config import TestConfig
+from app.extensions import db
+from app.models import include_object_for
+
+
+def make_app(tmp_path):
+    class MigrationConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'migrations.db'}"
+
+    return create_app(config_class=MigrationConfig)
+
+
+def test_create_app_does_not_touch_the_database(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+
+
+def test_migrations_match_models(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        upgrade()
+        with db.engine.connect() as connection:
+            context = MigrationContext.configure(
+                connection,
+                opts={"include_object": include_object_for(connection.dialect)},
+            )
+            assert compare_metadata(context, db.metadata) == []
+
+        downgrade(revision="base")
+        assert inspect(db.engine).get_table_names() == ["alembic_version"]
+
+
+def test_upgrade_adopts_a_database_created_before_migrations(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        # The baseline schema, as db.create_all() built it, with data
+        upgrade(revision="a1e2c7af85ea")
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(
+                text(
+                    "INSERT INTO persons (id, name, sale_oportunity) "
+                    "VALUES (1, 'Ada', 1), (2, 'Linus', 0)"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO vehicles (name, color, model, person_id) VALUES "
+                    "('Golf', 'gray', 'hatch', 1), ('Civic', 'blue', 'sedan', 1)"
+                )
+            )
+
+        upgrade()
+        with db.engine.connect() as connection:
+            counts = connection.execute(
+                text("SELECT id, vehicle_count FROM persons ORDER BY id")
+            ).all()
+            stats = dict(
+                connection.execute(
+                    text("SELECT key, sum(value) FROM fleet_stats GROUP BY key")
+                ).all()
+            )
+        assert counts == [(1, 2), (2, 0)]
+        assert stats["persons:vehicles:2"] == 1
+        assert stats["vehicles:gray:hatch"] == 1
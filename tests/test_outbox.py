@@ -0,0 +1,186 @@
+import json
+
+import pytest
+
+from app import outbox
+from app.extensions import db
+from app.models import OutboxEvent
+
+
+@pytest.fixture
+def headers(get_jwt_token):
+    return {"Authorization": f"Bearer {get_jwt_token()}"}
+
+
+def last_event_id():
+    return db.session.scalar(db.select(db.func.max(OutboxEvent.id))) or 0
+
+
+def feed(test_client, headers, query=""):
+    response = test_client.get(f"/api/events?{query}", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json(), json.loads(response.headers["X-Pagination"])
+
+
+def test_every_write_path_appends_events(test_client, headers):
+    start = last_event_id()
+    person = test_client.post(
+        "/api/people", json={"name": "Lead", "sale_oportunity": True}, headers=headers
+    ).get_json()
+    vehicle = test_client.post(
+        f"/api/vehicles/person/{person['id']}",
+        json={"name": "Golf", "color": "gray", "model": "hatch"},
+        headers=headers,
+    ).get_json()
+    test_client.patch(
+        f"/api/person/{person['id']}", json={"name": "Renamed"}, headers=headers
+    )
+    # Changes nothing, so no event
+    test_client.patch(
+        f"/api/person/{person['id']}",
+        json={"name": "Renamed", "sale_oportunity": True},
+        headers=headers,
+    )
+    test_client.delete(
+        f"/api/vehicle/{vehicle['id']}/person/{person['id']}", headers=headers
+    )
+    imported = test_client.post(
+        "/api/people/import",
+        json=[
+            {
+                "name": "Imported",
+                "sale_oportunity": True,
+                "vehicles": [{"name": "Polo", "color": "blue", "model": "hatch"}],
+            }
+        ],
+        headers=headers,
+    ).get_json()["results"][0]["id"]
+    test_client.post("/api/people/purge", json={"ids": [imported]}, headers=headers)
+    test_client.delete(f"/api/person/{person['id']}", headers=headers)
+
+    events, pagination = feed(test_client, headers, f"after={start}")
+    assert [(event["type"], event["payload"]) for event in events] == [
+        (
+            "person.created",
+            {"id": person["id"], "name": "Lead", "sale_oportunity": True},
+        ),
+        (
+            "vehicle.added",
+            {
+                "id": vehicle["id"],
+                "name": "Golf",
+                "color": "gray",
+                "model": "hatch",
+                "person_id": person["id"],
+            },
+        ),
+        (
+            "person.updated",
+            {"id": person["id"], "name": "Renamed", "sale_oportunity": True},
+        ),
+        ("vehicle.deleted", {"id": vehicle["id"], "person_id": person["id"]}),
+        (
+            "person.created",
+            {"id": imported, "name": "Imported", "sale_oportunity": True},
+        ),
+        (
+            "vehicle.added",
+            {
+                "id": events[5]["payload"]["id"],
+                "name": "Polo",
+                "color": "blue",
+                "model": "hatch",
+                "person_id": imported,
+            },
+        ),
+        ("person.deleted", {"id": imported}),
+        ("person.deleted", {"id": person["id"]}),
+    ]
+    ids = [event["id"] for event in events]
+    assert ids == sorted(ids)
+    assert pagination["next_after"] == ids[-1]
+
+    events, pagination = feed(test_client, headers, f"after={ids[3]}&limit=2")
+    assert [event["id"] for event in events] == ids[4:6]
+    assert pagination == {"limit": 2, "next_after": ids[5]}
+
+
+def test_failed_writes_append_nothing(test_client, headers):
+    start = last_event_id()
+    person = test_client.post(
+        "/api/people",
+        json={"name": "Not yet", "sale_oportunity": False},
+        headers=headers,
+    ).get_json()
+    response = test_client.post(
+        f"/api/vehicles/person/{person['id']}",
+        json={"name": "Golf", "color": "gray", "model": "hatch"},
+        headers=headers,
+    )
+    assert response.status_code == 403
+    events, _ = feed(test_client, headers, f"after={start}")
+    assert [event["type"] for event in events] == ["person.created"]
+
+
+def test_long_poll_returns_the_events_committed_while_waiting(
+    test_app, test_client, headers, monkeypatch
+):
+    start = last_event_id()
+    sleeps = []
+
+    def sleep(seconds):
+        # Another client writes while the poll is waiting
+        if not sleeps:
+            outbox.record("person.updated", {"id": 0})
+            db.session.commit()
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(outbox.time, "sleep", sleep)
+    events, pagination = feed(test_client, headers, f"after={start}&wait=5")
+    assert [event["type"] for event in events] == ["person.updated"]
+    assert len(sleeps) == 1
+    assert sleeps[0] == test_app.config["EVENTS_POLL_INTERVAL"]
+
+    # Nothing new: the poll gives up once the wait is over
+    events, pagination = feed(
+        test_client, headers, f"after={pagination['next_after']}&wait=0.01"
+    )
+    assert events == []
+    assert pagination["next_after"] == start + 1
+
+
+def test_event_stream_resumes_from_last_event_id(test_app, test_client, headers):
+    for name in ("First", "Second"):
+        test_client.post(
+            "/api/people", json={"name": name, "sale_oportunity": True}, headers=headers
+        )
+    first = last_event_id() - 1
+    test_app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_STREAM_SECONDS=0.05)
+    try:
+        response = test_client.get(
+            "/api/events",
+            headers={
+                **headers,
+                "Accept": "text/event-stream",
+                "Last-Event-ID": str(first),
+            },
+        )
+    finally:
+        test_app.config.update(EVENTS_POLL_INTERVAL=0.5, EVENTS_STREAM_SECONDS=300)
+
+    assert response.mimetype == "text/event-stream"
+    messages = response.get_data(as_text=True).split("\n\n")
+    assert messages[0] == "retry: 10"
+    lines = messages[1].split("\n")
+    assert lines[:2] == [f"id: {first + 1}", "event: person.created"]
+    assert json.loads(lines[2].removeprefix("data: "))["payload"]["name"] == "Second"
+    assert ": idle" in messages[2:]
+
+
+def test_prune_command(test_app, test_client, headers):
+    test_client.post("/api/people", json={"name": "Old"}, headers=headers)
+    result = test_app.test_cli_runner().invoke(args=["outbox", "prune", "--days", "1"])
+    assert result.output == "Deleted 0 events.\n"
+    result = test_app.test_cli_runner().invoke(args=["outbox", "prune", "--days", "0"])
+    assert result.exit_code == 0
+    assert db.session.scalar(db.select(db.func.count(OutboxEvent.id))) == 0
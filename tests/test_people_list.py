@@ -0,0 +1,97 @@
+import json
+
+
+def _create_people(test_client, headers):
+    people = [
+        {"name": "Alice", "sale_oportunity": True},
+        {"name": "Albert", "sale_oportunity": False},
+        {"name": "Bruno", "sale_oportunity": True},
+        {"name": "Carla", "sale_oportunity": False},
+        {"name": "Alfredo", "sale_oportunity": True},
+    ]
+    ids = []
+    for person in people:
+        response = test_client.post("/api/people", json=person, headers=headers)
+        ids.append(response.get_json()["id"])
+
+    # Give Bruno a vehicle
+    test_client.post(
+        f"/api/vehicles/person/{ids[2]}",
+        json={"name": "Golf", "color": "yellow", "model": "hatch"},
+        headers=headers,
+    )
+    return ids
+
+
+def test_list_people_keyset_pagination(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = _create_people(test_client, headers)
+
+    response = test_client.get("/api/people?limit=2", headers=headers)
+    assert response.status_code == 200
+    assert [p["id"] for p in response.get_json()] == ids[:2]
+    pagination = json.loads(response.headers["X-Pagination"])
+    assert pagination == {"limit": 2, "next_after": ids[1]}
+
+    seen = [p["id"] for p in response.get_json()]
+    while pagination["next_after"] is not None:
+        response = test_client.get(
+            f"/api/people?limit=2&after={pagination['next_after']}", headers=headers
+        )
+        seen.extend(p["id"] for p in response.get_json())
+        pagination = json.loads(response.headers["X-Pagination"])
+    assert seen == ids
+
+
+def test_list_people_filters(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = test_client.get("/api/people?name=Al", headers=headers)
+    assert [p["name"] for p in response.get_json()] == ["Alice", "Albert", "Alfredo"]
+
+    response = test_client.get(
+        "/api/people?name=Al&sale_oportunity=true", headers=headers
+    )
+    assert [p["name"] for p in response.get_json()] == ["Alice", "Alfredo"]
+
+    response = test_client.get("/api/people?sale_oportunity=false", headers=headers)
+    assert [p["name"] for p in response.get_json()] == ["Albert", "Carla"]
+
+    response = test_client.get("/api/people?has_vehicles=true", headers=headers)
+    assert [p["name"] for p in response.get_json()] == ["Bruno"]
+
+    response = test_client.get("/api/people?has_vehicles=false", headers=headers)
+    assert "Bruno" not in [p["name"] for p in response.get_json()]
+
+
+def test_list_people_invalid_limit(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.get("/api/people?limit=0", headers=headers)
+    assert response.status_code == 422
+
+
+def test_stream_people_ndjson(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/x-ndjson"}
+
+    response = test_client.get("/api/people", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [p["name"] for p in rows] == [
+        "Alice",
+        "Albert",
+        "Bruno",
+        "Carla",
+        "Alfredo",
+    ]
+    assert rows[2]["vehicles"] != []
+
+    response = test_client.get(
+        f"/api/people?after={rows[2]['id']}&name=Al", headers=headers
+    )
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [p["name"] for p in rows] == ["Alfredo"]
@@ -251,3 +251,127 @@ def test_delete_vehicle_not_from_person(test_client, get_jwt_token):
         headers=headers,
     )
     assert response.status_code == 403
+
+
+def _create_person_with_vehicle(test_client, headers, name):
+    person_id = test_client.post(
+        "/api/people", json={"name": name, "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+    test_client.post(
+        f"/api/vehicles/person/{person_id}",
+        json={"name": "Golf", "color": "gray", "model": "hatch"},
+        headers=headers,
+    )
+    return person_id
+
+
+def test_delete_person_cascades_to_vehicles(test_client, get_jwt_token):
+    from app.models import Vehicle
+
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = _create_person_with_vehicle(test_client, headers, "Deleted Person")
+
+    response = test_client.delete(f"/api/person/{person_id}", headers=headers)
+    assert response.status_code == 204
+    assert Vehicle.query.filter_by(person_id=person_id).count() == 0
+    assert Vehicle.query.filter(Vehicle.person_id.is_(None)).count() == 0
+
+
+def test_purge_people(test_app, test_client, get_jwt_token):
+    from app.models import Person, Vehicle
+
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    kept_id = _create_person_with_vehicle(test_client, headers, "Kept Person")
+    purged_ids = [
+        _create_person_with_vehicle(test_client, headers, f"Stale Lead {index}")
+        for index in range(5)
+    ]
+    # Warm the cache so the purge has to evict the entry
+    test_client.get(f"/api/person/{purged_ids[0]}", headers=headers)
+
+    test_app.config["PURGE_CHUNK_SIZE"] = 2
+    try:
+        response = test_client.post(
+            "/api/people/purge",
+            json={"ids": [*purged_ids, purged_ids[0], 9999]},
+            headers=headers,
+        )
+    finally:
+        test_app.config["PURGE_CHUNK_SIZE"] = 1000
+    assert response.status_code == 200
+    assert response.get_json() == {"deleted": 5, "ids": sorted(purged_ids)}
+
+    assert Person.query.filter(Person.id.in_(purged_ids)).count() == 0
+    assert Vehicle.query.filter(Vehicle.person_id.in_(purged_ids)).count() == 0
+    assert Vehicle.query.filter_by(person_id=kept_id).count() == 1
+    response = test_client.get(f"/api/person/{purged_ids[0]}", headers=headers)
+    assert response.status_code == 404
+
+
+def test_purge_people_requires_ids(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.post("/api/people/purge", json={"ids": []}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_batch_fetch_people_and_vehicles(test_app, test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_ids = [
+        _create_person_with_vehicle(test_client, headers, f"Batch Person {index}")
+        for index in range(3)
+    ]
+    vehicle_ids = [
+        test_client.get(
+            f"/api/vehicles/person/{person_id}", headers=headers
+        ).get_json()[0]["id"]
+        for person_id in person_ids
+    ]
+
+    response = test_client.post(
+        "/api/person/batch",
+        json={"ids": [person_ids[2], 9999, person_ids[0], person_ids[2]]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["missing"] == [9999]
+    assert data["people"] == {
+        str(person_id): test_client.get(
+            f"/api/person/{person_id}", headers=headers
+        ).get_json()
+        for person_id in (person_ids[0], person_ids[2])
+    }
+
+    response = test_client.post(
+        "/api/vehicle/batch", json={"ids": [*vehicle_ids, 9999]}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["missing"] == [9999]
+    assert [
+        data["vehicles"][str(vehicle_id)]["person"] for vehicle_id in vehicle_ids
+    ] == (person_ids)
+
+    test_app.config["BATCH_MAX_IDS"] = 2
+    try:
+        response = test_client.post(
+            "/api/person/batch", json={"ids": person_ids}, headers=headers
+        )
+    finally:
+        test_app.config["BATCH_MAX_IDS"] = 1000
+    assert response.status_code == 400
+    # Counted before any id is deserialized or de-duplicated
+    for ids in ([1] * 1001, ["x"] * 1001):
+        response = test_client.post(
+            "/api/vehicle/batch", json={"ids": ids}, headers=headers
+        )
+        assert response.status_code == 400
+    for url in ("/api/person/batch", "/api/vehicle/batch"):
+        assert (
+            test_client.post(url, json={"ids": []}, headers=headers).status_code == 422
+        )
+        assert test_client.post(url, json={"ids": [1]}).status_code == 401
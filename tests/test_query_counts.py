@@ -0,0 +1,152 @@
+from app.extensions import db
+
+
+def _create_people_with_vehicles(test_client, headers, count):
+    ids = []
+    for index in range(count):
+        response = test_client.post(
+            "/api/people",
+            json={"name": f"Person {index}", "sale_oportunity": True},
+            headers=headers,
+        )
+        person_id = response.get_json()["id"]
+        ids.append(person_id)
+        for vehicle in (
+            {"name": "Golf", "color": "yellow", "model": "hatch"},
+            {"name": "BMW M4", "color": "blue", "model": "sedan"},
+        ):
+            test_client.post(
+                f"/api/vehicles/person/{person_id}", json=vehicle, headers=headers
+            )
+    return ids
+
+
+def test_list_people_query_count_does_not_grow(
+    test_client, get_jwt_token, count_queries
+):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    _create_people_with_vehicles(test_client, headers, 5)
+
+    with count_queries() as one_person:
+        response = test_client.get("/api/people?limit=1", headers=headers)
+    assert len(response.get_json()[0]["vehicles"]) == 2
+
+    with count_queries() as five_people:
+        response = test_client.get("/api/people?limit=5", headers=headers)
+    assert all(len(person["vehicles"]) == 2 for person in response.get_json())
+
+    # One statement for the page of people, one batched statement for vehicles
+    assert len(one_person) == len(five_people) == 2
+
+
+def test_stream_people_query_count_does_not_grow(
+    test_client, get_jwt_token, count_queries
+):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/x-ndjson"}
+
+    with count_queries() as statements:
+        response = test_client.get("/api/people", headers=headers)
+    assert len(response.data.decode().splitlines()) == 5
+    assert len(statements) == 2
+
+
+def test_get_person_single_query(test_client, get_jwt_token, count_queries):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with count_queries() as statements:
+        response = test_client.get("/api/person/1", headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()["vehicles"]) == 2
+    assert len(statements) == 1
+
+
+def test_batch_fetch_query_count_does_not_grow(
+    test_client, get_jwt_token, count_queries
+):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with count_queries() as one_person:
+        response = test_client.post(
+            "/api/person/batch", json={"ids": [1]}, headers=headers
+        )
+    assert len(response.get_json()["people"]["1"]["vehicles"]) == 2
+
+    with count_queries() as five_people:
+        response = test_client.post(
+            "/api/person/batch", json={"ids": [1, 2, 3, 4, 5, 9999]}, headers=headers
+        )
+    assert len(response.get_json()["people"]) == 5
+    assert response.get_json()["missing"] == [9999]
+    assert len(one_person) == len(five_people) == 2
+
+    with count_queries() as statements:
+        response = test_client.post(
+            "/api/vehicle/batch", json={"ids": list(range(1, 11))}, headers=headers
+        )
+    assert len(response.get_json()["vehicles"]) == 10
+    assert len(statements) == 1
+
+
+def test_get_person_vehicles(test_client, get_jwt_token, count_queries):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with count_queries() as statements:
+        response = test_client.get("/api/vehicles/person/1", headers=headers)
+    assert response.status_code == 200
+    assert [vehicle["name"] for vehicle in response.get_json()] == ["Golf", "BMW M4"]
+    assert all(vehicle["person"] == 1 for vehicle in response.get_json())
+    assert len(statements) == 2
+
+
+def test_get_vehicle_single_query(test_client, get_jwt_token, count_queries):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    vehicles = test_client.get("/api/vehicles/person/1", headers=headers).get_json()
+
+    for url, status in (
+        (f"/api/vehicle/{vehicles[0]['id']}/person/1", 200),
+        (f"/api/vehicle/{vehicles[0]['id']}/person/2", 403),
+        ("/api/vehicle/9999/person/1", 404),
+    ):
+        with count_queries() as statements:
+            response = test_client.get(url, headers=headers)
+        assert response.status_code == status
+        assert len(statements) == 1
+
+
+def test_delete_vehicle_query_count(test_client, get_jwt_token, count_queries):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    vehicles = test_client.get("/api/vehicles/person/1", headers=headers).get_json()
+    postgresql = db.engine.dialect.name == "postgresql"
+
+    # The DELETE, scoped to the owner, finds nothing. PostgreSQL reads the
+    # vehicle in the same statement to tell why; SQLite looks it up after
+    with count_queries() as statements:
+        response = test_client.delete(
+            f"/api/vehicle/{vehicles[0]['id']}/person/2", headers=headers
+        )
+    assert response.status_code == 403
+    assert len(statements) == (1 if postgresql else 2)
+
+    with count_queries() as statements:
+        response = test_client.delete("/api/vehicle/9999/person/1", headers=headers)
+    assert response.status_code == 404
+    assert len(statements) == (1 if postgresql else 2)
+
+    # The DELETE ... RETURNING, the vehicle counter update, the fleet stats and
+    # the outbox event (after its advisory lock on PostgreSQL)
+    with count_queries() as statements:
+        response = test_client.delete(
+            f"/api/vehicle/{vehicles[0]['id']}/person/1", headers=headers
+        )
+    assert response.status_code == 204
+    assert len(statements) == (5 if postgresql else 4)
+
+    response = test_client.get("/api/vehicles/person/1", headers=headers)
+    assert [vehicle["id"] for vehicle in response.get_json()] == [vehicles[1]["id"]]
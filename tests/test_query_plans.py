@@ -0,0 +1,131 @@
+"""EXPLAIN the hot queries on a seeded PostgreSQL database.
+
+Fails when one of them falls back to a sequential scan or stops using the
+index meant for it, e.g. after an index is dropped or a query stops matching
+it. The seed size defaults to one million people and can be lowered with
+QUERY_PLAN_ROWS.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.extensions import db
+from app.models import Person, User, Vehicle
+from app.routes import filter_people, filter_vehicles
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "1000000"))
+
+
+@pytest.fixture(scope="module")
+def seeded(test_app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("query plans are only checked on PostgreSQL")
+    db.session.execute(
+        text(
+            "INSERT INTO persons (name, sale_oportunity, vehicle_count, version) "
+            "SELECT 'person-' || n, n % 5 <> 0, n % 4, 1 "
+            "FROM generate_series(1, :rows) AS n"
+        ),
+        {"rows": ROWS},
+    )
+    db.session.execute(
+        text(
+            "INSERT INTO vehicles (name, color, model, person_id) "
+            "SELECT 'vehicle-' || p.id, 'blue', 'sedan', p.id "
+            "FROM persons p, generate_series(1, p.vehicle_count)"
+        )
+    )
+    db.session.execute(
+        text(
+            'INSERT INTO "user" (username, password_hash) '
+            "SELECT 'user-' || n, 'x' FROM generate_series(1, :rows) AS n"
+        ),
+        {"rows": ROWS},
+    )
+    db.session.commit()
+    for table in ("persons", "vehicles", '"user"'):
+        db.session.execute(text(f"ANALYZE {table}"))
+    yield
+    db.session.execute(text('TRUNCATE vehicles, persons, "user" RESTART IDENTITY'))
+    db.session.commit()
+
+
+def plan_nodes(statement):
+    sql = statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    nodes, found = [plan[0]["Plan"]], []
+    while nodes:
+        node = nodes.pop()
+        found.append(node)
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def seq_scans(statement):
+    return [
+        node["Relation Name"]
+        for node in plan_nodes(statement)
+        if node["Node Type"] == "Seq Scan"
+    ]
+
+
+def indexes_used(statement):
+    return {
+        node["Index Name"] for node in plan_nodes(statement) if "Index Name" in node
+    }
+
+
+def people_page(**args):
+    return filter_people(Person.query, args).limit(100).statement
+
+
+@pytest.mark.parametrize(
+    "statement, index",
+    [
+        pytest.param(lambda: people_page(), "persons_pkey", id="people"),
+        pytest.param(
+            lambda: people_page(after=ROWS // 2), "persons_pkey", id="people-after"
+        ),
+        pytest.param(
+            lambda: people_page(sale_oportunity=True),
+            "ix_persons_sale_oportunity",
+            id="sale-oportunity",
+        ),
+        pytest.param(
+            lambda: people_page(name="person-4242"),
+            "ix_persons_name_prefix",
+            id="name-prefix",
+        ),
+        pytest.param(
+            lambda: select(Vehicle)
+            .where(Vehicle.person_id.in_([3, ROWS // 2, ROWS - 1]))
+            .order_by(Vehicle.id),
+            "ix_vehicles_person_id_id",
+            id="vehicles-of-people",
+        ),
+        pytest.param(
+            lambda: select(Vehicle).where(Vehicle.person_id == ROWS // 3),
+            "ix_vehicles_person_id_id",
+            id="vehicles-of-person",
+        ),
+        pytest.param(
+            lambda: select(User).where(func.lower(User.username) == "user-77"),
+            "ix_user_username_lower",
+            id="login",
+        ),
+    ],
+)
+def test_hot_queries_use_indexes(seeded, statement, index):
+    statement = statement()
+    assert seq_scans(statement) == []
+    assert index in indexes_used(statement)
+
+
+def test_vehicle_name_search_uses_trigram_index(seeded):
+    statement = filter_vehicles(select(Vehicle), {"name": "LE-4242"}).limit(100)
+    assert seq_scans(statement) == []
+    assert "ix_vehicles_name_trgm" in indexes_used(statement)
@@ -0,0 +1,260 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import create_app
+from app.config import TestConfig
+from app import outbox, stats
+from app.extensions import db
+from app.models import OutboxEvent
+from app.ratelimit import ExternalBuckets, InProcessBuckets, SharedBuckets
+
+# A burst of 2 and a rate too slow to refill during a test
+LIMITS = {
+    "default": (0.001, 2),
+    "api.Login": (0.001, 2),
+    "api.Register": (100, 100),
+}
+
+
+class FakeRedis:
+    """Stands in for the Redis server the workers share"""
+
+    def __init__(self):
+        self.buckets = InProcessBuckets()
+        self.keys = []
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.keys.extend(keys)
+            return str(self.buckets.take(keys[0], *args)).encode()
+
+        return run
+
+
+def make_app(tmp_path, **settings):
+    class RateLimitConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'ratelimit.db'}"
+        RATE_LIMIT_ENABLED = True
+        RATE_LIMITS = LIMITS
+
+    config = type("Config", (RateLimitConfig,), settings)
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def token(client, username, address="10.0.0.1"):
+    environ = {"REMOTE_ADDR": address}
+    client.post(
+        "/api/register",
+        json={"username": username, "password": "pw"},
+        environ_base=environ,
+    )
+    response = client.post(
+        "/api/login",
+        json={"username": username, "password": "pw"},
+        environ_base=environ,
+    )
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_buckets_are_per_user_and_endpoint(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    alice = token(client, "alice", "10.0.0.1")
+    bob = token(client, "bob", "10.0.0.2")
+
+    statuses = [client.get("/api/people", headers=alice).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    response = client.get("/api/people", headers=alice)
+    assert int(response.headers["Retry-After"]) > 1
+    # Other users, and the user's other endpoints, have buckets of their own
+    assert client.get("/api/people", headers=bob).status_code == 200
+    assert client.get("/api/stats", headers=alice).status_code == 200
+
+
+def test_login_is_limited_by_ip_address(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    token(client, "carol", "10.0.0.3")
+    credentials = {"username": "carol", "password": "wrong"}
+
+    def login(address):
+        return client.post(
+            "/api/login", json=credentials, environ_base={"REMOTE_ADDR": address}
+        ).status_code
+
+    assert login("10.0.0.3") == 401
+    assert login("10.0.0.3") == 429
+    assert login("10.0.0.4") == 401
+
+
+def test_invalid_tokens_spend_nothing(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    headers = token(client, "frank")
+    bad = {"Authorization": "Bearer not-a-token"}
+    assert [client.get("/api/stats", headers=bad).status_code for _ in range(3)] == [
+        422
+    ] * 3
+    assert client.get("/api/stats", headers=headers).status_code == 200
+
+
+def test_shared_buckets_limit_across_workers(tmp_path):
+    store = FakeRedis()
+    workers = [make_app(tmp_path) for _ in range(2)]
+    for app in workers:
+        app.extensions["ratelimit"].buckets = ExternalBuckets(store)
+    clients = [app.test_client() for app in workers]
+    headers = token(clients[0], "dave")
+
+    statuses = [
+        client.get("/api/stats", headers=headers).status_code
+        for client in (*clients, clients[1])
+    ]
+    assert statuses == [200, 200, 429]
+    assert store.keys[-1].startswith(
+        "car-management:ratelimit:api.FleetStatsResource:user:"
+    )
+
+
+def test_load_shedding_past_the_in_flight_limit(tmp_path, monkeypatch):
+    # Default pool and thread settings: 4 threads, so at most 16 in flight
+    app = make_app(tmp_path, RATE_LIMIT_ENABLED=False)
+    state = app.extensions["ratelimit"]
+    client = app.test_client()
+    headers = token(client, "erin")
+    assert state.max_in_flight == 16
+
+    # Slow statistics reads hold their requests until released
+    release = threading.Event()
+    read_counters = stats.read_counters
+
+    def slow_read_counters():
+        release.wait(10)
+        return read_counters()
+
+    monkeypatch.setattr(stats, "read_counters", slow_read_counters)
+    with ThreadPoolExecutor(state.max_in_flight) as executor:
+        reads = [
+            executor.submit(app.test_client().get, "/api/stats", headers=headers)
+            for _ in range(state.max_in_flight)
+        ]
+        deadline = time.monotonic() + 10
+        while state.in_flight < state.max_in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        response = client.get("/api/people", headers=headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        release.set()
+        assert all(read.result().status_code == 200 for read in reads)
+
+    assert state.in_flight == 0
+    assert client.get("/api/people", headers=headers).status_code == 200
+
+
+def test_change_feed_is_capped_apart_from_other_requests(tmp_path):
+    # Default thread settings: 4 threads, so at most 2 feed requests
+    app = make_app(tmp_path, RATE_LIMIT_ENABLED=False)
+    state = app.extensions["ratelimit"]
+    client = app.test_client()
+    headers = token(client, "gina")
+    assert state.max_long_lived == 2
+
+    # Long polls hold their requests until the next event
+    with app.app_context():
+        last = db.session.scalar(db.select(db.func.max(OutboxEvent.id))) or 0
+    url = f"/api/events?after={last}&wait=10"
+    with ThreadPoolExecutor(state.max_long_lived) as executor:
+        polls = [
+            executor.submit(app.test_client().get, url, headers=headers)
+            for _ in range(state.max_long_lived)
+        ]
+        deadline = time.monotonic() + 10
+        while state.long_lived < state.max_long_lived and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        response = client.get(url, headers=headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        # Other requests are not shed, counted by the app or by the server
+        assert state.in_flight == 0
+        state.queue_depth = lambda: state.max_in_flight + state.long_lived
+        assert client.get("/api/stats", headers=headers).status_code == 200
+        with app.app_context():
+            outbox.record("person.deleted", {"id": 0})
+            db.session.commit()
+        assert all(poll.result().status_code == 200 for poll in polls)
+
+    assert state.long_lived == 0
+
+    # An event stream holds its slot until the stream is over
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_STREAM_SECONDS=0.05)
+    response = client.get(
+        "/api/events",
+        headers={**headers, "Accept": "text/event-stream"},
+        buffered=False,
+    )
+    next(response.response)
+    assert state.long_lived == 1
+    response.close()
+    assert state.long_lived == 0
+
+
+def test_load_shedding_counts_the_server_queue(tmp_path):
+    app = make_app(tmp_path, RATE_LIMIT_ENABLED=False)
+    client = app.test_client()
+    headers = token(client, "frank")
+    state = app.extensions["ratelimit"]
+    # What gunicorn.conf.py installs for a gthread worker's queued requests
+    state.queue_depth = lambda: state.max_in_flight + 1
+    assert client.get("/api/stats", headers=headers).status_code == 503
+    state.queue_depth = lambda: state.max_in_flight
+    assert client.get("/api/stats", headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("buckets_class", [InProcessBuckets, SharedBuckets])
+@pytest.mark.parametrize("rate, burst", [(1, 1), (10, 3)])
+def test_buckets_refill(monkeypatch, buckets_class, rate, burst):
+    now = [100.0]
+    monkeypatch.setattr("app.ratelimit.time.monotonic", lambda: now[0])
+    buckets = buckets_class()
+    assert [buckets.take("k", rate, burst) for _ in range(burst)] == [0] * burst
+    assert buckets.take("k", rate, burst) == pytest.approx(1 / rate)
+    now[0] += 1.01 / rate
+    assert buckets.take("k", rate, burst) == 0
+
+
+def test_shared_buckets_are_shared_with_forked_workers(tmp_path):
+    app = make_app(tmp_path, WEB_WORKERS=3)
+    buckets = app.extensions["ratelimit"].buckets
+    assert isinstance(buckets, SharedBuckets)
+
+    def worker():
+        for _ in range(3):
+            buckets.take("api.FleetStatsResource:user:1", 0.001, 5)
+
+    process = multiprocessing.get_context("fork").Process(target=worker)
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    # Three of the five tokens went to the other process
+    limited = [
+        buckets.take("api.FleetStatsResource:user:1", 0.001, 5) > 0 for _ in range(3)
+    ]
+    assert limited == [False, False, True]
+
+
+def test_shared_buckets_replace_the_least_recently_used():
+    buckets = SharedBuckets(slots=4)
+    for index in range(20):
+        assert buckets.take(f"client:{index}", 0.001, 1) == 0
+    assert buckets.take("client:19", 0.001, 1) > 0
+    # The oldest clients were replaced and start over with a full bucket
+    assert buckets.take("client:0", 0.001, 1) == 0
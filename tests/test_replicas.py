@@ -0,0 +1,126 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from app import create_app
+from app.caching import InProcessBackend
+from app.config import TestConfig
+from app.extensions import db
+
+
+@pytest.fixture(scope="module")
+def replicated(tmp_path_factory):
+    """An app on two SQLite files standing in for a primary and its replica"""
+    directory = tmp_path_factory.mktemp("replicas")
+    primary, replica = directory / "primary.db", directory / "replica.db"
+
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        DATABASE_REPLICA_URIS = [f"sqlite:///{replica}"]
+        REPLICA_STICKY_SECONDS = 60
+
+    app = create_app(config_class=ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+
+        def replicate():
+            """Bring the replica up to date, as streaming replication would"""
+            db.session.remove()
+            app.extensions["replicas"].engines[0].dispose()
+            with closing(sqlite3.connect(primary)) as source, closing(
+                sqlite3.connect(replica)
+            ) as target:
+                source.backup(target)
+
+        replicate()
+        yield app, app.test_client(), replicate
+        db.session.remove()
+
+
+def login(client, username):
+    client.post("/api/register", json={"username": username, "password": "pw"})
+    token = client.post(
+        "/api/login", json={"username": username, "password": "pw"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def names(client, headers):
+    return [
+        person["name"] for person in client.get("/api/people", headers=headers).json
+    ]
+
+
+def forget_writes(app):
+    app.extensions["replicas"].marks = InProcessBackend()
+
+
+def test_reads_go_to_the_replica_unless_pinned(replicated):
+    app, client, replicate = replicated
+    writer, reader = login(client, "writer"), login(client, "reader")
+    replicate()
+
+    person = client.post(
+        "/api/people", json={"name": "Ada", "sale_oportunity": True}, headers=writer
+    ).json
+    # The writer reads its own write from the primary
+    assert names(client, writer) == ["Ada"]
+    # Other clients read the lagging replica...
+    assert names(client, reader) == []
+    assert client.get("/api/vehicles", headers=reader).json == []
+    assert client.get("/api/people/export", headers=reader).text.count("\n") == 1
+    # ...except for the person just written, which is not cached from it
+    response = client.get(f"/api/person/{person['id']}", headers=reader)
+    assert response.status_code == 200
+    assert response.json["name"] == "Ada"
+
+    # Batch reads are POSTs, but neither write nor pin the reader
+    response = client.post(
+        "/api/person/batch", json={"ids": [person["id"]]}, headers=reader
+    )
+    assert response.json == {"people": {}, "missing": [person["id"]]}
+    assert names(client, reader) == []
+
+    replicate()
+    assert names(client, reader) == ["Ada"]
+
+
+def test_stickiness_expires(replicated):
+    app, client, replicate = replicated
+    writer = login(client, "writer")
+    replicate()
+    person = client.post(
+        "/api/people", json={"name": "Grace", "sale_oportunity": True}, headers=writer
+    ).json
+    client.post(
+        f"/api/vehicles/person/{person['id']}",
+        json={"name": "Golf", "color": "gray", "model": "hatch"},
+        headers=writer,
+    )
+    assert client.get("/api/vehicles?color=gray", headers=writer).json != []
+
+    forget_writes(app)
+    assert "Grace" not in names(client, writer)
+    assert client.get("/api/vehicles?color=gray", headers=writer).json == []
+    assert client.get(f"/api/person/{person['id']}", headers=writer).status_code == 404
+
+    replicate()
+    assert "Grace" in names(client, writer)
+    assert client.get(f"/api/person/{person['id']}", headers=writer).status_code == 200
+
+
+def test_writes_and_unmarked_views_stay_on_the_primary(replicated):
+    app, client, replicate = replicated
+    writer = login(client, "writer")
+    forget_writes(app)
+    # Login, the vehicle slot check and the commit all run on the primary
+    person = client.post(
+        "/api/people", json={"name": "Linus", "sale_oportunity": True}, headers=writer
+    ).json
+    response = client.post(
+        f"/api/vehicles/person/{person['id']}",
+        json={"name": "Polo", "color": "blue", "model": "hatch"},
+        headers=writer,
+    )
+    assert response.status_code == 201
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+from flask import current_app
+from marshmallow import Schema, fields, post_dump
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
+from app.extensions import db
+from app.models import Person, Vehicle, VehicleColorEnum, VehicleModelEnum
+from app.schemas import PersonSchema, VehicleSchema
+from app.serializers import (
+    compile_dumper,
+    dump_people,
+    dump_person,
+    dump_vehicles,
+    json_body,
+)
+
+ALPHABET = "abcXYZ 019-_'\"\\/<>&\n\t\x00\x1f\x7fçãéÿ 中\U0001f697"
+NAMES = ["João Silva", "Natália Gomes", "Vitória Lima", "Zoë Ødegård", "Ana Souza"]
+
+
+def random_text(rng, max_length=100):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+def column_text(rng):
+    # PostgreSQL text cannot hold NUL
+    return random_text(rng).replace("\x00", "")
+
+
+def flask_body(data):
+    return current_app.json.response(data).get_data()
+
+
+def seed_people(rng, count):
+    person_ids = db.session.scalars(
+        insert(Person).returning(Person.id, sort_by_parameter_order=True),
+        [
+            {
+                "name": rng.choice([*NAMES, column_text(rng)]),
+                "sale_oportunity": rng.choice([True, False, None]),
+                "vehicle_count": 0,
+            }
+            for _ in range(count)
+        ],
+    ).all()
+    vehicles = [
+        {
+            "name": column_text(rng),
+            "color": rng.choice([*VehicleColorEnum, None]),
+            "model": rng.choice([*VehicleModelEnum, None]),
+            "person_id": person_id,
+        }
+        for person_id in person_ids
+        for _ in range(rng.randint(0, 3))
+    ]
+    if vehicles:
+        db.session.execute(insert(Vehicle), vehicles)
+    db.session.commit()
+    db.session.expunge_all()
+    return (
+        Person.query.options(selectinload(Person.vehicles))
+        .filter(Person.id.in_(person_ids))
+        .order_by(Person.id)
+        .all()
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fast_dumpers_are_byte_identical(test_app, seed):
+    rng = random.Random(seed)
+    people = seed_people(rng, rng.randint(1, 40))
+
+    expected = PersonSchema(many=True).dump(people)
+    assert dump_people(people) == expected
+    assert json_body(dump_people(people)) == flask_body(expected)
+    for person in people:
+        assert json_body(dump_person(person)) == flask_body(PersonSchema().dump(person))
+        expected = VehicleSchema(many=True).dump(person.vehicles)
+        assert json_body(dump_vehicles(person.vehicles)) == flask_body(expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_json_body_matches_flask(test_app, seed):
+    rng = random.Random(seed)
+
+    def value(depth=0):
+        kind = rng.randrange(7 if depth < 3 else 4)
+        if kind == 0:
+            return rng.choice([None, True, False])
+        if kind == 1:
+            return (
+                rng.randint(-(2**70), 2**70)
+                if rng.random() < 0.1
+                else rng.randint(-(2**63), 2**63 - 1)
+            )
+        if kind in (2, 3):
+            return random_text(rng, 20)
+        if kind in (4, 5):
+            return [value(depth + 1) for _ in range(rng.randint(0, 5))]
+        return {random_text(rng, 8): value(depth + 1) for _ in range(rng.randint(0, 5))}
+
+    for _ in range(50):
+        data = value()
+        with test_app.test_request_context():
+            assert json_body(data) == flask_body(data)
+
+
+def test_json_body_escapes_non_ascii_without_flask(test_app, monkeypatch):
+    data = {"name": "João \x7f 中 \U0001f697", "vehicles": [1]}
+    expected = flask_body(data)
+    assert b"\\u00e3" in expected and b"\\ud83d\\ude97" in expected
+
+    def refuse(data):
+        raise AssertionError("fell back to the Flask provider")
+
+    monkeypatch.setattr(current_app.json, "response", refuse)
+    assert json_body(data) == expected
+
+
+def test_compile_dumper_falls_back_to_the_fields():
+    class Custom(Schema):
+        id = fields.Integer(data_key="key")
+        label = fields.Method("get_label")
+        size = fields.Integer(dump_default=7)
+
+        def get_label(self, obj):
+            return f"#{obj.id}"
+
+    class Hooked(Custom):
+        @post_dump
+        def upper(self, data, **kwargs):
+            return {key.upper(): value for key, value in data.items()}
+
+    class Obj:
+        id = 3
+
+    assert compile_dumper(Custom())(Obj()) == Custom().dump(Obj())
+    assert compile_dumper(Custom(many=True))([Obj()]) == [
+        {"key": 3, "label": "#3", "size": 7}
+    ]
+    assert compile_dumper(Hooked())(Obj()) == Hooked().dump(Obj())
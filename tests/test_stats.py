@@ -0,0 +1,112 @@
+from app.extensions import db
+from app.models import FleetStat
+from app.stats import check, compute_counters, read_counters, report
+
+
+def _headers(get_jwt_token):
+    return {"Authorization": f"Bearer {get_jwt_token()}"}
+
+
+def _create_person(test_client, headers, sale_oportunity=True, vehicles=()):
+    person_id = test_client.post(
+        "/api/people",
+        json={"name": "Lead", "sale_oportunity": sale_oportunity},
+        headers=headers,
+    ).get_json()["id"]
+    vehicle_ids = [
+        test_client.post(
+            f"/api/vehicles/person/{person_id}",
+            json={"name": "Car", "color": color, "model": model},
+            headers=headers,
+        ).get_json()["id"]
+        for color, model in vehicles
+    ]
+    return person_id, vehicle_ids
+
+
+def test_stats_follow_every_write_path(test_client, get_jwt_token):
+    headers = _headers(get_jwt_token)
+    first, first_vehicles = _create_person(
+        test_client, headers, vehicles=[("blue", "sedan"), ("gray", "hatch")]
+    )
+    second, _ = _create_person(test_client, headers, vehicles=[("blue", "sedan")] * 3)
+    third, _ = _create_person(test_client, headers, sale_oportunity=False)
+    test_client.post(
+        "/api/people/import",
+        json=[
+            {
+                "name": "Imported",
+                "sale_oportunity": True,
+                "vehicles": [{"name": "Car", "color": "yellow", "model": "hatch"}],
+            }
+        ],
+        headers=headers,
+    )
+
+    response = test_client.get("/api/stats", headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["vehicles"]["blue"]["sedan"] == 4
+    assert data["vehicles"]["yellow"]["hatch"] == 1
+    assert data["persons"] == 4
+    assert data["persons_by_vehicle_count"] == {"0": 1, "1": 1, "2": 1, "3": 1}
+    assert data["sale_oportunity"] == 3
+    assert data["sale_oportunity_share"] == 0.75
+
+    test_client.delete(
+        f"/api/vehicle/{first_vehicles[0]}/person/{first}", headers=headers
+    )
+    test_client.patch(
+        f"/api/person/{third}", json={"sale_oportunity": True}, headers=headers
+    )
+    test_client.delete(f"/api/person/{second}", headers=headers)
+    test_client.post("/api/people/purge", json={"ids": [first]}, headers=headers)
+
+    data = test_client.get("/api/stats", headers=headers).get_json()
+    assert data["vehicles"]["blue"]["sedan"] == 0
+    assert data["vehicles"]["gray"]["hatch"] == 0
+    assert data["persons"] == 2
+    assert data["persons_by_vehicle_count"] == {"0": 1, "1": 1, "2": 0, "3": 0}
+    assert data["sale_oportunity"] == 2
+    assert check() == {}
+    assert report(read_counters()) == report(compute_counters())
+
+
+def test_rejected_writes_leave_stats_unchanged(test_client, get_jwt_token):
+    headers = _headers(get_jwt_token)
+    before = test_client.get("/api/stats", headers=headers).get_json()
+    person_id, _ = _create_person(test_client, headers, sale_oportunity=False)
+    response = test_client.post(
+        f"/api/vehicles/person/{person_id}",
+        json={"name": "Car", "color": "blue", "model": "sedan"},
+        headers=headers,
+    )
+    assert response.status_code == 403
+    full, _ = _create_person(test_client, headers, vehicles=[("gray", "sedan")] * 3)
+    response = test_client.post(
+        f"/api/vehicles/person/{full}",
+        json={"name": "Car", "color": "gray", "model": "sedan"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+    after = test_client.get("/api/stats", headers=headers).get_json()
+    assert after["persons"] == before["persons"] + 2
+    assert after["vehicles"]["gray"]["sedan"] == before["vehicles"]["gray"]["sedan"] + 3
+    assert check() == {}
+
+
+def test_stats_check_command_reports_and_fixes_drift(test_app, test_client):
+    db.session.add(FleetStat(key="persons:total", shard=99, value=5))
+    db.session.commit()
+    runner = test_app.test_cli_runner()
+
+    result = runner.invoke(args=["stats", "check"])
+    assert result.exit_code == 1
+    assert "persons:total" in result.output
+
+    result = runner.invoke(args=["stats", "check", "--fix"])
+    assert result.exit_code == 0
+    result = runner.invoke(args=["stats", "check"])
+    assert result.exit_code == 0
+    assert "consistent" in result.output
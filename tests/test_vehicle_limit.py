@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.extensions import db
+from app.models import Person, Vehicle
+
+
+def test_vehicle_limit_under_concurrent_requests(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_ids = [
+        test_client.post(
+            "/api/people",
+            json={"name": f"Racer {index}", "sale_oportunity": True},
+            headers=headers,
+        ).get_json()["id"]
+        for index in range(3)
+    ]
+
+    def add_vehicle(person_id):
+        response = test_client.post(
+            f"/api/vehicles/person/{person_id}",
+            json={"name": "Golf", "color": "yellow", "model": "hatch"},
+            headers=headers,
+        )
+        return person_id, response.status_code
+
+    attempts = [person_id for person_id in person_ids for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        results = list(executor.map(add_vehicle, attempts))
+
+    for person_id in person_ids:
+        statuses = [status for owner, status in results if owner == person_id]
+        assert statuses.count(201) == 3
+        assert statuses.count(400) == 5
+
+        db.session.expire_all()
+        assert Vehicle.query.filter_by(person_id=person_id).count() == 3
+        assert db.session.get(Person, person_id).vehicle_count == 3
+
+
+def test_vehicle_limit_frees_slot_on_delete(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = test_client.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+    vehicle = {"name": "Golf", "color": "yellow", "model": "hatch"}
+
+    vehicle_ids = [
+        test_client.post(
+            f"/api/vehicles/person/{person_id}", json=vehicle, headers=headers
+        ).get_json()["id"]
+        for _ in range(3)
+    ]
+    response = test_client.delete(
+        f"/api/vehicle/{vehicle_ids[0]}/person/{person_id}", headers=headers
+    )
+    assert response.status_code == 204
+
+    response = test_client.post(
+        f"/api/vehicles/person/{person_id}", json=vehicle, headers=headers
+    )
+    assert response.status_code == 201
+    response = test_client.post(
+        f"/api/vehicles/person/{person_id}", json=vehicle, headers=headers
+    )
+    assert response.status_code == 400
+
+
+def test_invalid_vehicle_does_not_use_a_slot(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    person_id = test_client.post(
+        "/api/people", json={"name": "Bob", "sale_oportunity": True}, headers=headers
+    ).get_json()["id"]
+
+    response = test_client.post(
+        f"/api/vehicles/person/{person_id}",
+        json={"name": "Golf", "color": "pink", "model": "hatch"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+    db.session.expire_all()
+    assert db.session.get(Person, person_id).vehicle_count == 0
+
+
+def test_add_vehicle_to_missing_person(test_client, get_jwt_token):
+    token = get_jwt_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.post(
+        "/api/vehicles/person/9999",
+        json={"name": "Golf", "color": "yellow", "model": "hatch"},
+        headers=headers,
+    )
+    assert response.status_code == 404
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Person
+
+FLEET = [
+    ("Blue Cabrio", "blue", "convertible"),
+    ("Gray Golf", "gray", "hatch"),
+    ("Blue Golf", "blue", "hatch"),
+    ("blue beetle", "blue", "convertible"),
+    ("Yellow Civic", "yellow", "sedan"),
+    ("100% Electric", "gray", "sedan"),
+]
+
+
+@pytest.fixture(scope="module")
+def fleet(test_client):
+    test_client.post("/api/register", json={"username": "inventory", "password": "pw"})
+    token = test_client.post(
+        "/api/login", json={"username": "inventory", "password": "pw"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ids = {}
+    for index, (name, color, model) in enumerate(FLEET):
+        if index % 3 == 0:
+            person_id = test_client.post(
+                "/api/people",
+                json={"name": f"Owner {index}", "sale_oportunity": True},
+                headers=headers,
+            ).get_json()["id"]
+        ids[name] = test_client.post(
+            f"/api/vehicles/person/{person_id}",
+            json={"name": name, "color": color, "model": model},
+            headers=headers,
+        ).get_json()["id"]
+    # The second owner is no longer a sale opportunity (the API cannot unset it)
+    db.session.execute(
+        update(Person).where(Person.id == person_id).values(sale_oportunity=False)
+    )
+    db.session.commit()
+    return headers, ids
+
+
+def search(test_client, headers, query):
+    response = test_client.get(f"/api/vehicles?{query}", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    pagination = json.loads(response.headers["X-Pagination"])
+    return [vehicle["name"] for vehicle in response.get_json()], pagination
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("color=blue&model=convertible", ["Blue Cabrio", "blue beetle"]),
+        ("color=blue", ["Blue Cabrio", "Blue Golf", "blue beetle"]),
+        ("model=sedan", ["Yellow Civic", "100% Electric"]),
+        ("name=GOLF", ["Gray Golf", "Blue Golf"]),
+        ("name=%25", ["100% Electric"]),
+        ("name=blue&model=hatch", ["Blue Golf"]),
+        ("sale_oportunity=true", ["Blue Cabrio", "Gray Golf", "Blue Golf"]),
+        ("sale_oportunity=false&color=blue", ["blue beetle"]),
+        ("color=yellow&model=convertible", []),
+    ],
+)
+def test_search_filters(test_client, fleet, query, expected):
+    headers, _ = fleet
+    names, _ = search(test_client, headers, query)
+    assert names == expected
+
+
+def test_search_pages_with_the_after_cursor(test_client, fleet):
+    headers, ids = fleet
+    names, pagination = search(test_client, headers, "color=blue&limit=2")
+    assert names == ["Blue Cabrio", "Blue Golf"]
+    assert pagination == {"limit": 2, "next_after": ids["Blue Golf"]}
+
+    names, pagination = search(
+        test_client, headers, f"color=blue&limit=2&after={pagination['next_after']}"
+    )
+    assert names == ["blue beetle"]
+    assert pagination["next_after"] is None
+
+
+def test_search_rejects_unknown_values(test_client, fleet):
+    headers, _ = fleet
+    response = test_client.get("/api/vehicles?color=purple", headers=headers)
+    assert response.status_code == 422
+    assert "color" in response.get_json()["errors"]["query"]
+    assert test_client.get("/api/vehicles").status_code == 401
@@ -0,0 +1,8 @@
+"""Production entry point, served by gunicorn with gunicorn.conf.py:
+
+gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()